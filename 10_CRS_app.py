@@ -1,9 +1,23 @@
 import streamlit as st
 import folium
 from streamlit_folium import folium_static
-from pyproj import Proj, transform
 import pandas as pd
 
+import crs_service
+import reprojection
+
+
+@st.cache_data(show_spinner="Transformando puntos...")
+def transform_points_csv(file_key, lon_col, lat_col, src, dst, _file):
+    """
+    Transforms the coordinate columns of an uploaded CSV once per file contents, columns and
+    CRS pair. Returns (DataFrame, stats, CSV bytes of the result).
+    """
+    _file.seek(0)
+    points_df, stats = crs_service.transform_csv(_file, lon_col, lat_col, src, dst)
+    return points_df, stats, points_df.to_csv(index=False).encode("utf-8")
+
+
 # Set the page title and a brief introduction
 st.set_page_config(page_title="Sistemas de Referencia de Coordenadas", layout="wide")
 
@@ -45,12 +59,8 @@ st.markdown(f"""
 Aquí, convertiremos sus coordenadas de entrada de **WGS84 (GCS)** a su **Sistema de coordenadas proyectadas (PCS)** seleccionado.
 """)
 try:
-	# Define the two CRS using pyproj
-	wgs84 = Proj(init='epsg:4326')
-	pcs = Proj(init=selected_epsg_code)
-
-	# Perform the transformation
-	utm_x, utm_y = transform(wgs84, pcs, lon, lat)
+	# Pooled Transformer (built once per CRS pair, reused across reruns)
+	utm_x, utm_y, _ = crs_service.transform_points(lon, lat, 'epsg:4326', selected_epsg_code)
 
 	st.subheader("Sus coordenadas:")
 	col1, col2 = st.columns(2)
@@ -62,6 +72,35 @@ try:
 except Exception as e:
     st.error(f"Se produjo un error durante la transformación de coordenadas: {e}. Por favor, revise sus datos..")
 
+# --- Batch transformation ---
+with st.expander("Transformacion por lotes (CSV)"):
+    st.markdown("Cargue un CSV con columnas de longitud y latitud (WGS84) para transformarlas al PCS seleccionado.")
+    csv_file = st.file_uploader("Cargar CSV de puntos", type=["csv"])
+    if csv_file:
+        columns = list(pd.read_csv(csv_file, nrows=0).columns)
+        csv_file.seek(0)
+        lon_col = st.selectbox("Columna de longitud", columns)
+        lat_col = st.selectbox("Columna de latitud", columns, index=min(1, len(columns) - 1))
+        try:
+            points_df, stats, points_csv = transform_points_csv(
+                reprojection.image_hash(csv_file.getvalue()), lon_col, lat_col,
+                'epsg:4326', selected_epsg_code, csv_file
+            )
+        except (KeyError, ValueError) as e:
+            st.error(f"No se pudo transformar el archivo: {e}")
+        else:
+            col1, col2, col3 = st.columns(3)
+            col1.metric("Puntos", f"{stats['points']:,}")
+            col2.metric("Tiempo (s)", f"{stats['seconds']:.3f}")
+            col3.metric("Rendimiento (puntos/s)", f"{stats['points_per_second']:,.0f}")
+            st.dataframe(points_df.head(1000), use_container_width=True)
+            st.download_button(
+                "Descargar CSV transformado",
+                points_csv,
+                file_name="puntos_transformados.csv",
+                mime="text/csv"
+            )
+
 # --- Map Visualization ---
 st.header("3. Mapa de visualization")
 st.markdown("""
@@ -2,6 +2,8 @@ import streamlit as st
 import numpy as np
 import matplotlib.pyplot as plt
 
+import sensor_catalog
+
 # --- Set up the page ---
 st.set_page_config(layout="wide")
 
@@ -115,6 +117,34 @@ st.write(
 
 st.markdown("---")
 
+# --- Real sensors from the catalogue ---
+st.header("Sensores reales: bandas y resolución")
+sensors, _ = sensor_catalog.load_catalog()
+optical = [name for name in sensors.index if sensors.at[name, "type"] == "Optico"]
+real_sensor = st.selectbox("Sensor", optical)
+sensor_bands = sensor_catalog.bands(real_sensor)
+row = sensor_catalog.sensor(real_sensor)
+
+fig, ax = plt.subplots(figsize=(10, 0.3 * len(sensor_bands) + 1))
+cmap = plt.get_cmap("viridis")
+gsd_log = np.log10(sensor_bands["gsd_m"].to_numpy())
+norm = plt.Normalize(gsd_log.min(), gsd_log.max() + 1e-9)
+for i, band in sensor_bands.iterrows():
+    ax.broken_barh([(band["wl_min_um"], band["wl_max_um"] - band["wl_min_um"])], (i - 0.4, 0.8),
+                   color=cmap(norm(np.log10(band["gsd_m"]))))
+ax.set_yticks(range(len(sensor_bands)), [f"{b} ({g:g} m)" for b, g in zip(sensor_bands["band"], sensor_bands["gsd_m"])])
+ax.set_xscale("log")
+ax.set_xlabel("Longitud de onda (µm)")
+ax.set_title(f"{row['instrument']}: bandas espectrales (color = GSD)")
+st.pyplot(fig)
+
+c1, c2, c3 = st.columns(3)
+c1.metric("Pixel mas fino", f"{row['min_gsd_m']:g} m")
+c2.metric("Revisita", f"{row['revisit_days']:g} dias")
+c3.metric("Niveles radiometricos", f"{2 ** int(row['bit_depth']):,}", help=f"{row['bit_depth']} bits")
+
+st.markdown("---")
+
 autor = st.text_input("Ingrese su nombre y apellido:")
 st.write(f"Realizado por: {autor}")
 
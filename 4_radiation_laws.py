@@ -1,8 +1,9 @@
 import streamlit as st
-import numpy as np
 import plotly.graph_objects as go
 import plotly.express as px
 
+import radiometry
+
 # Set the page title and a brief introduction
 st.set_page_config(page_title="Teoria de la Radiacion", layout="wide")
 
@@ -35,11 +36,10 @@ with st.container():
     with col2:
         emissivity = st.slider("Seleccione una Emisividad (ε)", 0.0, 1.0, 1.0, step=0.01, help="1.0 para un cuerpo negro perfecto, 0.2 para metales brillantes.")
 
-    stefan_boltzmann_constant = 5.67e-8
     area = 1.0 # Assume a fixed area of 1 m^2 for simplicity
 
     # Calculate the power and format the output
-    power = stefan_boltzmann_constant * emissivity * area * (temperature**4)
+    power = radiometry.stefan_boltzmann(temperature, emissivity) * area
     st.metric(label=f"Potencia total radiada (W) for T={temperature}K, ε={emissivity}", value=f"{power:.2f}")
 
 st.markdown("---")
@@ -60,10 +60,8 @@ $\lambda_{max}$ = $\frac{b}{T}$
 with st.container():
     st.subheader("Interactividad:")
     temperature_wien = st.slider("Seleccione una Temperatura para la Ley de Wien (Kelvin)", 500, 6000, 2500, step=100)
-    wien_constant = 2.898e-3
-
     # Calculate the peak wavelength in meters and nanometers
-    peak_wavelength_m = wien_constant / temperature_wien
+    peak_wavelength_m = radiometry.wien_peak(temperature_wien)
     peak_wavelength_nm = peak_wavelength_m * 1e9
 
     # Display the results
@@ -83,27 +81,13 @@ with st.container():
     st.subheader("Curva de radiación de cuerpo negro")
     st.write("Esta gráfica muestra la radiancia espectral de un cuerpo negro a diferentes temperaturas. Observe cómo el pico se desplaza hacia la izquierda (longitudes de onda más cortas) a medida que aumenta la temperatura.")
 
-    def planck_radiation(wavelength, temp):
-        h = 6.626e-34  # Planck's constant
-        c = 3.0e8      # Speed of light
-        k = 1.38e-23   # Boltzmann constant
-        
-        # Wavelength must be in meters for the formula
-        wavelength_m = wavelength * 1e-9
-
-        numerator = 2 * h * c**2
-        denominator = (wavelength_m**5) * (np.exp((h * c) / (wavelength_m * k * temp)) - 1)
-        return numerator / denominator
-
-    # Generate data for the plot
-    wavelengths = np.linspace(100, 3000, 500) # Wavelengths in nm
-    temps = [2000, 3000, 4000, 5000, 6000]
+    # Precomputed (temperature x wavelength) table: 2000-6000 K every 1000 K, 100-3000 nm
+    temps, wavelengths, radiance_table = radiometry.planck_table(2000, 6000, 1000, 100, 3000, 500)
 
     fig = go.Figure()
 
-    for t in temps:
-        radiance = planck_radiation(wavelengths, t)
-        fig.add_trace(go.Scatter(x=wavelengths, y=radiance, mode='lines', name=f'{t} K'))
+    for t, radiance in zip(temps, radiance_table):
+        fig.add_trace(go.Scatter(x=wavelengths, y=radiance, mode='lines', name=f'{t:.0f} K'))
 
     fig.update_layout(
         title="Radiancia espectral del cuerpo negro vs. longitud de onda",
@@ -2,6 +2,9 @@ import streamlit as st
 import numpy as np
 import plotly.graph_objects as go
 
+import emissivity as emissivity_db
+import radiometry
+
 # Configuración de la página
 st.set_page_config(page_title="Teoría de la Radiación", layout="wide")
 
@@ -32,13 +35,18 @@ with st.container():
     with col1:
         temperature = st.slider("Temperatura (Kelvin)", 200, 3000, 500, step=10)
     with col2:
-        emissivity = st.slider("Emisividad (ε)", 0.0, 1.0, 1.0, step=0.01)
+        sb_material = st.selectbox("Material", ["Emisividad manual"] + emissivity_db.default_library().names)
+        if sb_material == "Emisividad manual":
+            emissivity = st.slider("Emisividad (ε)", 0.0, 1.0, 1.0, step=0.01)
+        else:
+            # Emisividad media ponderada por la curva de Planck a esta temperatura (3-14 µm)
+            emissivity = emissivity_db.effective_emissivity(sb_material, temperature)
+            st.metric("Emisividad efectiva (ε)", f"{emissivity:.3f}")
     with col3:
         area = st.number_input("Area (m2)", value=0.0, placeholder="Ingrese el area del objeto" )
 
-    stefan_boltzmann_constant = 5.67e-8
     #area = 1.0  # Área fija de 1 m^2
-    power = stefan_boltzmann_constant * emissivity * area * (temperature**4)
+    power = radiometry.stefan_boltzmann(temperature, emissivity) * area
     
     st.metric(label=f"Potencia total radiada (W) para T={temperature}K", value=f"{power:.2f} W")
 
@@ -61,65 +69,86 @@ with st.container():
     st.subheader("Visualización de la Ley de Planck")
     temp_wien = st.slider("Ajustar Temperatura para el gráfico (Kelvin)", 0, 6000, 3000, step=10)
     
-    wien_constant = 2.898e-3
-    peak_m = wien_constant / temp_wien
+    peak_m = radiometry.wien_peak(temp_wien)
     peak_nm = peak_m * 1e9
 
-    st.metric(label="Longitud de onda máxima (λ_max)", value=f"{peak_nm:.2f} nm")
-
-    # Función de Planck corregida
-    def planck_radiation(wavelength_nm, temp):
-        h = 6.626e-34
-        c = 3.0e8
-        k = 1.38e-23
-        w_m = wavelength_nm * 1e-9
-        
-        exponent = (h * c) / (w_m * k * temp)
-        # Evitar overflow en exp
-        with np.errstate(over='ignore'):
-            denominator = np.exp(exponent) - 1
-        
-        radiance = (2 * h * c**2) / (w_m**5 * denominator)
-        return radiance / 1e9 # Convertir a por nm para el eje Y
-
-    wavelengths = np.linspace(100, 3000, 600)
+    st.metric(label="Longitud de onda máxima (λ_max)", value=f"{peak_nm:.2f} nm" if np.isfinite(peak_nm) else "∞")
+
+    # Curvas precalculadas (0-6000 K cada 10 K, 100-3000 nm): el deslizador solo indexa la tabla
+    planck_curves = radiometry.planck_table(0, 6000, 10, 100, 3000, 600)
+    wavelengths = planck_curves[1]
     fig = go.Figure()
 
     # Añadir curvas de referencia
     for t in [3000, 4000, 5000]:
-        fig.add_trace(go.Scatter(x=wavelengths, y=planck_radiation(wavelengths, t), 
+        fig.add_trace(go.Scatter(x=wavelengths, y=radiometry.table_curve(planck_curves, t),
                                  name=f"{t}K", line=dict(dash='dash', width=1)))
     
     # Curva interactiva
-    fig.add_trace(go.Scatter(x=wavelengths, y=planck_radiation(wavelengths, temp_wien), 
+    fig.add_trace(go.Scatter(x=wavelengths, y=radiometry.table_curve(planck_curves, temp_wien),
                              name=f"Actual: {temp_wien}K", line=dict(color='orange', width=3)))
 
-    fig.update_layout(title="Espectro de Cuerpo Negro", xaxis_title="λ (nm)", yaxis_title="Radiancia")
+    fig.update_layout(title="Espectro de Cuerpo Negro", xaxis_title="λ (nm)", yaxis_title="Radiancia (W/m²/sr/nm)")
     st.plotly_chart(fig, use_container_width=True)
 
 st.markdown("---")
 
+# --- Sección 2b: Inversión de Planck ---
+st.header("2b. De radiancia a temperatura de brillo")
+st.write(r"""
+Un sensor térmico mide radiancia. Invirtiendo la ley de Planck se obtiene la **temperatura de brillo**,
+la temperatura de un cuerpo negro que emitiría esa radiancia en la banda:
+
+$$T_B = \frac{K_2}{\ln\left(\frac{K_1}{L_\lambda} + 1\right)}$$
+""")
+
+col1, col2 = st.columns(2)
+with col1:
+    thermal_band = st.selectbox("Banda térmica", list(radiometry.LANDSAT_THERMAL), format_func=lambda b: f"Landsat 8/9 {b}")
+with col2:
+    band_radiance = st.number_input("Radiancia en la banda (W/m²/sr/µm)", 0.1, 30.0, 9.6, step=0.1)
+
+constants = radiometry.LANDSAT_THERMAL[thermal_band]
+bt_k1k2 = radiometry.brightness_temperature(band_radiance, constants["K1"], constants["K2"])
+bt_lut = radiometry.band_brightness_temperature(band_radiance, constants["response"])
+col1, col2 = st.columns(2)
+col1.metric("T_B con K1/K2", f"{bt_k1k2:.2f} K ({bt_k1k2 - 273.15:.2f} °C)")
+col2.metric("T_B con la tabla de Planck de la banda", f"{bt_lut:.2f} K ({bt_lut - 273.15:.2f} °C)")
+
+st.markdown("---")
+
 # --- Sección 3: Ley de Kirchhoff ---
 st.header("3. Ley de Kirchhoff")
 st.write(r"En equilibrio térmico: $\epsilon(\lambda, T) = \alpha(\lambda, T)$")
 
-material = st.selectbox(
-    "Seleccione un material",
-    ["Cuerpo negro perfecto", "Plata pulida", "Madera", "Asfalto"]
-)
+library = emissivity_db.default_library()
+material = st.selectbox("Seleccione un material", library.names)
 
-material_data = {
-    "Cuerpo negro perfecto": (1.0, "Absorbe y emite al máximo nivel teórico."),
-    "Plata pulida": (0.02, "Refleja casi todo; emite y absorbe muy poco."),
-    "Madera": (0.90, "Buen emisor de infrarrojos."),
-    "Asfalto": (0.95, "Casi un cuerpo negro; se calienta mucho bajo el sol.")
+material_notes = {
+    "Cuerpo negro perfecto": "Absorbe y emite al máximo nivel teórico.",
+    "Plata pulida": "Refleja casi todo; emite y absorbe muy poco.",
+    "Madera": "Buen emisor de infrarrojos.",
+    "Asfalto": "Casi un cuerpo negro; se calienta mucho bajo el sol.",
+    "Suelo arenoso": "El cuarzo produce un mínimo de emisividad entre 8 y 10 µm.",
+    "Agua": "Emisor casi perfecto en el infrarrojo térmico.",
 }
 
-val, desc = material_data[material]
+wl, em = library.curve(material)
+band_values = emissivity_db.band_emissivity(radiometry.SENSOR_RESPONSES["Landsat 8/9 B10"], library)
+val = float(band_values[library.index(material)])
 col_a, col_b = st.columns(2)
-col_a.metric("Emisividad (ε)", val)
-col_b.metric("Absorptividad (α)", val)
-st.info(desc)
+col_a.metric("Emisividad (ε) Landsat B10", f"{val:.3f}")
+col_b.metric("Absorptividad (α) Landsat B10", f"{val:.3f}")
+
+fig = go.Figure()
+fig.add_trace(go.Scatter(x=wl, y=em, mode="lines+markers", name=material))
+for band in radiometry.LANDSAT_THERMAL:
+    band_wl = radiometry.SENSOR_RESPONSES[f"Landsat 8/9 {band}"][0]
+    fig.add_vrect(x0=band_wl[0], x1=band_wl[-1], opacity=0.15, line_width=0, annotation_text=band)
+fig.update_layout(title="Emisividad espectral (ε = α)", xaxis_title="λ (µm)", yaxis_title="ε",
+                  yaxis_range=[0, 1.05])
+st.plotly_chart(fig, use_container_width=True)
+st.info(material_notes.get(material, "Curva aproximada de la biblioteca espectral."))
 
 st.markdown("---")
 
@@ -3,6 +3,9 @@ import numpy as np
 import plotly.graph_objects as go
 import pandas as pd
 
+import reprojection
+import spectral_library
+
 # Set the page title and a brief introduction
 st.set_page_config(page_title="Firmas espectrales", layout="wide")
 
@@ -14,72 +17,57 @@ Una firma espectral es un patrón único de reflectancia, transmitancia o absorb
 """)
 st.markdown("---")
 
-# --- Sample Spectral Data ---
-# This is a simplified representation of spectral signatures for common materials.
-# Wavelengths are in nanometers (nm).
-# Reflectance values are unitless (0 to 1).
-wavelengths = np.arange(400, 2500, 20)
-spectral_data = {
-    'Vegetacion': {
-        'reflectance': [
-            0.05, 0.05, 0.06, 0.07, 0.1, 0.12, 0.15, 0.25, 0.35, 0.45, 0.5, 0.5, 0.45,
-            0.4, 0.35, 0.3, 0.25, 0.2, 0.18, 0.16, 0.14, 0.12, 0.11, 0.1, 0.09, 0.08,
-            0.08, 0.07, 0.06, 0.06, 0.05, 0.05, 0.05, 0.04, 0.04, 0.03, 0.03, 0.02,
-            0.02, 0.02, 0.02, 0.02, 0.02, 0.02, 0.02, 0.02, 0.02, 0.02, 0.02, 0.02,
-            0.02, 0.02, 0.02, 0.02, 0.02, 0.02, 0.02, 0.02, 0.02, 0.02, 0.02, 0.02,
-            0.02, 0.02, 0.02, 0.02, 0.02, 0.02, 0.02, 0.02, 0.02, 0.02, 0.02, 0.02,
-            0.02, 0.02, 0.02, 0.02, 0.02, 0.02, 0.02, 0.02, 0.02, 0.02, 0.02, 0.02,
-            0.02, 0.02, 0.02, 0.02, 0.02, 0.02, 0.02, 0.02, 0.02, 0.02, 0.02, 0.02,
-            0.02, 0.02, 0.02, 0.02, 0.02, 0.02, 0.02, 0.02, 0.02, 0.02, 0.02, 0.02,
-        ][:len(wavelengths)] # Truncate to match wavelengths length
-    },
-    'Agua': {
-        'reflectance': [
-            0.05, 0.04, 0.03, 0.02, 0.02, 0.02, 0.01, 0.01, 0.01, 0.01, 0.01, 0.01, 0.01,
-            0.01, 0.01, 0.01, 0.01, 0.01, 0.01, 0.01, 0.01, 0.01, 0.01, 0.01, 0.01, 0.01,
-            0.01, 0.01, 0.01, 0.01, 0.01, 0.01, 0.01, 0.01, 0.01, 0.01, 0.01, 0.01,
-            0.01, 0.01, 0.01, 0.01, 0.01, 0.01, 0.01, 0.01, 0.01, 0.01, 0.01, 0.01,
-            0.01, 0.01, 0.01, 0.01, 0.01, 0.01, 0.01, 0.01, 0.01, 0.01, 0.01, 0.01,
-            0.01, 0.01, 0.01, 0.01, 0.01, 0.01, 0.01, 0.01, 0.01, 0.01, 0.01, 0.01,
-            0.01, 0.01, 0.01, 0.01, 0.01, 0.01, 0.01, 0.01, 0.01, 0.01, 0.01, 0.01,
-            0.01, 0.01, 0.01, 0.01, 0.01, 0.01, 0.01, 0.01, 0.01, 0.01, 0.01, 0.01,
-            0.01, 0.01, 0.01, 0.01, 0.01, 0.01, 0.01, 0.01, 0.01, 0.01, 0.01, 0.01,
-        ][:len(wavelengths)]
-    },
-    'Suelo seco': {
-        'reflectance': [
-            0.15, 0.16, 0.17, 0.18, 0.2, 0.22, 0.24, 0.26, 0.28, 0.3, 0.32, 0.34, 0.36,
-            0.38, 0.4, 0.42, 0.44, 0.46, 0.48, 0.5, 0.52, 0.54, 0.56, 0.58, 0.6, 0.62,
-            0.64, 0.66, 0.68, 0.7, 0.72, 0.74, 0.76, 0.78, 0.8, 0.82, 0.84, 0.86,
-            0.88, 0.9, 0.92, 0.94, 0.96, 0.98, 1.0, 1.02, 1.04, 1.06, 1.08, 1.1,
-            1.12, 1.14, 1.16, 1.18, 1.2, 1.22, 1.24, 1.26, 1.28, 1.3, 1.32, 1.34,
-            1.36, 1.38, 1.4, 1.42, 1.44, 1.46, 1.48, 1.5, 1.52, 1.54, 1.56, 1.58,
-            1.6, 1.62, 1.64, 1.66, 1.68, 1.7, 1.72, 1.74, 1.76, 1.78, 1.8, 1.82,
-            1.84, 1.86, 1.88, 1.9, 1.92, 1.94, 1.96, 1.98, 2.0, 2.02, 2.04, 2.06,
-            2.08, 2.1, 2.12, 2.14, 2.16, 2.18, 2.2, 2.22, 2.24, 2.26, 2.28, 2.3,
-        ][:len(wavelengths)]
-    },
-    'Nieve/hielo': {
-        'reflectance': [
-            0.9, 0.9, 0.89, 0.88, 0.87, 0.85, 0.82, 0.79, 0.75, 0.7, 0.65, 0.6, 0.55,
-            0.5, 0.45, 0.4, 0.35, 0.3, 0.25, 0.2, 0.18, 0.16, 0.14, 0.12, 0.1, 0.08,
-            0.07, 0.06, 0.05, 0.04, 0.03, 0.02, 0.01, 0.01, 0.01, 0.01, 0.01, 0.01,
-            0.01, 0.01, 0.01, 0.01, 0.01, 0.01, 0.01, 0.01, 0.01, 0.01, 0.01, 0.01,
-            0.01, 0.01, 0.01, 0.01, 0.01, 0.01, 0.01, 0.01, 0.01, 0.01, 0.01, 0.01,
-            0.01, 0.01, 0.01, 0.01, 0.01, 0.01, 0.01, 0.01, 0.01, 0.01, 0.01, 0.01,
-            0.01, 0.01, 0.01, 0.01, 0.01, 0.01, 0.01, 0.01, 0.01, 0.01, 0.01, 0.01,
-            0.01, 0.01, 0.01, 0.01, 0.01, 0.01, 0.01, 0.01, 0.01, 0.01, 0.01, 0.01,
-            0.01, 0.01, 0.01, 0.01, 0.01, 0.01, 0.01, 0.01, 0.01, 0.01, 0.01, 0.01,
-        ][:len(wavelengths)]
-    }
-}
+# --- Spectral library ---
+# Built-in sample spectra (nm, reflectance 0-1) plus any USGS / ECOSTRESS ASCII
+# spectra the user uploads, in a columnar store (see spectral_library.py).
+
+
+@st.cache_resource(show_spinner="Cargando espectros...")
+def load_library(file_keys, wavelength_key, _files, _wavelength_file):
+    """
+    Parses the uploaded spectra and merges them with the sample spectra. Returns (library, errors).
+    The library object is shared across reruns (not copied), so its band matrices are built once.
+    """
+    wavelengths = None
+    if _wavelength_file is not None:
+        wavelengths = spectral_library.parse_wavelengths(_wavelength_file.getvalue().decode("utf-8", errors="ignore"))
+    records, errors = list(spectral_library.sample_library().records()), []
+    for uploaded in _files:
+        try:
+            text = uploaded.getvalue().decode("utf-8", errors="ignore")
+            records.append(spectral_library.parse_spectrum(text, wavelengths=wavelengths))
+        except ValueError as e:
+            errors.append(f"{uploaded.name}: {e}")
+    return spectral_library.SpectralLibrary.from_records(records), errors
+
+
+st.sidebar.header("Biblioteca espectral")
+spectrum_files = st.sidebar.file_uploader(
+    "Espectros ASCII (USGS splib07 / ECOSTRESS)", type=["txt", "asc"], accept_multiple_files=True
+)
+wavelength_file = st.sidebar.file_uploader("Longitudes de onda USGS (para archivos de una columna)", type=["txt"])
+library, load_errors = load_library(
+    tuple(reprojection.image_hash(f.getvalue()) for f in spectrum_files),
+    reprojection.image_hash(wavelength_file.getvalue()) if wavelength_file else None,
+    spectrum_files, wavelength_file
+)
+for error in load_errors:
+    st.sidebar.warning(error)
+st.sidebar.caption(f"{len(library)} espectros en {len(library.grids)} rejillas de longitud de onda")
 
 # --- Sidebar for user input ---
 st.sidebar.header("Seleccione los materiales a comparar:")
+categories = sorted(set(library.categories))
+category = st.sidebar.selectbox("Categoria", ["Todas"] + categories)
+search = st.sidebar.text_input("Buscar material")
+options = [
+    name for name, cat in zip(library.names, library.categories)
+    if (category == "Todas" or cat == category) and search.lower() in name.lower()
+]
 selected_materials = st.sidebar.multiselect(
     "Seleccione uno o mas materiales:",
-    list(spectral_data.keys()),
-    default=["Vegetacion", "Agua", "Suelo seco"]
+    options,
+    default=[m for m in ["Vegetacion", "Agua", "Suelo seco"] if m in options]
 )
 
 # --- Main plot ---
@@ -89,7 +77,7 @@ if not selected_materials:
 else:
     fig = go.Figure()
     for material in selected_materials:
-        reflectance = spectral_data[material]['reflectance']
+        wavelengths, reflectance = library.curve(material)
         fig.add_trace(go.Scatter(
             x=wavelengths,
             y=reflectance,
@@ -106,6 +94,7 @@ else:
     fig.update_layout(
         title="Reflectancia vs. longitud de onda para los materiales seleccionados",
         xaxis_title="Longitud de onda (nm)",
+        xaxis_range=list(spectral_library.PLOT_RANGE),
         yaxis_title="Reflectancia",
         yaxis_range=[0, 1],
         legend_title="Materiales",
@@ -114,6 +103,27 @@ else:
     )
     st.plotly_chart(fig, use_container_width=True)
 
+    # --- Resampling to sensor bands ---
+    st.header("Firmas vistas por un sensor")
+    sensor = st.selectbox("Sensor", list(spectral_library.SENSOR_BANDS))
+    members = [library.index(m) for m in selected_materials]
+    bands, band_values = library.sensor_values(sensor, members)
+    centers = [spectral_library.SENSOR_BANDS[sensor][b][0] for b in bands]
+    order = np.argsort(centers)
+    fig_bands = go.Figure()
+    for material, values in zip(selected_materials, band_values):
+        fig_bands.add_trace(go.Scatter(
+            x=np.asarray(centers)[order], y=values[order], mode="lines+markers", name=material,
+            text=np.asarray(bands)[order], hovertemplate="%{text}: %{y:.3f}"
+        ))
+    fig_bands.update_layout(
+        title=f"Reflectancia equivalente en las bandas de {sensor}",
+        xaxis_title="Centro de banda (nm)", yaxis_title="Reflectancia", yaxis_range=[0, 1],
+        xaxis_range=list(spectral_library.PLOT_RANGE)
+    )
+    st.plotly_chart(fig_bands, use_container_width=True)
+    st.dataframe(pd.DataFrame(band_values, index=selected_materials, columns=bands).round(3))
+
     st.markdown("---")
     st.header("Descripcion de los materiales y caracteristicas claves")
     for material in selected_materials:
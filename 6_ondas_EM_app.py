@@ -1,8 +1,9 @@
 import streamlit as st
 import numpy as np
-import plotly.graph_objects as go
 import pandas as pd
 
+import em_spectrum
+
 
 # Set page title and a brief introduction
 st.set_page_config(page_title="Espectro Electromagnetico", layout="wide")
@@ -18,10 +19,6 @@ Donde $c$ es la velocidad de la luz ($3.0 \times 10^8 \, m/s$) y $h$ es la const
 """)
 st.markdown("---")
 
-# --- Constants ---
-C = 3.0e8  # Speed of light in m/s
-H = 6.626e-34  # Planck's constant in J*s
-
 # --- Sidebar for user input ---
 st.sidebar.header("Parámetros de onda")
 st.sidebar.markdown("Utilice el control deslizante a continuación para cambiar la longitud de onda y ver cómo cambian los demás parámetros.")
@@ -39,90 +36,55 @@ wavelength_log = st.sidebar.slider(
 wavelength_m = 10**wavelength_log
 st.sidebar.metric("Longitud de onda ($\lambda$)", f"{wavelength_m:.2e} m")
 
-# Calculate Frequency and Energy based on the selected wavelength
-if wavelength_m > 0:
-    frequency = C / wavelength_m
-    energy_joules = H * frequency
-    energy_ev = energy_joules / 1.602e-19  # Convert Joules to electron-volts
+# Frequency, energy and wavenumber of the selected wavelength
+values = em_spectrum.describe(wavelength_m)
+region = em_spectrum.region_of(wavelength_m)
+color = em_spectrum.visible_color(wavelength_m)
 
 # --- Main App Content ---
 st.header("Valores calculados")
-col1, col2 = st.columns(2)
+col1, col2, col3, col4 = st.columns(4)
 
 with col1:
-    st.metric(
-        label="Frequencia ($\nu$)",
-        value=f"{frequency:.2e} Hz" if 'frequency' in locals() else "N/A"
-    )
+    st.metric(label="Frequencia ($\\nu$)", value=f"{values['Hz']:.2e} Hz")
 
 with col2:
     st.metric(
         label="Energia (E)",
-        value=f"{energy_joules:.2e} J" if 'energy_joules' in locals() else "N/A",
-        help=f"Energy is also {energy_ev:.2e} eV" if 'energy_ev' in locals() else ""
+        value=f"{values['J']:.2e} J",
+        help=f"Energy is also {values['eV']:.2e} eV"
     )
 
+with col3:
+    st.metric(label="Numero de onda", value=f"{values['cm-1']:.2e} cm⁻¹")
+
+with col4:
+    st.metric(label="Region", value=str(region), help=f"Color: {color}" if color else None)
+
+with st.expander("Conversor de unidades"):
+    c1, c2, c3 = st.columns([3, 1, 1])
+    text = c1.text_input("Valores (separados por comas)", "400, 550, 700")
+    from_unit = c2.selectbox("De", list(em_spectrum.UNITS), index=list(em_spectrum.UNITS).index("nm"))
+    to_unit = c3.selectbox("A", list(em_spectrum.UNITS), index=list(em_spectrum.UNITS).index("THz"))
+    try:
+        numbers = np.array([float(v) for v in text.replace(";", ",").split(",") if v.strip()])
+    except ValueError:
+        st.warning("Ingrese numeros separados por comas")
+    else:
+        converted = em_spectrum.convert(numbers, from_unit, to_unit)
+        st.dataframe(pd.DataFrame({
+            f"Valor ({from_unit})": numbers,
+            f"Valor ({to_unit})": np.atleast_1d(converted),
+            "Region": np.atleast_1d(em_spectrum.region_of(em_spectrum.convert(numbers, from_unit, "m"))),
+        }), use_container_width=True)
+
 st.markdown("---")
 
 # --- Interactive Spectrum Visualization ---
 st.header("Espectro Electromagnetico")
 
-# Define the boundaries of the EM spectrum regions (in meters)
-spectrum_regions = {
-    'Ondas de Radio': {'start': 1e-1, 'end': 1e4, 'color': 'rgba(128, 0, 128, 0.4)'},
-    'Microondas': {'start': 1e-3, 'end': 1e-1, 'color': 'rgba(255, 165, 0, 0.4)'},
-    'Infrarroja': {'start': 7e-7, 'end': 1e-3, 'color': 'rgba(255, 0, 0, 0.4)'},
-    'Luz visible': {'start': 4e-7, 'end': 7e-7, 'color': 'rgba(0, 255, 0, 0.4)'},
-    'Ultravioleta': {'start': 1e-8, 'end': 4e-7, 'color': 'rgba(0, 0, 255, 0.4)'},
-    'Rayos X': {'start': 1e-11, 'end': 1e-8, 'color': 'rgba(128, 128, 128, 0.4)'},
-    'Rayos Gamma': {'start': 1e-15, 'end': 1e-11, 'color': 'rgba(255, 255, 0, 0.4)'},
-}
-
-# Create a Plotly figure to visualize the spectrum
-fig = go.Figure()
-
-for region_name, region_data in spectrum_regions.items():
-    # Plotting rectangles for each region of the spectrum
-    fig.add_shape(
-        type="rect",
-        x0=np.log10(region_data['start']),
-        y0=0,
-        x1=np.log10(region_data['end']),
-        y1=1,
-        fillcolor=region_data['color'],
-        line=dict(width=0),
-        layer="below"
-    )
-    # Add annotation for the region name
-    fig.add_annotation(
-        x=np.log10(region_data['start']) + (np.log10(region_data['end']) - np.log10(region_data['start'])) / 2,
-        y=0.5,
-        text=region_name,
-        showarrow=False,
-        font=dict(size=10, color='black')
-    )
-
-# Add a vertical line to show the selected wavelength
-fig.add_vline(
-    x=wavelength_log,
-    line_width=3,
-    line_dash="dash",
-    line_color="black",
-    annotation_text=f"Su seleccion",
-    annotation_position="top right"
-)
-
-fig.update_layout(
-    title="Espectro Electromagnetico",
-    xaxis_title="Longitud de onda ($\lambda$) (log10 meters)",
-    yaxis_title="Escala relative",
-    showlegend=False,
-    xaxis_range=[-15, 4],
-    yaxis_range=[0, 1],
-    height=300,
-    margin=dict(l=20, r=20, t=40, b=20)
-)
-st.plotly_chart(fig, use_container_width=True)
+# Static regions come from a cached layout; only the selection marker changes
+st.plotly_chart(em_spectrum.spectrum_figure(wavelength_m), use_container_width=True)
 
 # Explanation of the visible spectrum within the visualization
 with st.expander("Explore el espectro visible"):
@@ -149,25 +111,34 @@ st.markdown("""
 3. Enviar por email el resultado.
 """)
 
-# Initial scorecard dataframe
-df = pd.DataFrame({
-    'EEM': ['Longitud de onda', 'Frecuencia', 'Energia'],
-    'Infrarroja': [0, 0, 0],
-    'Microondas': [0, 0, 0]
-})
-
-# Getting user input
-input_F1 = st.number_input('Valor Frecuencia', key= 1, value=0.0)
-input_E1 = st.number_input('Valor Energia', key=2, value=0.0)
-
-input_F2 = st.number_input('Valor Frecuencia', key=3, value=0.0)
-input_E2 = st.number_input('Valor Energia', key=4, value=0.0)
-
-# Update dataframe with user input
-df.at[0, 'Infrarroja'] = input_F1
-df.at[1, 'Infrarroja'] = input_E1
-df.at[0, 'Microondas'] = input_F2
-df.at[1, 'Microondas'] = input_E2
+# Scorecard: the student picks a wavelength in each region and computes its
+# frequency and energy; answers are checked against the computed values
+st.markdown("Escoja una longitud de onda de cada region y calcule su frecuencia y energia "
+            "(se aceptan errores de hasta 5 %).")
+answers = {}
+for region_name in ("Infrarroja", "Microondas"):
+    lower, upper = em_spectrum.region_bounds(region_name)
+    st.subheader(region_name)
+    c1, c2, c3 = st.columns(3)
+    answers[region_name] = (
+        c1.number_input(f"Longitud de onda (m) - {region_name}", value=0.0, format="%.3e",
+                        help=f"Entre {lower:.0e} y {upper:.0e} m"),
+        c2.number_input(f"Valor Frecuencia (Hz) - {region_name}", value=0.0, format="%.3e"),
+        c3.number_input(f"Valor Energia (J) - {region_name}", value=0.0, format="%.3e"),
+    )
 
-# Display the updated dataframe
-st.table(df.set_index('EEM'))
\ No newline at end of file
+show_solution = st.checkbox("Mostrar solucion")
+table = {"EEM": ["Longitud de onda", "Frecuencia", "Energia"]}
+for region_name, (wl, freq, energy) in answers.items():
+    expected = em_spectrum.describe(wl) if wl > 0 else {"Hz": np.nan, "J": np.nan}
+    correct = [em_spectrum.region_of(wl) == region_name,
+               *em_spectrum.grade([freq, energy], [expected["Hz"], expected["J"]])]
+    table[region_name] = [f"{v:.3e}" for v in (wl, freq, energy)]
+    table[f"{region_name} ✓"] = ["✅" if ok else "❌" for ok in correct]
+    if show_solution:
+        table[f"{region_name} (esperado)"] = [f"{wl:.3e}", f"{expected['Hz']:.3e}", f"{expected['J']:.3e}"]
+
+df = pd.DataFrame(table)
+st.table(df.set_index('EEM'))
+score = sum(v == "✅" for name, column in table.items() if name.endswith("✓") for v in column)
+st.metric("Puntaje", f"{score} / 6")
@@ -2,6 +2,8 @@ import streamlit as st
 import numpy as np
 import matplotlib.pyplot as plt
 
+import scattering
+
 # App Configuration
 st.set_page_config(page_title="Simulador de dispersión atmosférica", layout="wide")
 
@@ -12,23 +14,32 @@ Esta aplicación simula cómo los diferentes tipos de dispersión afectan la int
 
 # --- Sidebar Controls ---
 st.sidebar.header("Parámetros de simulación")
-particle_size = st.sidebar.slider("Tamaño de partícula (unidades relativas)", 0.1, 10.0, 1.0)
+particle_size = st.sidebar.slider("Radio del aerosol (µm)", 0.05, 10.0, 0.5, step=0.05)
+aerosol_type = st.sidebar.selectbox("Tipo de aerosol", list(scattering.REFRACTIVE_INDICES))
+altitude = st.sidebar.slider("Altitud del observador (km)", 0.0, 5.0, 0.0, step=0.1)
 intensity_scale = st.sidebar.slider("Intensidad de la fuente", 1, 100, 50)
 
 # --- Physics Calculations ---
 # Visible spectrum in nm
 wavelengths = np.linspace(400, 700, 100) 
+wavelengths_um = wavelengths / 1000
+reference_um = 0.55  # curves are relative to their value at 550 nm
 
-# 1. Rayleigh: I ~ 1/λ^4
-rayleigh = (1 / wavelengths**4) * 1e11 * intensity_scale
+# 1. Rayleigh: optical depth of the standard atmosphere above the observer (~ λ^-4)
+pressure = scattering.pressure_at_altitude(altitude)
+tau_rayleigh = scattering.rayleigh_optical_depth(wavelengths_um, pressure)
+rayleigh = tau_rayleigh / scattering.rayleigh_optical_depth(reference_um, pressure) * intensity_scale
 
-# 2. Mie: I ~ 1/λ^p (where p is roughly 1 to 2 depending on size)
-# We model the transition as a function of particle size
-p_factor = max(0.5, 4 - particle_size) 
-mie = (1 / wavelengths**p_factor) * (10**(p_factor+1)) * intensity_scale
+# 2. Mie: scattering cross-section of one aerosol particle (interpolated from the cached Mie table)
+m_aerosol = scattering.REFRACTIVE_INDICES[aerosol_type]
+mie_cross_section = scattering.scattering_cross_section(particle_size, wavelengths_um, m_aerosol)
+mie = mie_cross_section / scattering.scattering_cross_section(particle_size, reference_um, m_aerosol) * intensity_scale
 
-# 3. Non-Selective: I is constant across λ
-non_selective = np.full_size = np.ones_like(wavelengths) * (intensity_scale * 0.5)
+# 3. Non-Selective: cloud/fog droplets (r = 20 µm), Q_sca ~ 2 across the visible
+drop_radius = 20.0
+m_water = scattering.REFRACTIVE_INDICES["Agua (niebla, nubes)"]
+non_selective = (scattering.scattering_cross_section(drop_radius, wavelengths_um, m_water)
+                 / scattering.scattering_cross_section(drop_radius, reference_um, m_water) * intensity_scale * 0.5)
 
 # --- Visualization ---
 fig, ax = plt.subplots(figsize=(10, 6))
@@ -47,12 +58,19 @@ ax.axvspan(620, 700, color='red', alpha=0.1)
 
 ax.set_xlabel("Longitud de onda (nm)")
 ax.set_ylabel("Intensidad de dispersión relativa")
-ax.set_title(f"Comparación de dispersión (Factor de tamaño de partícula: {particle_size})")
+ax.set_title(f"Comparación de dispersión (radio del aerosol: {particle_size} µm, {aerosol_type})")
 ax.legend()
 ax.grid(True, which='both', linestyle='--', alpha=0.5)
 
 st.pyplot(fig)
 
+x_550 = scattering.size_parameter(particle_size, reference_um)
+col1, col2, col3, col4 = st.columns(4)
+col1.metric("Espesor óptico Rayleigh (550 nm)", f"{scattering.rayleigh_optical_depth(reference_um, pressure):.4f}")
+col2.metric("Parámetro de tamaño x (550 nm)", f"{x_550:.2f}")
+col3.metric("Q_sca Mie (550 nm)", f"{scattering.mie_interpolated(x_550, m_aerosol):.3f}")
+col4.metric("Exponente de Ångström", f"{scattering.angstrom_exponent(wavelengths_um, mie_cross_section):.2f}")
+
 # --- Educational Breakdown ---
 col1, col2, col3 = st.columns(3)
 
@@ -0,0 +1,18 @@
+import streamlit as st
+
+import cog_export
+import reprojection
+
+# Streamlit caches shared by several apps. Products are keyed on a content hash
+# of the array, so an export is built once per product and georeference instead of
+# on every rerun.
+
+
+@st.cache_data(show_spinner="Generando el COG...")
+def _cog_bytes(key, _array, transform, crs, nodata=None):
+    return cog_export.cog_bytes(_array, transform=transform, crs=crs, nodata=nodata)
+
+
+def cog_download(array, transform, crs, nodata=None):
+    """COG bytes of a product for st.download_button, cached on the array content and georeference."""
+    return _cog_bytes(reprojection.image_hash(array), array, transform, crs, nodata)
@@ -0,0 +1,249 @@
+import re
+import threading
+import time
+from collections import OrderedDict
+from functools import lru_cache
+
+import numpy as np
+from rasterio.windows import Window
+
+import composites
+import display_stretch
+import reprojection
+import scattering
+import sensor_catalog
+import spectral_indices
+
+# Level-1 DNs -> surface reflectance. Both methods reduce to per-band coefficients
+# applied tile by tile:
+#   rho_toa = (DN * gain + offset) / cos(theta_s)   (Landsat; Sentinel-2 L1C already
+#                                                    includes the sun angle)
+#   y       = (rho_toa - rho_path) / T
+#   rho_s   = y / (1 + S * y)
+# DOS (Chavez, 1996) takes rho_path from the darkest pixels of a streamed DN
+# histogram (T = 1, S = 0). The LUT method takes rho_path, T = T_s T_v and the
+# spherical albedo S from a single-scattering model built on scattering.py
+# (Rayleigh optical depth, Mie aerosol albedo/asymmetry), tabulated over AOD at 550 nm.
+# Coefficients are cached per scene, so re-running with the same settings only
+# re-applies them.
+
+# TOA reflectance scaling of Level-1 products: (gain, offset, divide by cos(sun zenith))
+TOA_SCALE = {
+    "Landsat 8/9": (2e-5, -0.1, True),
+    "Sentinel-2": (1e-4, -0.1, False),  # L1C processing baseline >= 04.00
+}
+
+# Band centre wavelengths (µm) by common band name, from the sensor catalogue
+BAND_CENTERS = {
+    sensor: {common: sensor_catalog.band_centers(sensor)[code][0] / 1000
+             for common, code in composites.SENSOR_BANDS[sensor].items()}
+    for sensor in TOA_SCALE
+}
+
+METHODS = ("DOS", "LUT")
+DARK_FRACTION = 1e-4      # fraction of valid pixels that defines the dark object
+DARK_REFLECTANCE = 0.01   # reflectance assumed for the dark object
+AEROSOL_RADIUS = 0.3      # µm, effective radius of the aerosol model
+AOD_GRID = np.round(np.arange(0.0, 1.51, 0.02), 2)
+TILE_ROWS = 512
+CACHE_SIZE = 32
+
+_coefficients = OrderedDict()
+_lock = threading.Lock()  # Streamlit sessions run in threads
+
+
+# --- DOS ---
+
+def dark_object_dn(hist, fraction=DARK_FRACTION):
+    """Lowest non-zero DN reached by `fraction` of the valid pixels of a DN histogram."""
+    return display_stretch.percentile_cutoffs(hist, low=100.0 * fraction)[0]
+
+
+def band_histograms(source, indexes, tile_rows=TILE_ROWS):
+    """Streams a raster by row windows and returns the full DN histogram of each band."""
+    hists = None
+    with composites.open_raster(source) as src:
+        for row in range(0, src.height, tile_rows):
+            window = Window(0, row, src.width, min(tile_rows, src.height - row))
+            tiles = src.read(list(indexes), window=window)
+            if tiles.dtype not in (np.uint8, np.uint16):
+                raise ValueError(f"Se requieren DN enteros sin signo (8/16 bits), no {tiles.dtype}")
+            block = np.stack([display_stretch.band_histogram(tile) for tile in tiles])
+            hists = block if hists is None else hists + block
+    return hists
+
+
+# --- Scattering model LUT ---
+
+def _geometry(sun_zenith, view_zenith, relative_azimuth):
+    mu_s, mu_v = np.cos(np.radians(sun_zenith)), np.cos(np.radians(view_zenith))
+    cos_scatter = -mu_s * mu_v + np.sin(np.radians(sun_zenith)) * np.sin(np.radians(view_zenith)) \
+        * np.cos(np.radians(relative_azimuth))
+    return mu_s, mu_v, cos_scatter
+
+
+@lru_cache(maxsize=64)
+def lut(wavelength_um, sun_zenith=30.0, view_zenith=0.0, relative_azimuth=0.0,
+        altitude_km=0.0, aerosol="Sulfato (aerosol urbano)", angstrom=1.3):
+    """
+    Returns (AOD550 grid, path reflectance, total transmittance T_s T_v, spherical albedo)
+    for one band, from single scattering by molecules (Rayleigh) and aerosols (Mie).
+    Cached per band and geometry; arrays are read-only.
+    """
+    mu_s, mu_v, cos_scatter = _geometry(sun_zenith, view_zenith, relative_azimuth)
+    m = scattering.REFRACTIVE_INDICES[aerosol]
+    x = scattering.size_parameter(AEROSOL_RADIUS, wavelength_um)
+    albedo = float(scattering.mie_interpolated(x, m, "qsca") / scattering.mie_interpolated(x, m, "qext"))
+    g = float(scattering.mie_interpolated(x, m, "g"))
+
+    tau_r = float(scattering.rayleigh_optical_depth(wavelength_um, scattering.pressure_at_altitude(altitude_km)))
+    tau_a = scattering.aerosol_optical_depth(wavelength_um, AOD_GRID, angstrom)
+
+    path = (tau_r * scattering.rayleigh_phase(cos_scatter)
+            + albedo * tau_a * scattering.henyey_greenstein(cos_scatter, g)) / (4 * mu_s * mu_v)
+    # Direct plus forward-scattered diffuse light reaches the surface / sensor
+    tau_eff = 0.5 * tau_r + tau_a * (1 - albedo * (1 + g) / 2)
+    transmittance = np.exp(-tau_eff / mu_s) * np.exp(-tau_eff / mu_v)
+    back = 0.5 * tau_r + 0.5 * (1 - g) * albedo * tau_a
+    spherical_albedo = back / (1 + back)
+
+    out = (AOD_GRID.copy(), path, transmittance, spherical_albedo)
+    for array in out:
+        array.flags.writeable = False
+    return out
+
+
+def lut_coefficients(wavelength_um, aod550, **geometry):
+    """Interpolates (path reflectance, transmittance, spherical albedo) at one AOD550."""
+    grid, *tables = lut(wavelength_um, **geometry)
+    return tuple(float(np.interp(aod550, grid, table)) for table in tables)
+
+
+def estimate_aod(dark_toa, wavelength_um, dark_reflectance=DARK_REFLECTANCE, **geometry):
+    """
+    AOD550 for which the dark object in a (blue) band corrects to `dark_reflectance`:
+    the LUT is evaluated over the whole AOD grid and inverted by interpolation.
+    """
+    grid, path, transmittance, spherical = lut(wavelength_um, **geometry)
+    y = (dark_toa - path) / transmittance
+    corrected = y / (1 + spherical * y)
+    order = np.argsort(corrected)  # corrected dark reflectance decreases with AOD
+    return float(np.clip(np.interp(dark_reflectance, corrected[order], grid[order]), grid[0], grid[-1]))
+
+
+# --- Scene coefficients ---
+
+def _scene_key(source):
+    if hasattr(source, "getvalue"):
+        return reprojection.image_hash(source.getvalue())
+    return str(source)
+
+
+def sun_zenith_from_mtl(text):
+    """Sun zenith angle (degrees) from the SUN_ELEVATION of a Landsat MTL file; None if absent."""
+    match = re.search(r"SUN_ELEVATION\s*=\s*([-+0-9.Ee]+)", text)
+    return 90.0 - float(match.group(1)) if match else None
+
+
+def scene_coefficients(source, sensor, band_names, method="DOS", indexes=None, sun_zenith=30.0,
+                       aod550=None, altitude_km=0.0, aerosol="Sulfato (aerosol urbano)"):
+    """
+    Returns ({band: (gain, offset, path, transmittance, spherical albedo)}, band indexes,
+    AOD used or None for DOS) for a scene. `indexes` are the 1-based bands holding
+    `band_names` (resolved from the band descriptions by default). With the LUT and
+    no `aod550`, the AOD is estimated from the dark object of the blue band.
+    Histograms and LUT inversions run once per (scene, settings); later calls are
+    dictionary lookups.
+    """
+    if method not in METHODS:
+        raise ValueError(f"Metodo desconocido: {method} (use {', '.join(METHODS)})")
+    key = (_scene_key(source), sensor, tuple(band_names), method, None if indexes is None else tuple(indexes),
+           sun_zenith, aod550, altitude_km, aerosol)
+    with _lock:
+        if key in _coefficients:
+            _coefficients.move_to_end(key)
+            return _coefficients[key]
+
+    if indexes is None:
+        info = composites.band_info(source)
+        indexes = [composites.band_index(info, sensor, name) for name in band_names]
+    indexes = list(indexes)
+    gain, offset, sun_corrected = TOA_SCALE[sensor]
+    mu_s = np.cos(np.radians(sun_zenith)) if sun_corrected else 1.0
+    gain, offset = gain / mu_s, offset / mu_s
+
+    need_histograms = method == "DOS" or aod550 is None
+    dark = {}
+    if need_histograms:
+        if method == "DOS":
+            hist_bands, hist_indexes = list(band_names), indexes
+        elif "blue" in band_names:
+            hist_bands, hist_indexes = ["blue"], [indexes[list(band_names).index("blue")]]
+        else:
+            try:
+                hist_bands, hist_indexes = ["blue"], [composites.band_index(composites.band_info(source), sensor, "blue")]
+            except (ValueError, KeyError):
+                raise ValueError("Sin banda azul no se puede estimar el AOD: indique el AOD a 550 nm")
+        for name, hist in zip(hist_bands, band_histograms(source, hist_indexes)):
+            dark[name] = dark_object_dn(hist) * gain + offset
+
+    coefficients = {}
+    geometry = {"sun_zenith": float(sun_zenith), "altitude_km": float(altitude_km), "aerosol": aerosol}
+    if method == "DOS":
+        for name in band_names:
+            coefficients[name] = (gain, offset, dark[name] - DARK_REFLECTANCE, 1.0, 0.0)
+    else:
+        if aod550 is None:
+            aod550 = estimate_aod(dark["blue"], BAND_CENTERS[sensor]["blue"], **geometry)
+        for name in band_names:
+            coefficients[name] = (gain, offset, *lut_coefficients(BAND_CENTERS[sensor][name], aod550, **geometry))
+
+    result = (coefficients, indexes, aod550 if method == "LUT" else None)
+    with _lock:
+        _coefficients[key] = result
+        while len(_coefficients) > CACHE_SIZE:
+            _coefficients.popitem(last=False)
+    return result
+
+
+def apply_coefficients(dn, coefficients, out=None):
+    """Converts a DN tile to surface reflectance in place-friendly float32 steps (DN 0 -> NaN)."""
+    gain, offset, path, transmittance, spherical = coefficients
+    dn = np.asarray(dn)
+    y = np.multiply(dn, np.float32(gain), out=out, dtype=np.float32, casting="unsafe")
+    y += np.float32(offset - path)
+    y /= np.float32(transmittance)
+    if spherical:
+        y /= 1 + np.float32(spherical) * y
+    y[dn == 0] = np.nan
+    return y
+
+
+def correct_raster(source, sensor, band_names, method="DOS", indexes=None, tile_rows=TILE_ROWS, **settings):
+    """
+    Atmospherically corrects the named bands of a Level-1 stack, one row window at a time.
+
+    Returns ({band: float32 surface reflectance}, info) where info holds the
+    coefficients, the AOD (LUT) and the seconds spent applying them.
+    """
+    coefficients, indexes, aod = scene_coefficients(source, sensor, band_names, method, indexes, **settings)
+    start = time.perf_counter()
+    with composites.open_raster(source) as src:
+        out = {name: np.empty((src.height, src.width), dtype=np.float32) for name in band_names}
+        for row in range(0, src.height, tile_rows):
+            rows = min(tile_rows, src.height - row)
+            tiles = src.read(indexes, window=Window(0, row, src.width, rows))
+            for name, tile in zip(band_names, tiles):
+                apply_coefficients(tile, coefficients[name], out=out[name][row:row + rows])
+    return out, {"coefficients": coefficients, "aod550": aod, "seconds": time.perf_counter() - start}
+
+
+def evaluate_corrected(source, sensor, expressions, method="DOS", tile_rows=TILE_ROWS, **settings):
+    """
+    Spectral indices of a Level-1 stack computed on atmospherically corrected
+    reflectance: only the bands the expressions need are corrected.
+    Returns ({name: float32 array}, info) as `correct_raster`.
+    """
+    program = spectral_indices.compile_indices(expressions)
+    reflectance, info = correct_raster(source, sensor, list(program.bands), method, tile_rows=tile_rows, **settings)
+    return spectral_indices.evaluate(reflectance, expressions, tile_rows=tile_rows), info
@@ -0,0 +1,213 @@
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+# Bi-temporal change detection over co-registered pairs. The change magnitude is
+# computed per row tile, in this process by default: it is element-wise and memory
+# bound, so pickling tiles to worker processes costs more than computing them. A
+# process pool (each worker only receives its own rows of both dates) is opt-in for
+# expensive methods on very large scenes. The threshold is chosen automatically
+# on the histogram of the magnitude (Otsu or Kittler-Illingworth minimum error),
+# and the change mask is summarized as areas from the pixel size of the transform.
+
+METHODS = ("diferencia", "log-ratio", "dNBR", "CVA")
+THRESHOLDS = ("Otsu", "Kittler-Illingworth")
+TILE_ROWS = 256
+BINS = 512
+EPS = 1e-6
+
+# USGS burn severity classes on dNBR (lower bounds)
+DNBR_SEVERITY = (
+    ("Sin quemar", -np.inf),
+    ("Severidad baja", 0.1),
+    ("Severidad moderada-baja", 0.27),
+    ("Severidad moderada-alta", 0.44),
+    ("Severidad alta", 0.66),
+)
+
+
+# --- Change magnitude ---
+
+def change_magnitude(before, after, method="log-ratio"):
+    """
+    Returns the float32 change magnitude of one tile.
+
+    diferencia: |after - before|            (single band)
+    log-ratio:  |ln((after + eps) / (before + eps))|   (SAR intensities)
+    dNBR:       before - after              (NBR of each date; positive = burned)
+    CVA:        ||after - before||          (bands first, (bands, h, w))
+    """
+    before = np.asarray(before, dtype=np.float32)
+    after = np.asarray(after, dtype=np.float32)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        if method == "diferencia":
+            out = np.subtract(after, before)
+            np.abs(out, out=out)
+        elif method == "log-ratio":
+            out = np.divide(np.maximum(after, 0) + EPS, np.maximum(before, 0) + EPS)
+            np.log(out, out=out)
+            np.abs(out, out=out)
+        elif method == "dNBR":
+            out = np.subtract(before, after)
+        elif method == "CVA":
+            delta = np.subtract(after, before)
+            delta = delta[np.newaxis] if delta.ndim == 2 else delta
+            out = np.sqrt(np.einsum("bij,bij->ij", delta, delta))
+        else:
+            raise ValueError(f"Metodo desconocido: {method} (use {', '.join(METHODS)})")
+    return out
+
+
+def _magnitude_rows(args):
+    before, after, method = args
+    return change_magnitude(before, after, method)
+
+
+def _row_tiles(array, tile_rows, bands_first):
+    """Yields row slices of an (h, w) or (bands, h, w) array."""
+    height = array.shape[-2]
+    for row in range(0, height, tile_rows):
+        yield array[..., row:row + tile_rows, :] if bands_first else array[row:row + tile_rows]
+
+
+# --- Automatic thresholds ---
+
+def otsu_threshold(hist, edges):
+    """Returns the threshold that maximizes the between-class variance of a histogram."""
+    centres = (edges[:-1] + edges[1:]) / 2
+    p = hist / max(hist.sum(), 1)
+    w0 = np.cumsum(p)
+    m0 = np.cumsum(p * centres)
+    w1 = 1 - w0
+    with np.errstate(divide="ignore", invalid="ignore"):
+        between = (m0[-1] * w0 - m0) ** 2 / (w0 * w1)
+    between[~np.isfinite(between)] = -1
+    return float(edges[np.argmax(between) + 1])
+
+
+def kittler_illingworth_threshold(hist, edges):
+    """
+    Returns the minimum-error threshold of Kittler & Illingworth (1986), which models
+    both classes as Gaussians with their own variance:
+    J(t) = 1 + 2 (P1 ln s1 + P2 ln s2) - 2 (P1 ln P1 + P2 ln P2).
+    """
+    centres = (edges[:-1] + edges[1:]) / 2
+    p = hist / max(hist.sum(), 1)
+    p1 = np.cumsum(p)
+    s_1 = np.cumsum(p * centres)
+    s_2 = np.cumsum(p * centres ** 2)
+    p2 = 1 - p1
+    with np.errstate(divide="ignore", invalid="ignore"):
+        mu1 = s_1 / p1
+        mu2 = (s_1[-1] - s_1) / p2
+        var1 = s_2 / p1 - mu1 ** 2
+        var2 = (s_2[-1] - s_2) / p2 - mu2 ** 2
+        cost = 1 + 2 * (p1 * np.log(np.sqrt(var1)) + p2 * np.log(np.sqrt(var2))) \
+            - 2 * (p1 * np.log(p1) + p2 * np.log(p2))
+    valid = np.isfinite(cost) & (var1 > 0) & (var2 > 0)
+    if not valid.any():
+        return otsu_threshold(hist, edges)
+    cost[~valid] = np.inf
+    return float(edges[np.argmin(cost) + 1])
+
+
+def magnitude_histogram(magnitude, bins=BINS, tile_rows=TILE_ROWS * 4):
+    """Histogram of the finite magnitudes over their [min, max] range, accumulated by row blocks."""
+    lo, hi = np.inf, -np.inf
+    for tile in _row_tiles(magnitude, tile_rows, False):
+        finite = tile[np.isfinite(tile)]
+        if finite.size:
+            lo, hi = min(lo, finite.min()), max(hi, finite.max())
+    if not np.isfinite(lo):
+        raise ValueError("La magnitud de cambio no tiene valores validos")
+    if hi <= lo:
+        hi = lo + EPS
+    edges = np.linspace(lo, hi, bins + 1)
+    hist = np.zeros(bins, dtype=np.int64)
+    for tile in _row_tiles(magnitude, tile_rows, False):
+        hist += np.histogram(tile[np.isfinite(tile)], bins=edges)[0]
+    return hist, edges
+
+
+def pixel_area(transform):
+    """Returns the area of one pixel in m² (1 when there is no transform)."""
+    if transform is None:
+        return 1.0
+    return abs(transform.a * transform.e - transform.b * transform.d)
+
+
+def area_stats(mask, transform=None, valid=None):
+    """Returns changed pixels, hectares, km² and the percentage of the valid area."""
+    changed = int(np.count_nonzero(mask))
+    total = int(np.count_nonzero(valid)) if valid is not None else mask.size
+    area = changed * pixel_area(transform)
+    return {
+        "pixels": changed,
+        "hectares": area / 1e4,
+        "km2": area / 1e6,
+        "percent": 100.0 * changed / max(total, 1),
+    }
+
+
+def severity_stats(dnbr, transform=None):
+    """Returns a list of (class, hectares, %) for the USGS dNBR severity classes."""
+    valid = np.isfinite(dnbr)
+    total = max(int(valid.sum()), 1)
+    bounds = [lower for _, lower in DNBR_SEVERITY] + [np.inf]
+    rows = []
+    for (name, lower), upper in zip(DNBR_SEVERITY, bounds[1:]):
+        count = int(np.count_nonzero(valid & (dnbr >= lower) & (dnbr < upper)))
+        rows.append((name, count * pixel_area(transform) / 1e4, 100.0 * count / total))
+    return rows
+
+
+# --- Pipeline ---
+
+def detect_changes(before, after, method="log-ratio", threshold="Otsu", transform=None,
+                   workers=1, tile_rows=TILE_ROWS, bins=BINS):
+    """
+    Runs the change detection on a co-registered pair.
+
+    `before` and `after` are (h, w) arrays, or (bands, h, w) for CVA. Row tiles are
+    processed in-process by default; `workers` > 1 (None: all CPUs) uses a process pool.
+    Returns a dict with the magnitude, the boolean change mask, the threshold, the
+    magnitude histogram, the area statistics and the elapsed seconds.
+    """
+    before, after = np.asarray(before), np.asarray(after)
+    if before.shape != after.shape:
+        raise ValueError(f"Las imagenes no estan corregistradas: {before.shape} vs {after.shape}")
+    if threshold not in THRESHOLDS:
+        raise ValueError(f"Umbral desconocido: {threshold} (use {', '.join(THRESHOLDS)})")
+    bands_first = before.ndim == 3
+    height, width = before.shape[-2:]
+    workers = workers or os.cpu_count() or 1
+
+    start = time.perf_counter()
+    tasks = zip(_row_tiles(before, tile_rows, bands_first), _row_tiles(after, tile_rows, bands_first),
+                [method] * -(-height // tile_rows))
+    magnitude = np.empty((height, width), dtype=np.float32)
+    if workers > 1:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            tiles = pool.map(_magnitude_rows, tasks)
+            for row, tile in zip(range(0, height, tile_rows), tiles):
+                magnitude[row:row + tile_rows] = tile
+    else:
+        for row, task in zip(range(0, height, tile_rows), tasks):
+            magnitude[row:row + tile_rows] = _magnitude_rows(task)
+
+    hist, edges = magnitude_histogram(magnitude, bins)
+    finder = otsu_threshold if threshold == "Otsu" else kittler_illingworth_threshold
+    value = finder(hist, edges)
+    valid = np.isfinite(magnitude)
+    mask = valid & (magnitude > value)
+
+    return {
+        "magnitude": magnitude,
+        "mask": mask,
+        "threshold": value,
+        "histogram": (hist, edges),
+        "stats": area_stats(mask, transform, valid),
+        "seconds": time.perf_counter() - start,
+    }
@@ -0,0 +1,117 @@
+import os
+import tempfile
+
+import numpy as np
+import rasterio
+from rasterio.shutil import copy as rio_copy
+from rasterio.transform import Affine
+from rasterio.windows import Window
+
+# Products are first streamed block by block into a tiled scratch GeoTIFF and then
+# laid out as a Cloud-Optimized GeoTIFF by GDAL's COG driver, which builds the
+# internal overviews from the scratch file. Neither step holds the whole scene in
+# memory, so a computed product can be exported by passing a function that returns
+# one window at a time.
+
+BLOCK_SIZE = 512
+COMPRESSION = "DEFLATE"  # or "ZSTD" / "LZW"
+
+
+def predictor_for(dtype):
+    """Returns the TIFF predictor for a dtype: 3 (floating point) or 2 (horizontal differencing)."""
+    return 3 if np.dtype(dtype).kind == "f" else 2
+
+
+def iter_blocks(width, height, size=BLOCK_SIZE):
+    """Yields the Windows of a width x height raster in row-major order."""
+    for row in range(0, height, size):
+        for col in range(0, width, size):
+            yield Window(col, row, min(size, width - col), min(size, height - row))
+
+
+def _array_reader(array):
+    array = array[np.newaxis] if array.ndim == 2 else array
+
+    def read_block(window):
+        rows, cols = window.toslices()
+        return array[:, rows, cols]
+
+    return array.shape[0], array.shape[1], array.shape[2], read_block
+
+
+def write_cog(path, source, transform=None, crs=None, nodata=None, dtype=None,
+              width=None, height=None, count=1, compress=COMPRESSION,
+              block_size=BLOCK_SIZE, resampling="AVERAGE"):
+    """
+    Writes a tiled, compressed Cloud-Optimized GeoTIFF with internal overviews.
+
+    `source` is a (h, w) or (bands, h, w) array, or a function `read_block(window)`
+    returning a (bands, rows, cols) block; in that case `width`, `height`, `count`
+    and `dtype` must be given. The affine `transform` and `crs` of the source are
+    written unchanged.
+    """
+    if callable(source):
+        read_block = source
+        if width is None or height is None or dtype is None:
+            raise ValueError("width, height y dtype son obligatorios con una funcion de lectura")
+    else:
+        source = np.asarray(source)
+        count, height, width, read_block = _array_reader(source)
+        dtype = dtype or source.dtype
+
+    dtype = np.dtype(dtype)
+    profile = {
+        "driver": "GTiff",
+        "width": width,
+        "height": height,
+        "count": count,
+        "dtype": dtype.name,
+        "crs": crs,
+        "transform": transform if transform is not None else Affine.identity(),
+        "nodata": nodata,
+        "tiled": True,
+        "blockxsize": block_size,
+        "blockysize": block_size,
+        "compress": compress,
+        "predictor": predictor_for(dtype),
+        "BIGTIFF": "IF_SAFER",
+    }
+
+    scratch_dir = tempfile.mkdtemp(prefix="cog_")
+    scratch = os.path.join(scratch_dir, "scratch.tif")
+    try:
+        with rasterio.open(scratch, "w", **profile) as dst:
+            for window in iter_blocks(width, height, block_size):
+                dst.write(np.asarray(read_block(window), dtype=dtype).reshape(
+                    count, window.height, window.width), window=window)
+
+        rio_copy(
+            scratch, path, driver="COG",
+            compress=compress, predictor=str(predictor_for(dtype)),
+            blocksize=block_size, overviews="AUTO", overview_resampling=resampling,
+            BIGTIFF="IF_SAFER"
+        )
+    finally:
+        if os.path.exists(scratch):
+            os.remove(scratch)
+        os.rmdir(scratch_dir)
+    return path
+
+
+def cog_bytes(source, **kwargs):
+    """Writes a COG to a temporary file and returns its bytes (for st.download_button)."""
+    fd, path = tempfile.mkstemp(suffix=".tif")
+    os.close(fd)
+    try:
+        write_cog(path, source, **kwargs)
+        with open(path, "rb") as f:
+            return f.read()
+    finally:
+        os.remove(path)
+
+
+def is_cog(path):
+    """Checks that a file is tiled and has internal overviews (the COG essentials)."""
+    with rasterio.open(path) as src:
+        tiled = src.profile.get("tiled", False)
+        return bool(tiled) and len(src.overviews(1)) > 0
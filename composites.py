@@ -0,0 +1,119 @@
+import re
+from contextlib import contextmanager
+
+import numpy as np
+import rasterio
+from rasterio.io import MemoryFile
+
+# Band-aware RGB composites for Landsat 8/9 and Sentinel-2 stacks. Bands are
+# located through the TIFF band descriptions (e.g. "SR_B4", "B04", "red") when the
+# file has them, or through the standard stack order otherwise, and only the
+# three selected bands are decoded.
+
+SENSOR_BANDS = {
+    "Landsat 8/9": {
+        "coastal": "B1", "blue": "B2", "green": "B3", "red": "B4",
+        "nir": "B5", "swir1": "B6", "swir2": "B7", "pan": "B8",
+    },
+    "Sentinel-2": {
+        "coastal": "B1", "blue": "B2", "green": "B3", "red": "B4",
+        "nir": "B8", "swir1": "B11", "swir2": "B12",
+    },
+}
+
+# Band order of full stacks without descriptions
+STACK_ORDER = {
+    "Landsat 8/9": ["B1", "B2", "B3", "B4", "B5", "B6", "B7", "B8", "B9", "B10", "B11"],
+    "Sentinel-2": ["B1", "B2", "B3", "B4", "B5", "B6", "B7", "B8", "B8A", "B9", "B10", "B11", "B12"],
+}
+
+COMPOSITES = {
+    "Color natural": ("red", "green", "blue"),
+    "Falso color (NIR)": ("nir", "red", "green"),
+    "SWIR (geologia / incendios)": ("swir2", "nir", "red"),
+    "Agricultura": ("swir1", "nir", "blue"),
+}
+
+
+def normalize_band_name(name):
+    """'SR_B04', 'b4', 'Band 4' -> 'B4'; common names ('Red', 'NIR') are upper-cased."""
+    if not name:
+        return ""
+    name = re.sub(r"[^A-Za-z0-9]", "", str(name)).upper()
+    name = re.sub(r"^(SR|TOA|ST)(?=B)", "", name)
+    name = re.sub(r"^BAND", "B", name)
+    match = re.fullmatch(r"B0*(\d+)(A?)", name)
+    if match:
+        return f"B{match.group(1)}{match.group(2)}"
+    return name
+
+
+@contextmanager
+def open_raster(source):
+    """Opens a path or an uploaded file object with rasterio (uploads go through a MemoryFile)."""
+    if hasattr(source, "getvalue"):
+        with MemoryFile(source.getvalue()) as memfile, memfile.open() as src:
+            yield src
+    else:
+        with rasterio.open(source) as src:
+            yield src
+
+
+def band_info(source):
+    """Returns the band count, normalized descriptions, dtype, size and georeferencing of a raster."""
+    with open_raster(source) as src:
+        return {
+            "count": src.count,
+            "descriptions": [normalize_band_name(d) for d in src.descriptions],
+            "raw_descriptions": list(src.descriptions),
+            "dtype": src.dtypes[0],
+            "width": src.width,
+            "height": src.height,
+            "crs": src.crs,
+            "transform": src.transform,
+        }
+
+
+def band_index(info, sensor, common_name):
+    """Returns the 1-based index of a band given its common name ('red', 'nir', ...)."""
+    code = SENSOR_BANDS[sensor][common_name]
+    descriptions = info["descriptions"]
+
+    # 1. Band descriptions written by the data provider
+    for i, description in enumerate(descriptions):
+        if description in (code, common_name.upper()):
+            return i + 1
+
+    # 2. Plain 3-band RGB files
+    if info["count"] == 3 and common_name in ("red", "green", "blue"):
+        return {"red": 1, "green": 2, "blue": 3}[common_name]
+
+    # 3. Standard stack order (Sentinel-2 L2A stacks drop the cirrus band B10)
+    order = STACK_ORDER[sensor]
+    if sensor == "Sentinel-2" and info["count"] == len(order) - 1:
+        order = [b for b in order if b != "B10"]
+    if not any(descriptions) and order.index(code) < info["count"]:
+        return order.index(code) + 1
+
+    raise ValueError(f"La banda {common_name} ({code}) no esta en el archivo")
+
+
+def composite_indexes(info, sensor, composite):
+    """Returns the (r, g, b) 1-based band indexes of a named composite."""
+    return tuple(band_index(info, sensor, name) for name in COMPOSITES[composite])
+
+
+def read_bands(source, indexes, max_size=None):
+    """
+    Reads only the requested bands as an (h, w, len(indexes)) array.
+
+    With `max_size`, the read is decimated so that the longer side is at most
+    `max_size` pixels (GDAL then uses internal overviews when present).
+    """
+    with open_raster(source) as src:
+        out_shape = None
+        if max_size and max(src.width, src.height) > max_size:
+            scale = max_size / max(src.width, src.height)
+            out_shape = (len(indexes), max(1, round(src.height * scale)), max(1, round(src.width * scale)))
+        data = src.read(indexes=list(indexes), out_shape=out_shape)
+    return np.moveaxis(data, 0, -1)
@@ -0,0 +1,137 @@
+import time
+from functools import lru_cache
+
+import cv2
+import numpy as np
+
+import crs_service
+
+# Graticules are rendered once per (size, extent, CRS, spacing) into an RGBA
+# overlay and kept together with the indices of its non-transparent pixels, so
+# compositing on every slider move only touches the line pixels, in uint8
+# fixed-point arithmetic. Lines are antialiased in the alpha channel only (the RGB
+# channels hold the full line colour), so the straight-alpha blend does not darken
+# their edges. Full-image blends use cv2.addWeighted.
+
+LINE_SAMPLES = 128  # vertices per meridian/parallel before projection
+SUBPIXEL_BITS = 4   # fractional bits passed to cv2.polylines
+
+
+def _graticule_lines(geo_bounds, spacing):
+    lon_min, lat_min, lon_max, lat_max = geo_bounds
+    meridians = np.arange(np.ceil(lon_min / spacing) * spacing, lon_max + 1e-9, spacing)
+    parallels = np.arange(np.ceil(lat_min / spacing) * spacing, lat_max + 1e-9, spacing)
+    lats = np.linspace(lat_min, lat_max, LINE_SAMPLES)
+    lons = np.linspace(lon_min, lon_max, LINE_SAMPLES)
+
+    lines = [(np.full(LINE_SAMPLES, lon), lats) for lon in meridians]
+    lines += [(lons, np.full(LINE_SAMPLES, lat)) for lat in parallels]
+    return lines
+
+
+@lru_cache(maxsize=16)
+def graticule_layer(width, height, bounds, crs, geo_bounds, spacing=2.0,
+                    color=(255, 255, 255), opacity=255, thickness=1):
+    """
+    Renders a lon/lat graticule projected into `crs` as an RGBA overlay.
+
+    `bounds` is the (xmin, ymin, xmax, ymax) extent of the target image in `crs` and
+    `geo_bounds` the lon/lat extent the lines should cover. Returns (overlay, (rows, cols))
+    with the overlay read-only and rows/cols indexing its visible pixels.
+    """
+    x_min, y_min, x_max, y_max = bounds
+    lines = _graticule_lines(geo_bounds, spacing)
+    overlay = np.zeros((height, width, 4), dtype=np.uint8)
+    overlay[:, :, :3] = color  # straight alpha: only the coverage is antialiased
+    if not lines:
+        return overlay, (np.empty(0, np.intp), np.empty(0, np.intp))
+
+    # Project every vertex of every line in one call
+    lon = np.concatenate([line[0] for line in lines])
+    lat = np.concatenate([line[1] for line in lines])
+    x, y, _ = crs_service.transform_points(lon, lat, "EPSG:4326", crs)
+
+    scale = 1 << SUBPIXEL_BITS
+    col = ((x - x_min) / (x_max - x_min) * width - 0.5) * scale
+    row = ((y_max - y) / (y_max - y_min) * height - 0.5) * scale
+    vertices = np.stack([col, row], axis=-1).round().astype(np.int32)
+    polylines = np.split(vertices, len(lines))
+
+    alpha = np.zeros((height, width), dtype=np.uint8)
+    cv2.polylines(alpha, polylines, False, opacity, thickness, cv2.LINE_AA, SUBPIXEL_BITS)
+    overlay[:, :, 3] = alpha
+
+    rows, cols = np.nonzero(alpha)
+    overlay.flags.writeable = False
+    return overlay, (rows, cols)
+
+
+def apply_layer(img, layer, out=None):
+    """
+    Alpha-composites an overlay from `graticule_layer` over an RGB uint8 image.
+
+    Only the overlay's visible pixels are blended, with integer arithmetic. Pass
+    `out=img` to composite in place.
+    """
+    overlay, (rows, cols) = layer
+    if out is None:
+        out = img.copy()
+    elif out is not img:
+        np.copyto(out, img)
+
+    top = overlay[rows, cols]
+    alpha = top[:, 3:4].astype(np.uint16)
+    base = out[rows, cols].astype(np.uint16)
+    out[rows, cols] = ((top[:, :3] * alpha + base * (255 - alpha) + 127) // 255).astype(np.uint8)
+    return out
+
+
+def blend(img_a, img_b, alpha, out=None):
+    """Returns (1 - alpha) * img_a + alpha * img_b as uint8 without float64 temporaries."""
+    return cv2.addWeighted(img_a, 1.0 - alpha, img_b, alpha, 0.0, dst=out)
+
+
+def benchmark(width=3840, height=2160, repeats=10):
+    """
+    Times one compositing frame (graticule + blend) on a random 4K RGB image.
+
+    Returns the mean milliseconds per frame for the previous float64 path and for
+    this module, plus the one-off cost of rendering the graticule.
+    """
+    rng = np.random.default_rng(0)
+    img = rng.integers(0, 256, (height, width, 3), dtype=np.uint8)
+    warped = rng.integers(0, 256, (height, width, 3), dtype=np.uint8)
+    geo_bounds = (-80.0, -4.0, -66.0, 13.0)
+    out = np.empty_like(img)
+
+    def legacy_frame():
+        gridded = img.copy()
+        for i in range(0, height, 50):
+            cv2.line(gridded, (0, i), (width, i), (255, 255, 255), 1)
+        for j in range(0, width, 50):
+            cv2.line(gridded, (j, 0), (j, height), (255, 255, 255), 1)
+        return (gridded * 0.5 + warped * 0.5).astype(np.uint8)
+
+    start = time.perf_counter()
+    graticule_layer.cache_clear()
+    layer = graticule_layer(width, height, geo_bounds, "EPSG:4326", geo_bounds)
+    render_ms = (time.perf_counter() - start) * 1000
+
+    def frame():
+        blend(img, warped, 0.5, out=out)
+        apply_layer(out, layer, out=out)
+
+    timings = {}
+    for name, fn in (("legacy_ms", legacy_frame), ("composite_ms", frame)):
+        fn()  # warm-up
+        start = time.perf_counter()
+        for _ in range(repeats):
+            fn()
+        timings[name] = (time.perf_counter() - start) * 1000 / repeats
+    timings["graticule_render_ms"] = render_ms
+    return timings
+
+
+if __name__ == "__main__":
+    for name, value in benchmark().items():
+        print(f"{name}: {value:.2f}")
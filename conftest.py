@@ -0,0 +1 @@
+# Makes the top-level modules importable from tests/ when pytest is run from any directory.
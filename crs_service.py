@@ -0,0 +1,99 @@
+import time
+from functools import lru_cache
+
+import numpy as np
+import pandas as pd
+from pyproj import CRS, Transformer
+
+# pyproj Transformers are expensive to build (PROJ database lookups and pipeline
+# selection) but cheap to reuse and thread-safe, so every app shares this pool
+# instead of rebuilding them on each Streamlit rerun.
+POOL_SIZE = 64
+
+
+def _normalize(crs):
+    """Returns a canonical string for a CRS given as 'epsg:xxxx', 'EPSG:xxxx', an int or a CRS."""
+    if isinstance(crs, int):
+        return f"EPSG:{crs}"
+    if isinstance(crs, CRS):
+        return crs.to_string()
+    crs = str(crs).strip()
+    return crs.upper() if crs.lower().startswith("epsg:") else crs
+
+
+@lru_cache(maxsize=POOL_SIZE)
+def _cached_transformer(src, dst):
+    return Transformer.from_crs(src, dst, always_xy=True)
+
+
+def get_transformer(src, dst):
+    """Returns a pooled (src -> dst) Transformer with lon/lat (x/y) axis order."""
+    return _cached_transformer(_normalize(src), _normalize(dst))
+
+
+def pool_info():
+    """Returns the LRU statistics of the Transformer pool."""
+    return _cached_transformer.cache_info()
+
+
+def transform_points(x, y, src, dst):
+    """
+    Transforms coordinate arrays from `src` to `dst` in one vectorized PROJ call.
+
+    Returns (x_out, y_out, stats) where stats holds the number of points, the elapsed
+    seconds and the throughput in points per second.
+    """
+    shape = np.shape(x)
+    # In-place transforms need writable 1-D float64 buffers (scalars included)
+    x_out = np.array(x, dtype=np.float64, ndmin=1).ravel()
+    y_out = np.array(y, dtype=np.float64, ndmin=1).ravel()
+
+    start = time.perf_counter()
+    get_transformer(src, dst).transform(x_out, y_out, inplace=True)
+    elapsed = time.perf_counter() - start
+
+    x_out = x_out.reshape(shape)[()]
+    y_out = y_out.reshape(shape)[()]
+
+    n = x_out.size
+    stats = {
+        "points": n,
+        "seconds": elapsed,
+        "points_per_second": n / elapsed if elapsed > 0 else float("inf"),
+    }
+    return x_out, y_out, stats
+
+
+def transform_dataframe(df, x_col, y_col, src, dst, suffix="_out"):
+    """Adds transformed columns `<x_col><suffix>`/`<y_col><suffix>` to a copy of `df`."""
+    x_out, y_out, stats = transform_points(
+        df[x_col].to_numpy(dtype=np.float64), df[y_col].to_numpy(dtype=np.float64), src, dst
+    )
+    out = df.copy()
+    out[f"{x_col}{suffix}"] = x_out
+    out[f"{y_col}{suffix}"] = y_out
+    return out, stats
+
+
+def transform_csv(file, x_col, y_col, src, dst, chunksize=1_000_000):
+    """
+    Transforms the coordinate columns of a CSV file in chunks of `chunksize` rows.
+
+    Returns (DataFrame, stats) with stats aggregated over every chunk.
+    """
+    parts = []
+    total_points = 0
+    total_seconds = 0.0
+    for chunk in pd.read_csv(file, chunksize=chunksize):
+        out, stats = transform_dataframe(chunk, x_col, y_col, src, dst)
+        parts.append(out)
+        total_points += stats["points"]
+        total_seconds += stats["seconds"]
+
+    df = pd.concat(parts, ignore_index=True) if parts else pd.DataFrame()
+    stats = {
+        "points": total_points,
+        "seconds": total_seconds,
+        "points_per_second": total_points / total_seconds if total_seconds > 0 else float("inf"),
+    }
+    return df, stats
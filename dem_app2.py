@@ -4,6 +4,10 @@ import pandas as pd
 import rasterio
 import matplotlib.pyplot as plt
 import plotly.express as px
+from streamlit_folium import folium_static
+
+import app_cache
+import tile_server
 
 st.set_page_config(layout="wide")
 st.title("Comparacion entre DEMs")
@@ -17,6 +21,24 @@ def read_raster(uploaded_file):
         data[data == src.nodata] = np.nan
     return data
 
+def read_georef(uploaded_file):
+    """Returns the (transform, crs) of an uploaded raster."""
+    uploaded_file.seek(0)
+    with rasterio.open(uploaded_file) as src:
+        georef = src.transform, src.crs.to_wkt() if src.crs is not None else None
+    uploaded_file.seek(0)
+    return georef
+
+def export_button(arr, label, file_name, georef):
+    transform, crs = georef
+    arr = arr.astype("float32")
+    st.download_button(
+        label,
+        app_cache.cog_download(arr, transform, crs, nodata=np.nan),
+        file_name=file_name,
+        mime="image/tiff"
+    )
+
 def compute_stats(arr, name):
     arr_flat = arr[~np.isnan(arr)]
     stats = {
@@ -68,6 +90,26 @@ if dem_file and dsm_file and dtm_file:
     with col3:
         plot_image(dtm, "ALOS")
 
+    # -----------------------------
+    # Hillshade map (tiles served on demand)
+    # -----------------------------
+    st.header("Mapa de relieve sombreado")
+    col1, col2, col3 = st.columns(3)
+    shaded = col1.selectbox("DEM", ["ASTER", "SRTM", "ALOS"])
+    azimuth = col2.slider("Azimut del sol (°)", 0, 360, 315, step=15)
+    altitude = col3.slider("Altura del sol (°)", 5, 90, 45, step=5)
+    shaded_file, shaded_dem = {"ASTER": (dem_file, dem), "SRTM": (dsm_file, dsm), "ALOS": (dtm_file, dtm)}[shaded]
+    transform, crs = read_georef(shaded_file)
+    if crs is not None:
+        shade = tile_server.hillshade(shaded_dem, transform, crs, azimuth, altitude)
+        shade_layer = tile_server.register_layer(f"Hillshade_{shaded}", shade, transform, crs,
+                                                 cmap="gray", vmin=0, vmax=1)
+        elevation_layer = tile_server.register_layer(shaded, shaded_dem, transform, crs, cmap="terrain")
+        folium_static(tile_server.folium_map([(shade_layer, f"Sombreado {shaded}"),
+                                              (elevation_layer, f"Elevacion {shaded}")]), width=1100)
+    else:
+        st.warning(f"{shaded} no esta georreferenciado: no se puede mostrar en el mapa.")
+
     # -----------------------------
     # Statistics
     # -----------------------------
@@ -116,6 +158,14 @@ if dem_file and dsm_file and dtm_file:
         diff_df = pd.DataFrame([ch_stats, td_stats])
         st.dataframe(diff_df, use_container_width=True)
 
+        # Export as Cloud-Optimized GeoTIFF with the georeferencing of the first DEM
+        georef = read_georef(dem_file)
+        col1, col2 = st.columns(2)
+        with col1:
+            export_button(canopy_height, "Descargar SRTM - ASTER (COG)", "diferencia_srtm_aster.tif", georef)
+        with col2:
+            export_button(terrain_diff, "Descargar SRTM - ALOS (COG)", "diferencia_srtm_alos.tif", georef)
+
         # Histograms
         col1, col2 = st.columns(2)
         with col1:
@@ -0,0 +1,113 @@
+import numpy as np
+
+# Display stretches for 8/16-bit imagery. Cutoffs come from an exact integer
+# histogram (np.bincount, O(N) with no float temporaries) accumulated over row
+# blocks, and the stretch itself is a lookup table indexed by the raw DN, so a
+# 16-bit band becomes uint8 in a single gather.
+
+STRETCHES = ("lineal", "gamma", "ecualizado")
+BLOCK_ROWS = 1024
+
+
+def _as_unsigned(band):
+    """Returns (integer band with non-negative DNs, offset added, number of histogram bins)."""
+    if band.dtype == np.uint8:
+        return band, 0, 256
+    if band.dtype == np.uint16:
+        return band, 0, 65536
+    if band.dtype == np.int16:
+        return band.view(np.uint16) ^ np.uint16(0x8000), 32768, 65536
+    raise TypeError(f"Tipo no soportado para histograma entero: {band.dtype}")
+
+
+def band_histogram(band, block_rows=BLOCK_ROWS):
+    """Streams an integer band by row blocks and returns its full DN histogram."""
+    band, _, bins = _as_unsigned(band)
+    hist = np.zeros(bins, dtype=np.int64)
+    for r0 in range(0, band.shape[0], block_rows):
+        hist += np.bincount(band[r0:r0 + block_rows].ravel(), minlength=bins)
+    return hist
+
+
+def percentile_cutoffs(hist, low=2.0, high=98.0, ignore_zero=True, offset=0):
+    """
+    Returns the (low, high) cutoffs of a histogram as bin indexes (DN + `offset`, the
+    offset of `_as_unsigned`); DN 0, in bin `offset`, is treated as no-data by default.
+    """
+    if ignore_zero:
+        hist = hist.copy()
+        hist[offset] = 0
+    cdf = np.cumsum(hist)
+    if cdf[-1] == 0:
+        return 0, len(hist) - 1
+    lo = int(np.searchsorted(cdf, cdf[-1] * low / 100.0))
+    hi = int(np.searchsorted(cdf, cdf[-1] * high / 100.0))
+    return lo, max(hi, lo + 1)
+
+
+def linear_lut(lo, hi, bins):
+    dn = np.arange(bins, dtype=np.float32)
+    return (np.clip((dn - lo) / (hi - lo), 0, 1) * 255 + 0.5).astype(np.uint8)
+
+
+def gamma_lut(lo, hi, bins, gamma=1.0):
+    dn = np.arange(bins, dtype=np.float32)
+    return (np.clip((dn - lo) / (hi - lo), 0, 1) ** (1.0 / gamma) * 255 + 0.5).astype(np.uint8)
+
+
+def equalize_lut(hist, lo, hi):
+    """Histogram-equalization LUT restricted to the [lo, hi] cutoffs."""
+    clipped = np.zeros_like(hist)
+    clipped[lo:hi + 1] = hist[lo:hi + 1]
+    cdf = np.cumsum(clipped).astype(np.float64)
+    cdf /= max(cdf[-1], 1)
+    lut = (cdf * 255 + 0.5).astype(np.uint8)
+    lut[:lo] = 0
+    lut[hi + 1:] = 255
+    return lut
+
+
+def build_lut(hist, method="lineal", low=2.0, high=98.0, gamma=1.0, offset=0):
+    """Builds the uint8 lookup table of a stretch from a band histogram (bins offset as in `_as_unsigned`)."""
+    lo, hi = percentile_cutoffs(hist, low, high, offset=offset)
+    bins = len(hist)
+    if method == "lineal":
+        return linear_lut(lo, hi, bins)
+    if method == "gamma":
+        return gamma_lut(lo, hi, bins, gamma)
+    if method == "ecualizado":
+        return equalize_lut(hist, lo, hi)
+    raise ValueError(f"Estiramiento desconocido: {method} (use {', '.join(STRETCHES)})")
+
+
+def _float_to_uint16(band):
+    """Quantizes a float band to uint16 over its finite range (NaN -> 0)."""
+    valid = np.isfinite(band)
+    if not valid.any():
+        return np.zeros(band.shape, dtype=np.uint16)
+    vmin, vmax = np.min(band[valid]), np.max(band[valid])
+    out = np.zeros(band.shape, dtype=np.uint16)
+    out[valid] = ((band[valid] - vmin) / (vmax - vmin + 1e-12) * 65534 + 1).astype(np.uint16)
+    return out
+
+
+def stretch_band(band, method="lineal", low=2.0, high=98.0, gamma=1.0):
+    """Stretches one band to uint8 with a percentile-clipped lookup table."""
+    if band.dtype.kind == "f":
+        band = _float_to_uint16(band)
+    elif band.dtype not in (np.uint8, np.uint16, np.int16):
+        band = np.clip(band, 0, 65535).astype(np.uint16)
+
+    unsigned, offset, _ = _as_unsigned(band)
+    lut = build_lut(band_histogram(band), method, low, high, gamma, offset)
+    return lut[unsigned]
+
+
+def stretch_image(img, method="lineal", low=2.0, high=98.0, gamma=1.0):
+    """Stretches each band of an (h, w) or (h, w, bands) image independently to uint8."""
+    if img.ndim == 2:
+        return stretch_band(img, method, low, high, gamma)
+    out = np.empty(img.shape, dtype=np.uint8)
+    for b in range(img.shape[2]):
+        out[:, :, b] = stretch_band(img[:, :, b], method, low, high, gamma)
+    return out
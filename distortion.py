@@ -0,0 +1,165 @@
+from functools import lru_cache
+
+import matplotlib.pyplot as plt
+import numpy as np
+from pyproj import Geod, Proj
+from scipy.interpolate import RegularGridInterpolator
+
+import crs_service
+
+# Map-projection distortion from PROJ's analytic scale factors (Tissot indicatrix).
+# The factors are evaluated on a coarse lon/lat grid that is refined only while
+# it keeps changing, and then interpolated to the display size, so the cost does
+# not depend on the size of the image being reprojected.
+
+FACTOR_FIELDS = (
+    "areal_scale",
+    "angular_distortion",  # maximum angular distortion (degrees)
+    "meridional_scale",
+    "parallel_scale",
+    "tissot_semimajor",
+    "tissot_semiminor",
+    "meridian_convergence",
+)
+
+GEOD = Geod(ellps="WGS84")
+
+
+@lru_cache(maxsize=32)
+def _proj(crs):
+    return Proj(crs)
+
+
+def factor_grid(crs, bounds, n=9):
+    """
+    Evaluates the scale factors of `crs` on an n x n grid over (lon_min, lat_min, lon_max, lat_max).
+
+    Returns (lon, lat, fields) where lon/lat are the 1-D axes (ascending) and fields
+    maps each name in FACTOR_FIELDS to an (n_lat, n_lon) array.
+    """
+    lon_min, lat_min, lon_max, lat_max = bounds
+    lon = np.linspace(lon_min, lon_max, n)
+    lat = np.linspace(lat_min, lat_max, n)
+    lon_grid, lat_grid = np.meshgrid(lon, lat)
+
+    factors = _proj(crs).get_factors(lon_grid.ravel(), lat_grid.ravel())
+    fields = {
+        name: np.asarray(getattr(factors, name), dtype=np.float64).reshape(n, n)
+        for name in FACTOR_FIELDS
+    }
+    return lon, lat, fields
+
+
+def _midpoint_error(coarse, fine):
+    """Largest difference between the fine grid and a linear interpolation of the coarse one."""
+    estimate = np.empty_like(fine)
+    estimate[::2, ::2] = coarse
+    estimate[1::2, ::2] = (coarse[:-1] + coarse[1:]) / 2
+    estimate[:, 1::2] = (estimate[:, :-1:2] + estimate[:, 2::2]) / 2
+    return np.nanmax(np.abs(fine - estimate))
+
+
+def adaptive_factor_grid(crs, bounds, start=5, max_n=65, tol=1e-4):
+    """
+    Refines the factor grid (5, 9, 17, ... nodes per side) until linear interpolation
+    of the areal scale and angular distortion is accurate to `tol`, or `max_n` is reached.
+    """
+    n = start
+    lon, lat, fields = factor_grid(crs, bounds, n)
+    while n < max_n:
+        n_fine = 2 * n - 1
+        lon_f, lat_f, fields_f = factor_grid(crs, bounds, n_fine)
+        error = max(
+            _midpoint_error(fields["areal_scale"], fields_f["areal_scale"]),
+            _midpoint_error(fields["angular_distortion"], fields_f["angular_distortion"]) / 60,
+        )
+        lon, lat, fields, n = lon_f, lat_f, fields_f, n_fine
+        if error < tol:
+            break
+    return lon, lat, fields
+
+
+def interpolate_field(lon, lat, values, shape):
+    """
+    Bilinearly resamples a factor field to a (rows, cols) display grid.
+
+    Row 0 is the northern edge so the result lines up with an image of the same extent.
+    """
+    rows, cols = shape
+    interp = RegularGridInterpolator((lat, lon), values)
+    lat_out = np.linspace(lat[-1], lat[0], rows)
+    lon_out = np.linspace(lon[0], lon[-1], cols)
+    lat_grid, lon_grid = np.meshgrid(lat_out, lon_out, indexing="ij")
+    return interp(np.stack([lat_grid.ravel(), lon_grid.ravel()], axis=-1)).reshape(rows, cols)
+
+
+def summarize(fields):
+    """Returns the headline distortion numbers of a factor grid."""
+    return {
+        "areal_scale_mean": float(np.nanmean(fields["areal_scale"])),
+        "areal_scale_min": float(np.nanmin(fields["areal_scale"])),
+        "areal_scale_max": float(np.nanmax(fields["areal_scale"])),
+        "angular_distortion_max": float(np.nanmax(fields["angular_distortion"])),
+        "angular_distortion_mean": float(np.nanmean(fields["angular_distortion"])),
+    }
+
+
+def tissot_ellipses(crs, bounds, n=5, radius_m=None, n_vertices=72):
+    """
+    Projects geodesic circles of equal ground radius centred on an n x n grid into `crs`.
+
+    Returns a list of (x, y) vertex arrays, one per circle. The default radius is a
+    third of the spacing between centres so neighbouring ellipses do not overlap.
+    """
+    lon_min, lat_min, lon_max, lat_max = bounds
+    if radius_m is None:
+        _, _, width = GEOD.inv(lon_min, lat_min, lon_max, lat_min)
+        _, _, height = GEOD.inv(lon_min, lat_min, lon_min, lat_max)
+        radius_m = min(width, height) / (3 * (n + 1))
+
+    lon_c, lat_c = np.meshgrid(
+        np.linspace(lon_min, lon_max, n + 2)[1:-1],
+        np.linspace(lat_min, lat_max, n + 2)[1:-1],
+    )
+    azimuths = np.linspace(0, 360, n_vertices)
+
+    # One vectorized geodesic call for every vertex of every circle
+    lon0 = np.repeat(lon_c.ravel(), n_vertices)
+    lat0 = np.repeat(lat_c.ravel(), n_vertices)
+    az = np.tile(azimuths, lon_c.size)
+    lon_v, lat_v, _ = GEOD.fwd(lon0, lat0, az, np.full(az.shape, radius_m))
+
+    x, y, _ = crs_service.transform_points(lon_v, lat_v, "EPSG:4326", crs)
+    x = x.reshape(-1, n_vertices)
+    y = y.reshape(-1, n_vertices)
+    return [(x[i], y[i]) for i in range(x.shape[0])]
+
+
+def distortion_figure(crs, bounds, lon, lat, fields, shape=(256, 256)):
+    """Builds a matplotlib figure with areal-scale and angular-distortion heatmaps plus Tissot ellipses."""
+    lon_min, lat_min, lon_max, lat_max = bounds
+    extent = (lon_min, lon_max, lat_min, lat_max)
+    fig, axes = plt.subplots(1, 3, figsize=(16, 5))
+
+    areal = interpolate_field(lon, lat, fields["areal_scale"], shape)
+    im = axes[0].imshow(areal, extent=extent, cmap="viridis")
+    axes[0].set_title("Escala areal")
+    fig.colorbar(im, ax=axes[0])
+
+    angular = interpolate_field(lon, lat, fields["angular_distortion"], shape)
+    # Conformal projections only show floating-point noise; keep those maps dark
+    im = axes[1].imshow(angular, extent=extent, cmap="magma", vmin=0, vmax=max(angular.max(), 1e-3))
+    axes[1].set_title("Distorsion angular maxima (grados)")
+    fig.colorbar(im, ax=axes[1])
+
+    for x, y in tissot_ellipses(crs, bounds):
+        axes[2].fill(x, y, alpha=0.4, color="tab:red")
+        axes[2].plot(x, y, color="tab:red", lw=0.8)
+    axes[2].set_aspect("equal")
+    axes[2].set_title("Indicatriz de Tissot")
+
+    for ax in axes[:2]:
+        ax.set_xlabel("Longitud")
+        ax.set_ylabel("Latitud")
+    fig.tight_layout()
+    return fig
@@ -0,0 +1,180 @@
+from functools import lru_cache
+
+import numpy as np
+import plotly.graph_objects as go
+
+import radiometry
+
+# Electromagnetic spectrum: unit conversions and region lookup. Every quantity is
+# converted through the wavelength in metres (nu = c / lambda, E = h c / lambda,
+# wavenumber = 1 / lambda), element-wise over arrays. Regions are contiguous, so
+# their sorted boundaries make a bin index and np.searchsorted finds the region of
+# any number of wavelengths in O(log n) each. The layout of the spectrum figure is
+# built once; each rerun only adds the selection marker to it.
+
+ELECTRON_VOLT = 1.602176634e-19  # J (exact SI value)
+
+# unit: (quantity, factor to the SI unit of the quantity)
+UNITS = {
+    "m": ("wavelength", 1.0),
+    "um": ("wavelength", 1e-6),
+    "nm": ("wavelength", 1e-9),
+    "Hz": ("frequency", 1.0),
+    "GHz": ("frequency", 1e9),
+    "THz": ("frequency", 1e12),
+    "J": ("energy", 1.0),
+    "eV": ("energy", ELECTRON_VOLT),
+    "cm-1": ("wavenumber", 100.0),  # SI: m^-1
+}
+
+# (name, lower and upper wavelength in m, colour), in increasing wavelength
+REGIONS = (
+    ("Rayos Gamma", 1e-15, 1e-11, "rgba(255, 255, 0, 0.4)"),
+    ("Rayos X", 1e-11, 1e-8, "rgba(128, 128, 128, 0.4)"),
+    ("Ultravioleta", 1e-8, 4e-7, "rgba(0, 0, 255, 0.4)"),
+    ("Luz visible", 4e-7, 7e-7, "rgba(0, 255, 0, 0.4)"),
+    ("Infrarroja", 7e-7, 1e-3, "rgba(255, 0, 0, 0.4)"),
+    ("Microondas", 1e-3, 1e-1, "rgba(255, 165, 0, 0.4)"),
+    ("Ondas de Radio", 1e-1, 1e4, "rgba(128, 0, 128, 0.4)"),
+)
+
+VISIBLE_COLORS = (
+    ("Violeta", 400e-9, 450e-9),
+    ("Azul", 450e-9, 495e-9),
+    ("Verde", 495e-9, 570e-9),
+    ("Amarillo", 570e-9, 590e-9),
+    ("Naranja", 590e-9, 620e-9),
+    ("Rojo", 620e-9, 700e-9),
+)
+
+OUT_OF_RANGE = "Fuera de rango"
+
+
+# --- Conversions ---
+
+def _to_wavelength(values, unit):
+    quantity, factor = UNITS[unit]
+    values = np.asarray(values, dtype=np.float64) * factor
+    with np.errstate(divide="ignore"):
+        if quantity == "wavelength":
+            return values
+        if quantity == "frequency":
+            return radiometry.LIGHT_SPEED / values
+        if quantity == "energy":
+            return radiometry.PLANCK * radiometry.LIGHT_SPEED / values
+        return 1.0 / values
+
+
+def _from_wavelength(wavelength_m, unit):
+    quantity, factor = UNITS[unit]
+    with np.errstate(divide="ignore"):
+        if quantity == "wavelength":
+            values = wavelength_m
+        elif quantity == "frequency":
+            values = radiometry.LIGHT_SPEED / wavelength_m
+        elif quantity == "energy":
+            values = radiometry.PLANCK * radiometry.LIGHT_SPEED / wavelength_m
+        else:
+            values = 1.0 / wavelength_m
+    return values / factor
+
+
+def convert(values, from_unit, to_unit):
+    """Converts wavelengths, frequencies, photon energies or wavenumbers (any array shape) between UNITS."""
+    for unit in (from_unit, to_unit):
+        if unit not in UNITS:
+            raise ValueError(f"Unidad desconocida: {unit} (use {', '.join(UNITS)})")
+    return _from_wavelength(_to_wavelength(values, from_unit), to_unit)[()]
+
+
+def describe(wavelength_m):
+    """Frequency (Hz), energy (J and eV) and wavenumber (cm^-1) of wavelengths in m, as a dict of arrays."""
+    wavelength_m = np.asarray(wavelength_m, dtype=np.float64)
+    return {unit: _from_wavelength(wavelength_m, unit)[()] for unit in ("m", "Hz", "J", "eV", "cm-1")}
+
+
+# --- Region index ---
+
+_REGION_EDGES = np.array([r[1] for r in REGIONS] + [REGIONS[-1][2]])
+_REGION_NAMES = np.array([r[0] for r in REGIONS] + [OUT_OF_RANGE])
+_COLOR_EDGES = np.array([c[1] for c in VISIBLE_COLORS] + [VISIBLE_COLORS[-1][2]])
+_COLOR_NAMES = np.array([c[0] for c in VISIBLE_COLORS] + [""])
+
+
+def _lookup(edges, names, wavelength_m):
+    wavelength_m = np.asarray(wavelength_m, dtype=np.float64)
+    index = np.searchsorted(edges, wavelength_m, side="right") - 1
+    index[(index < 0) | (index >= len(edges) - 1) | ~np.isfinite(wavelength_m)] = len(names) - 1
+    return names[index]
+
+
+def region_of(wavelength_m):
+    """Name of the spectral region of each wavelength (m); OUT_OF_RANGE beyond the table."""
+    return _lookup(_REGION_EDGES, _REGION_NAMES, np.atleast_1d(wavelength_m)).reshape(np.shape(wavelength_m))[()]
+
+
+def visible_color(wavelength_m):
+    """Colour name of visible wavelengths (m); empty string elsewhere."""
+    return _lookup(_COLOR_EDGES, _COLOR_NAMES, np.atleast_1d(wavelength_m)).reshape(np.shape(wavelength_m))[()]
+
+
+def region_bounds(name):
+    """(lower, upper) wavelength in m of a region."""
+    for region, lower, upper, _ in REGIONS:
+        if region == name:
+            return lower, upper
+    raise ValueError(f"Region desconocida: {name}")
+
+
+# --- Figure ---
+
+@lru_cache(maxsize=1)
+def base_layout():
+    """
+    Layout of the static spectrum figure (regions as shapes with their labels) on a
+    log10 wavelength axis, as a plain dict. Cached: do not modify it in place.
+    """
+    shapes, annotations = [], []
+    for name, lower, upper, color in REGIONS:
+        x0, x1 = np.log10(lower), np.log10(upper)
+        shapes.append(dict(type="rect", x0=x0, x1=x1, y0=0, y1=1, fillcolor=color, line=dict(width=0), layer="below"))
+        annotations.append(dict(x=(x0 + x1) / 2, y=0.5, text=name, showarrow=False, font=dict(size=10, color="black")))
+    return dict(
+        shapes=shapes,
+        annotations=annotations,
+        title="Espectro Electromagnetico",
+        xaxis_title="Longitud de onda ($\\lambda$) (log10 meters)",
+        yaxis_title="Escala relative",
+        showlegend=False,
+        xaxis_range=[-15, 4],
+        yaxis_range=[0, 1],
+        height=300,
+        margin=dict(l=20, r=20, t=40, b=20),
+    )
+
+
+def spectrum_figure(wavelength_m):
+    """
+    The spectrum figure with a marker at `wavelength_m`: the cached layout plus one
+    line and its label, validated by plotly in a single construction.
+    """
+    x = float(np.log10(wavelength_m))
+    layout = dict(base_layout())
+    layout["shapes"] = layout["shapes"] + [
+        dict(type="line", x0=x, x1=x, y0=0, y1=1, line=dict(width=3, dash="dash", color="black"))
+    ]
+    layout["annotations"] = layout["annotations"] + [
+        dict(x=x, y=1, text="Su seleccion", showarrow=False, xanchor="left", yanchor="top")
+    ]
+    return go.Figure(layout=layout)
+
+
+# --- Grading ---
+
+def grade(answers, expected, rel_tol=0.05):
+    """True where answers are within `rel_tol` (relative) of the expected values; NaN answers are False."""
+    answers = np.asarray(answers, dtype=np.float64)
+    expected = np.asarray(expected, dtype=np.float64)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        error = np.abs(answers - expected) / np.abs(expected)
+    return (np.isfinite(error) & (error <= rel_tol))[()]
@@ -0,0 +1,168 @@
+from functools import lru_cache
+
+import numpy as np
+
+import radiometry
+
+# Spectral emissivity library. Curves have different lengths, so they are stored
+# like a CSR matrix: all wavelengths and values concatenated in two float32 arrays
+# plus an offsets array (curve i is [offsets[i], offsets[i + 1])). Resampling every
+# curve onto a common grid is one searchsorted over keys (material * KEY_STRIDE +
+# wavelength) that are globally sorted, and band quantities for all (material,
+# temperature) pairs are then a single matrix product or a table lookup.
+
+KEY_STRIDE = 1000.0  # larger than any wavelength in µm
+WAVELENGTH_RANGE = (3.0, 14.0)  # µm covered by the built-in curves
+
+# Approximate thermal-infrared emissivity curves (µm, emissivity), after the
+# shapes of the ASTER/ECOSTRESS spectral library
+MATERIALS = {
+    "Cuerpo negro perfecto": ([3.0, 14.0], [1.0, 1.0]),
+    "Plata pulida": ([3.0, 8.0, 14.0], [0.03, 0.02, 0.02]),
+    "Aluminio pulido": ([3.0, 8.0, 14.0], [0.06, 0.05, 0.04]),
+    "Madera": ([3.0, 5.0, 8.0, 9.5, 11.0, 14.0], [0.86, 0.88, 0.90, 0.89, 0.91, 0.92]),
+    "Asfalto": ([3.0, 5.0, 8.0, 10.0, 12.0, 14.0], [0.92, 0.94, 0.95, 0.96, 0.96, 0.95]),
+    "Concreto": ([3.0, 5.0, 8.0, 8.6, 9.2, 10.0, 11.0, 12.0, 14.0],
+                 [0.90, 0.92, 0.90, 0.86, 0.88, 0.93, 0.95, 0.96, 0.96]),
+    "Agua": ([3.0, 4.0, 6.0, 8.0, 10.0, 11.0, 12.0, 13.0, 14.0],
+             [0.97, 0.98, 0.98, 0.985, 0.99, 0.992, 0.99, 0.985, 0.98]),
+    "Vegetacion": ([3.0, 5.0, 8.0, 9.0, 10.0, 11.0, 12.0, 14.0],
+                   [0.95, 0.96, 0.97, 0.975, 0.98, 0.985, 0.985, 0.98]),
+    "Suelo arenoso": ([3.0, 5.0, 7.5, 8.2, 8.6, 9.0, 9.3, 9.8, 10.5, 11.0, 12.0, 14.0],
+                      [0.80, 0.86, 0.93, 0.76, 0.70, 0.74, 0.72, 0.85, 0.94, 0.96, 0.97, 0.97]),
+    "Suelo arcilloso": ([3.0, 5.0, 8.0, 9.0, 9.6, 10.5, 11.5, 14.0],
+                        [0.88, 0.92, 0.95, 0.90, 0.89, 0.95, 0.97, 0.97]),
+    "Nieve": ([3.0, 5.0, 8.0, 10.0, 11.0, 12.0, 13.0, 14.0],
+              [0.97, 0.98, 0.99, 0.995, 0.99, 0.98, 0.975, 0.97]),
+}
+
+
+class EmissivityLibrary:
+    """Variable-length emissivity spectra in CSR layout (float32 values, int64 offsets)."""
+
+    def __init__(self, names, wavelengths, values, offsets):
+        self.names = list(names)
+        self.wavelengths = np.asarray(wavelengths, dtype=np.float32)
+        self.values = np.asarray(values, dtype=np.float32)
+        self.offsets = np.asarray(offsets, dtype=np.int64)
+        material = np.repeat(np.arange(len(self.names)), np.diff(self.offsets))
+        self._keys = material * KEY_STRIDE + self.wavelengths.astype(np.float64)
+
+    @classmethod
+    def from_curves(cls, curves):
+        """Builds a library from a {name: (wavelengths in µm, emissivity)} mapping."""
+        names, wavelengths, values, offsets = [], [], [], [0]
+        for name, (wl, em) in curves.items():
+            wl, em = np.asarray(wl, dtype=np.float64), np.asarray(em, dtype=np.float64)
+            if wl.shape != em.shape or np.any(np.diff(wl) <= 0):
+                raise ValueError(f"Curva invalida para {name}: longitudes de onda crecientes requeridas")
+            names.append(name)
+            wavelengths.append(wl)
+            values.append(np.clip(em, 0, 1))
+            offsets.append(offsets[-1] + len(wl))
+        return cls(names, np.concatenate(wavelengths), np.concatenate(values), offsets)
+
+    def __len__(self):
+        return len(self.names)
+
+    def index(self, name):
+        return self.names.index(name)
+
+    def curve(self, name):
+        """Returns the (wavelengths, emissivity) samples of one material."""
+        i = self.index(name)
+        start, end = self.offsets[i], self.offsets[i + 1]
+        return self.wavelengths[start:end], self.values[start:end]
+
+    def resample(self, grid, materials=None):
+        """
+        Returns a (materials, len(grid)) float32 matrix of the curves linearly
+        interpolated on `grid` (µm), held constant beyond each curve's end points.
+        """
+        grid = np.asarray(grid, dtype=np.float64)
+        materials = np.arange(len(self)) if materials is None else np.asarray(materials)
+        starts = self.offsets[materials][:, None]
+        ends = self.offsets[materials + 1][:, None] - 1
+
+        keys = materials[:, None] * KEY_STRIDE + grid[None, :]
+        upper = np.clip(np.searchsorted(self._keys, keys), starts + 1, np.maximum(ends, starts + 1))
+        upper = np.minimum(upper, ends)
+        lower = np.maximum(upper - 1, starts)
+        x0, x1 = self._keys[lower], self._keys[upper]
+        with np.errstate(divide="ignore", invalid="ignore"):
+            t = np.clip(np.where(x1 > x0, (keys - x0) / (x1 - x0), 0.0), 0, 1)
+        return (self.values[lower] * (1 - t) + self.values[upper] * t).astype(np.float32)
+
+
+@lru_cache(maxsize=1)
+def default_library():
+    """The built-in MATERIALS as an EmissivityLibrary."""
+    return EmissivityLibrary.from_curves(MATERIALS)
+
+
+def band_emissivity(response, library=None):
+    """Response-weighted mean emissivity of every material for a band (absorptivity, by Kirchhoff)."""
+    library = library or default_library()
+    wavelengths, weights = radiometry.band_weights(response)
+    return library.resample(wavelengths) @ weights / weights.sum()
+
+
+def band_exitance(materials, temperatures, response, library=None):
+    """
+    Band-integrated exitance (W/m²) M = π ∫ ε(λ) L(λ, T) S(λ) dλ of a Lambertian surface
+    for every combination of `materials` (indexes) and `temperatures` (K).
+
+    Returns a (len(materials), len(temperatures)) array computed with one matrix product.
+    """
+    library = library or default_library()
+    wavelengths, weights = radiometry.band_weights(response)
+    emissivity = library.resample(wavelengths, np.atleast_1d(materials)).astype(np.float64)
+    radiance = radiometry.spectral_radiance(wavelengths, np.atleast_1d(temperatures)[:, None], unit="um")
+    return np.pi * (emissivity * weights) @ radiance.T
+
+
+@lru_cache(maxsize=8)
+def band_radiance_table(response_name, t_min=150.0, t_max=400.0, t_step=0.1, library=None):
+    """
+    Returns (temperatures, table) with table[m, i] the band-averaged radiance
+    (W m^-2 sr^-1 µm^-1) of material m at temperatures[i]. Cached and read-only.
+    """
+    library = library or default_library()
+    temperatures = np.arange(t_min, t_max + t_step / 2, t_step)
+    response = radiometry.SENSOR_RESPONSES[response_name]
+    _, weights = radiometry.band_weights(response)
+    table = band_exitance(np.arange(len(library)), temperatures, response, library) / (np.pi * weights.sum())
+    temperatures.flags.writeable = False
+    table.flags.writeable = False
+    return temperatures, table
+
+
+def scene_radiance(material_map, temperature_map, response_name, library=None):
+    """
+    Simulates the surface-leaving band radiance of a scene from a map of material
+    indexes and a map of kinetic temperatures (K), by linear interpolation in the
+    cached per-material table. NaN temperatures or temperatures off the table give NaN.
+    """
+    temperatures, table = band_radiance_table(response_name, library=library)
+    t0, step = temperatures[0], temperatures[1] - temperatures[0]
+    position = (np.asarray(temperature_map, dtype=np.float64) - t0) / step
+    valid = np.isfinite(position) & (position >= 0) & (position <= len(temperatures) - 1)
+    position = np.where(valid, position, 0)
+    lower = np.minimum(position.astype(np.int64), len(temperatures) - 2)
+    frac = position - lower
+    material_map = np.asarray(material_map, dtype=np.int64)
+    out = table[material_map, lower] * (1 - frac) + table[material_map, lower + 1] * frac
+    return np.where(valid, out, np.nan).astype(np.float32)
+
+
+def effective_emissivity(material, temperature, library=None, wavelength_range=WAVELENGTH_RANGE, samples=512):
+    """
+    Planck-weighted mean emissivity of a material over `wavelength_range` (µm) at a
+    temperature: the ε to use in the Stefan-Boltzmann law for a non-grey body.
+    """
+    library = library or default_library()
+    wavelengths = np.linspace(*wavelength_range, samples)
+    emissivity = library.resample(wavelengths, np.array([library.index(material)]))[0]
+    radiance = radiometry.spectral_radiance(wavelengths, temperature, unit="um")
+    total = np.trapezoid(radiance, wavelengths)
+    return float(np.trapezoid(emissivity * radiance, wavelengths) / total) if total > 0 else float(emissivity.mean())
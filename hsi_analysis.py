@@ -0,0 +1,235 @@
+import ast
+
+import numpy as np
+
+# --- Tiling ---
+# Every routine in this module walks the cube in blocks of full rows so that a
+# memory-mapped (rows, cols, bands) array never has to be loaded at once. Each
+# block is flattened to a (pixels, bands) matrix and processed with a single
+# matrix product, which lets the BLAS library use every CPU core.
+
+TILE_BYTES = 64 * 1024 * 1024  # ~64 MB of float32 per block
+
+
+def tile_rows_for(cube, tile_bytes=TILE_BYTES):
+    """Returns how many image rows fit in one block of `tile_bytes` float32 values."""
+    rows, cols, bands = cube.shape
+    return int(max(1, min(rows, tile_bytes // (cols * bands * 4))))
+
+
+def iter_tiles(cube, tile_rows=None):
+    """Yields (row_slice, block) pairs with blocks of shape (n_rows, cols, bands) as float32."""
+    if tile_rows is None:
+        tile_rows = tile_rows_for(cube)
+    for r0 in range(0, cube.shape[0], tile_rows):
+        r1 = min(r0 + tile_rows, cube.shape[0])
+        yield slice(r0, r1), np.asarray(cube[r0:r1], dtype=np.float32)
+
+
+def nearest_band(wavelengths, wavelength_nm):
+    """Returns the index of the band whose centre is closest to `wavelength_nm`."""
+    return int(np.argmin(np.abs(np.asarray(wavelengths) - wavelength_nm)))
+
+
+# --- Spectral Angle Mapper ---
+
+def _unit_rows(matrix):
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return matrix / norms
+
+
+def sam_classify(cube, library, max_angle=None, tile_rows=None):
+    """
+    Classifies every pixel against a spectral library with the Spectral Angle Mapper.
+
+    `library` is a (n_classes, bands) array. Returns (labels, angles) where labels is
+    int16 (-1 when the best angle exceeds `max_angle`, in radians) and angles is the
+    float32 spectral angle to the winning class.
+    """
+    rows, cols, bands = cube.shape
+    library = np.asarray(library, dtype=np.float32)
+    if library.ndim != 2 or library.shape[1] != bands:
+        raise ValueError(f"La libreria debe tener forma (clases, {bands})")
+
+    lib_unit = _unit_rows(library).T  # (bands, n_classes)
+    labels = np.empty((rows, cols), dtype=np.int16)
+    angles = np.empty((rows, cols), dtype=np.float32)
+
+    for sl, tile in iter_tiles(cube, tile_rows):
+        X = tile.reshape(-1, bands)
+        cos = X @ lib_unit  # one GEMM per tile
+        norms = np.linalg.norm(X, axis=1)
+        norms[norms == 0] = 1.0
+        cos /= norms[:, None]
+
+        best = np.argmax(cos, axis=1)
+        best_cos = np.take_along_axis(cos, best[:, None], axis=1)[:, 0]
+        best_angle = np.arccos(np.clip(best_cos, -1.0, 1.0))
+        if max_angle is not None:
+            best[best_angle > max_angle] = -1
+
+        n = sl.stop - sl.start
+        labels[sl] = best.reshape(n, cols)
+        angles[sl] = best_angle.reshape(n, cols)
+
+    return labels, angles
+
+
+# --- PCA / MNF ---
+
+def band_statistics(cube, tile_rows=None):
+    """Streams the cube once and returns the per-band mean and the band covariance matrix."""
+    bands = cube.shape[2]
+    n = 0
+    total = np.zeros(bands)
+    cross = np.zeros((bands, bands))
+    for _, tile in iter_tiles(cube, tile_rows):
+        X = tile.reshape(-1, bands).astype(np.float64)
+        n += X.shape[0]
+        total += X.sum(axis=0)
+        cross += X.T @ X
+    mean = total / n
+    cov = (cross - n * np.outer(mean, mean)) / max(n - 1, 1)
+    return mean, cov
+
+
+def noise_covariance(cube, tile_rows=None):
+    """Estimates the noise covariance from differences between horizontally adjacent pixels."""
+    bands = cube.shape[2]
+    n = 0
+    cross = np.zeros((bands, bands))
+    for _, tile in iter_tiles(cube, tile_rows):
+        D = (tile[:, 1:, :] - tile[:, :-1, :]).reshape(-1, bands).astype(np.float64)
+        n += D.shape[0]
+        cross += D.T @ D
+    # The difference of two pixels carries twice the noise variance
+    return cross / (2 * max(n - 1, 1))
+
+
+def fit_pca(cube, tile_rows=None):
+    """
+    Computes the principal components of the cube.
+
+    Returns (mean, components, eigenvalues) with components as columns of a
+    (bands, bands) matrix sorted by decreasing variance.
+    """
+    mean, cov = band_statistics(cube, tile_rows)
+    eigenvalues, eigenvectors = np.linalg.eigh(cov)
+    order = np.argsort(eigenvalues)[::-1]
+    return mean, eigenvectors[:, order], eigenvalues[order]
+
+
+def fit_mnf(cube, tile_rows=None):
+    """
+    Computes the Minimum Noise Fraction transform (noise whitening followed by PCA).
+
+    Returns (mean, components, eigenvalues) where the eigenvalues are signal-to-noise
+    ratios in decreasing order.
+    """
+    mean, cov = band_statistics(cube, tile_rows)
+    noise_values, noise_vectors = np.linalg.eigh(noise_covariance(cube, tile_rows))
+    noise_values = np.maximum(noise_values, np.finfo(np.float64).eps * noise_values.max())
+    whitening = noise_vectors / np.sqrt(noise_values)
+
+    eigenvalues, eigenvectors = np.linalg.eigh(whitening.T @ cov @ whitening)
+    order = np.argsort(eigenvalues)[::-1]
+    return mean, whitening @ eigenvectors[:, order], eigenvalues[order]
+
+
+def project(cube, mean, components, n_components=3, tile_rows=None):
+    """Projects the cube onto the first `n_components` columns of `components`."""
+    rows, cols, bands = cube.shape
+    W = components[:, :n_components].astype(np.float32)
+    offset = (np.asarray(mean) @ components[:, :n_components]).astype(np.float32)
+    out = np.empty((rows, cols, n_components), dtype=np.float32)
+    for sl, tile in iter_tiles(cube, tile_rows):
+        scores = tile.reshape(-1, bands) @ W
+        scores -= offset
+        out[sl] = scores.reshape(sl.stop - sl.start, cols, n_components)
+    return out
+
+
+# --- Band math ---
+
+# Functions allowed in band-math and spectral-index expressions (shared with spectral_indices)
+FUNCTIONS = {
+    "sqrt": np.sqrt,
+    "log": np.log,
+    "exp": np.exp,
+    "abs": np.abs,
+    "minimum": np.minimum,
+    "maximum": np.maximum,
+}
+
+_ALLOWED_NODES = (
+    ast.Expression, ast.BinOp, ast.UnaryOp, ast.Call, ast.Name, ast.Load, ast.Constant,
+    ast.Add, ast.Sub, ast.Mult, ast.Div, ast.Pow, ast.USub, ast.UAdd,
+)
+
+
+def parse_expression(expression, check_name):
+    """
+    Parses and validates an arithmetic expression over variables and FUNCTIONS.
+
+    Only arithmetic, numeric constants and calls of FUNCTIONS with their number of
+    arguments are allowed; `check_name(name)` validates every other name and raises
+    ValueError for unknown ones. Returns the ast.Expression.
+    """
+    try:
+        tree = ast.parse(expression, mode="eval")
+    except SyntaxError:
+        raise ValueError(f"Expresion invalida: {expression}")
+    callees = set()
+    for node in ast.walk(tree):
+        if not isinstance(node, _ALLOWED_NODES):
+            raise ValueError(f"Operacion no permitida: {type(node).__name__}")
+        if isinstance(node, ast.Constant) and (
+            isinstance(node.value, bool) or not isinstance(node.value, (int, float))
+        ):
+            raise ValueError(f"Constante no permitida: {node.value!r}")
+        if isinstance(node, ast.Call):
+            if not isinstance(node.func, ast.Name) or node.func.id not in FUNCTIONS:
+                raise ValueError("Funcion no permitida en la expresion")
+            n_args = FUNCTIONS[node.func.id].nin
+            if len(node.args) != n_args:
+                raise ValueError(f"{node.func.id} requiere {n_args} argumento(s), recibio {len(node.args)}")
+            callees.add(id(node.func))
+        if isinstance(node, ast.Name) and node.id in FUNCTIONS and id(node) not in callees:
+            raise ValueError(f"La funcion {node.id} debe llamarse con argumentos")
+        if isinstance(node, ast.Name) and node.id not in FUNCTIONS:
+            check_name(node.id)
+    return tree
+
+
+def compile_band_math(expression, n_bands):
+    """
+    Validates a band-math expression such as "(b60 - b40) / (b60 + b40)" and compiles it.
+
+    Bands are referenced as b<index> (0-based). Returns (code, band_indices).
+    """
+    used = set()
+
+    def check_band(name):
+        if not (name.startswith("b") and name[1:].isdigit()):
+            raise ValueError(f"Nombre desconocido: {name}")
+        index = int(name[1:])
+        if index >= n_bands:
+            raise ValueError(f"La banda {index} no existe (hay {n_bands})")
+        used.add(index)
+
+    tree = parse_expression(expression, check_band)
+    return compile(tree, "<band_math>", "eval"), sorted(used)
+
+
+def band_math(cube, expression, tile_rows=None):
+    """Evaluates a band-math expression over the cube block by block and returns a float32 image."""
+    rows, cols, bands = cube.shape
+    code, used = compile_band_math(expression, bands)
+    out = np.empty((rows, cols), dtype=np.float32)
+    for sl, tile in iter_tiles(cube, tile_rows):
+        namespace = dict(FUNCTIONS)
+        namespace.update({f"b{i}": tile[:, :, i] for i in used})
+        with np.errstate(divide="ignore", invalid="ignore"):
+            out[sl] = eval(code, {"__builtins__": {}}, namespace)
+    return out
@@ -1,8 +1,18 @@
 import streamlit as st
 import numpy as np
 import matplotlib.pyplot as plt
+import pandas as pd
+import tempfile
+import os
+import io
 from PIL import Image
 
+import hsi_analysis
+import lidar_grid
+import reprojection
+import spectral_library
+import spectral_search
+
 # --- Configuration and Setup ---
 
 # Set the page configuration
@@ -45,6 +55,12 @@ def load_data():
 HSI_DATA, LIDAR_DATA, WAVELENGTHS = load_data()
 
 
+@st.cache_data
+def library_index(continuum):
+    """Search index of the sample spectral library resampled to the HSI bands."""
+    return spectral_search.SpectralIndex.from_library(spectral_library.sample_library(), WAVELENGTHS, continuum)
+
+
 # --- Main App Functions ---
 
 def display_hsi_dashboard():
@@ -86,6 +102,15 @@ def display_hsi_dashboard():
         ax.legend()
         st.pyplot(fig) # Display the plot in Streamlit
 
+        st.markdown("**Materiales mas parecidos de la biblioteca**")
+        continuum = st.checkbox("Remover el continuo", key="pixel_continuum")
+        index = library_index(continuum)
+        matches, angles = index.query(spectral_curve, k=min(3, len(index)))
+        st.dataframe(pd.DataFrame({
+            "Material": [index.names[i] for i in matches[0]],
+            "Ángulo espectral (grados)": np.rad2deg(angles[0]).round(2),
+        }), use_container_width=True)
+
     # Optional: Display HSI Metadata
     st.markdown("---")
     st.subheader("Descripcion")
@@ -95,20 +120,266 @@ def display_hsi_dashboard():
 
 
 
-def display_lidar_dashboard():
-    """Creates the LiDAR visualization and interaction section."""
-    st.header("🌲 Análisis de datos LiDAR (DSM)")
+def stretch(band):
+    """Linear 2-98% stretch of a single band to the 0-1 range for display."""
+    low, high = np.percentile(band, (2, 98))
+    return np.clip((band - low) / (high - low + 1e-12), 0, 1)
+
+
+@st.cache_data
+def compute_components(method, n_components=3):
+    """Fits PCA or MNF on the HSI cube and returns the projected component images."""
+    fit = hsi_analysis.fit_pca if method == "PCA" else hsi_analysis.fit_mnf
+    mean, components, eigenvalues = fit(HSI_DATA)
+    scores = hsi_analysis.project(HSI_DATA, mean, components, n_components)
+    return scores, eigenvalues
+
+
+def display_library_matching():
+    """Whole-image nearest-neighbour matching against the spectral library."""
+    continuum = st.checkbox("Remover el continuo", key="image_continuum")
+    max_angle = st.slider("Ángulo máximo (grados)", 1.0, 90.0, 15.0, key="library_angle")
+    index = library_index(continuum)
+    labels, angles, seconds = index.match_image(HSI_DATA, k=1, max_angle=np.deg2rad(max_angle))
+    labels, angles = labels[:, :, 0], angles[:, :, 0]
+
+    fig, axes = plt.subplots(1, 2, figsize=(12, 5))
+    axes[0].imshow(np.ma.masked_less(labels, 0), cmap="tab10", vmin=0, vmax=9)
+    axes[0].set_title("Material mas parecido (sin clase = blanco)")
+    cax = axes[1].imshow(np.rad2deg(angles), cmap="magma")
+    axes[1].set_title("Ángulo espectral (grados)")
+    fig.colorbar(cax, ax=axes[1])
+    st.pyplot(fig)
+    st.caption(f"{labels.size} pixeles contra {len(index)} espectros en {seconds * 1000:.0f} ms")
+
+    counts = np.bincount(labels.ravel() + 1, minlength=len(index) + 1)
+    st.dataframe(pd.DataFrame({
+        "Material": ["Sin clase"] + index.names,
+        "Píxeles": counts,
+        "Porcentaje (%)": 100 * counts / labels.size,
+    }), use_container_width=True)
+
+
+def display_spectral_analysis():
+    """Creates the SAM / PCA-MNF / band math section."""
+    st.header("🧪 Análisis espectral (SAM, PCA/MNF, álgebra de bandas)")
+
+    tab_sam, tab_pca, tab_math = st.tabs(["SAM", "PCA / MNF", "Álgebra de bandas"])
+    max_row, max_col, n_bands = HSI_DATA.shape
+
+    with tab_sam:
+        reference = st.radio("Referencias", ("Pixeles de la imagen", "Biblioteca espectral"), horizontal=True)
+        if reference == "Biblioteca espectral":
+            display_library_matching()
+        else:
+            st.markdown("Defina las clases de referencia a partir de píxeles de la imagen (fila, columna).")
+            library_df = st.data_editor(
+                pd.DataFrame({
+                    "Clase": ["Clase 1", "Clase 2", "Clase 3"],
+                    "Fila": [5, max_row // 2, max_row - 5],
+                    "Columna": [5, max_col // 2, max_col - 5],
+                }),
+                num_rows="dynamic",
+                use_container_width=True
+            )
+            max_angle = st.slider("Ángulo máximo (grados)", 1.0, 90.0, 15.0)
+
+            library_df = library_df.dropna()
+            rows_idx = library_df["Fila"].astype(int).clip(0, max_row - 1).to_numpy()
+            cols_idx = library_df["Columna"].astype(int).clip(0, max_col - 1).to_numpy()
+            if len(library_df) == 0:
+                st.warning("Agregue como minimo una clase.")
+            else:
+                library = HSI_DATA[rows_idx, cols_idx, :]
+                labels, angles = hsi_analysis.sam_classify(HSI_DATA, library, np.deg2rad(max_angle))
+
+                fig, axes = plt.subplots(1, 2, figsize=(12, 5))
+                cax = axes[0].imshow(np.ma.masked_less(labels, 0), cmap="tab10", vmin=0, vmax=9)
+                axes[0].set_title("Clasificacion SAM (sin clase = blanco)")
+                cax2 = axes[1].imshow(np.rad2deg(angles), cmap="magma")
+                axes[1].set_title("Ángulo espectral (grados)")
+                fig.colorbar(cax2, ax=axes[1])
+                st.pyplot(fig)
+
+                counts = np.bincount(labels.ravel() + 1, minlength=len(library_df) + 1)
+                st.dataframe(pd.DataFrame({
+                    "Clase": ["Sin clase"] + list(library_df["Clase"]),
+                    "Píxeles": counts,
+                    "Porcentaje (%)": 100 * counts / labels.size,
+                }), use_container_width=True)
+
+    with tab_pca:
+        method = st.radio("Transformacion", ("PCA", "MNF"), horizontal=True)
+        scores, eigenvalues = compute_components(method)
+        composite = np.dstack([stretch(scores[:, :, i]) for i in range(3)])
+
+        col1, col2 = st.columns(2)
+        with col1:
+            st.image(composite, caption=f"Compuesto {method} 1-2-3", use_column_width=True)
+        with col2:
+            fig, ax = plt.subplots(figsize=(8, 5))
+            ax.plot(np.arange(1, len(eigenvalues) + 1), eigenvalues, marker="o", ms=3)
+            ax.set_yscale("log")
+            ax.set_title("Varianza por componente" if method == "PCA" else "Relacion senal/ruido por componente")
+            ax.set_xlabel("Componente")
+            ax.grid(True, linestyle='--', alpha=0.6)
+            st.pyplot(fig)
+
+    with tab_math:
+        st.markdown(f"Use `b0` ... `b{n_bands - 1}` para las bandas, operadores `+ - * / **` "
+                    "y funciones `sqrt, log, exp, abs, minimum, maximum`.")
+        nir = hsi_analysis.nearest_band(WAVELENGTHS, 860)
+        red = hsi_analysis.nearest_band(WAVELENGTHS, 660)
+        expression = st.text_input("Expresion", f"(b{nir} - b{red}) / (b{nir} + b{red})")
+        try:
+            result = hsi_analysis.band_math(HSI_DATA, expression)
+        except (SyntaxError, ValueError) as e:
+            st.error(f"Expresion invalida: {e}")
+        else:
+            fig, ax = plt.subplots(figsize=(8, 6))
+            cax = ax.imshow(result, cmap="RdYlGn")
+            fig.colorbar(cax)
+            ax.set_title(expression)
+            st.pyplot(fig)
+
+
+@st.cache_data
+def grid_point_cloud(key, resolution, _source, suffix=".npy"):
+    """
+    Grids a point cloud (a file path or an upload, cached by the content key `key`)
+    into DSM, DTM and CHM (streamed in chunks). Uploads are written to a temporary
+    file only on a cache miss, and the file is removed once gridded.
+    """
+    if isinstance(_source, str):
+        grid = lidar_grid.grid_points(_source, resolution)
+    else:
+        with tempfile.NamedTemporaryFile(suffix=suffix, delete=False) as tmp:
+            tmp.write(_source.getbuffer())
+        try:
+            grid = lidar_grid.grid_points(tmp.name, resolution)
+        finally:
+            os.remove(tmp.name)
+    return grid.dsm(), grid.dtm(), grid.chm(), grid.density()
+
 
-     # Plot the LiDAR DSM as a heat map
+@st.cache_resource(show_spinner="Indexando la nube de puntos...")
+def point_cloud_index(key, _source):
+    """Chunk/bucket index of a point cloud, built once per content key and shared across reruns."""
+    return lidar_grid.ChunkIndex(_source)
+
+
+@st.cache_data(show_spinner="Recortando la nube de puntos...")
+def clip_point_cloud(key, window, _index):
+    """Points inside an (x_min, y_min, x_max, y_max) window and the number of chunks read."""
+    return _index.clip(*window), len(_index.candidate_chunks(*window))
+
+
+@st.cache_data
+def simulated_point_cloud_path():
+    """Writes the simulated point cloud to a temporary .npy file and returns its path."""
+    path = os.path.join(tempfile.mkdtemp(), "nube_simulada.npy")
+    np.save(path, lidar_grid.simulate_point_cloud())
+    return path
+
+
+def plot_grid(grid, title, cmap='viridis', label='Elevacion (m)'):
     fig, ax = plt.subplots(figsize=(10, 8))
-    # Use imshow for 2D visualization of the elevation data
-    cax = ax.imshow(LIDAR_DATA, cmap='viridis', origin='lower')
-    fig.colorbar(cax, label='Elevacion (m)') # Add a color bar for scale
-    ax.set_title("LiDAR DSM")
+    cax = ax.imshow(grid, cmap=cmap)
+    fig.colorbar(cax, label=label)
+    ax.set_title(title)
     ax.set_xlabel("Coordenada X  (Columna)")
     ax.set_ylabel("Coordenada Y (Fila)")
     st.pyplot(fig)
 
+
+def display_point_cloud():
+    """Grids an uploaded (or simulated) point cloud into DSM/DTM/CHM."""
+    uploaded = st.file_uploader("Cargue una nube de puntos", type=["las", "laz", "npy"])
+    resolution = st.slider("Resolucion de la grilla (m)", 0.5, 10.0, 1.0, step=0.5)
+
+    if uploaded is not None:
+        key, source = reprojection.image_hash(uploaded.getvalue()), uploaded
+        suffix = os.path.splitext(uploaded.name)[1]
+    else:
+        st.info("Sin archivo: se usa una nube de puntos simulada (terreno + arboles).")
+        source = simulated_point_cloud_path()
+        key, suffix = source, ".npy"
+
+    try:
+        dsm, dtm, chm, density = grid_point_cloud(key, resolution, source, suffix)
+    except (ImportError, ValueError) as e:
+        st.error(f"No se pudo leer la nube de puntos: {e}")
+        return
+
+    tab_dsm, tab_dtm, tab_chm, tab_density = st.tabs(["DSM", "DTM", "CHM", "Densidad"])
+    with tab_dsm:
+        plot_grid(dsm, "Modelo digital de superficie (DSM)")
+    with tab_dtm:
+        plot_grid(dtm, "Modelo digital de terreno (DTM)", cmap='terrain')
+    with tab_chm:
+        plot_grid(chm, "Modelo de altura del dosel (CHM)", cmap='Greens', label='Altura (m)')
+    with tab_density:
+        plot_grid(density, "Densidad de puntos", cmap='magma', label='Puntos / m2')
+
+    st.dataframe(pd.DataFrame({
+        "Producto": ["DSM", "DTM", "CHM"],
+        "Minimo": [np.nanmin(g) for g in (dsm, dtm, chm)],
+        "Maximo": [np.nanmax(g) for g in (dsm, dtm, chm)],
+        "Promedio": [np.nanmean(g) for g in (dsm, dtm, chm)],
+    }), use_container_width=True)
+
+    display_point_clip(key, source)
+
+
+def display_point_clip(key, source):
+    """Clips the point cloud to a window, re-reading only the chunks that touch it."""
+    st.subheader("Recorte de la nube de puntos")
+    index = point_cloud_index(key, source)
+    b = index.buckets
+    c1, c2 = st.columns(2)
+    x_range = c1.slider("Rango X", float(b.x_min), float(b.x_max), (float(b.x_min), float(b.x_max)))
+    y_range = c2.slider("Rango Y", float(b.y_min), float(b.y_max), (float(b.y_min), float(b.y_max)))
+    points, chunks_read = clip_point_cloud(key, (x_range[0], y_range[0], x_range[1], y_range[1]), index)
+
+    c1, c2 = st.columns(2)
+    c1.metric("Puntos en el recorte", f"{len(points):,}")
+    c2.metric("Bloques leidos", f"{chunks_read} / {len(index.occupancy)}")
+    if len(points) == 0:
+        st.warning("El recorte no contiene puntos")
+        return
+
+    sample = points[::max(1, len(points) // 20000)]  # at most ~20k points in the plot
+    fig, ax = plt.subplots(figsize=(10, 8))
+    cax = ax.scatter(sample["x"], sample["y"], c=sample["z"], s=1, cmap='viridis')
+    fig.colorbar(cax, label='Elevacion (m)')
+    ax.set_aspect("equal")
+    ax.set_title("Puntos del recorte")
+    st.pyplot(fig)
+
+    buffer = io.BytesIO()
+    np.save(buffer, points)
+    st.download_button("Descargar recorte (.npy)", buffer.getvalue(), file_name="recorte.npy")
+
+
+def display_lidar_dashboard():
+    """Creates the LiDAR visualization and interaction section."""
+    st.header("🌲 Análisis de datos LiDAR (DSM)")
+
+    source = st.radio("Fuente", ("DSM simulado", "Nube de puntos (LAS/LAZ/NPY)"), horizontal=True)
+
+    if source == "DSM simulado":
+        # Plot the LiDAR DSM as a heat map
+        fig, ax = plt.subplots(figsize=(10, 8))
+        # Use imshow for 2D visualization of the elevation data
+        cax = ax.imshow(LIDAR_DATA, cmap='viridis', origin='lower')
+        fig.colorbar(cax, label='Elevacion (m)') # Add a color bar for scale
+        ax.set_title("LiDAR DSM")
+        ax.set_xlabel("Coordenada X  (Columna)")
+        ax.set_ylabel("Coordenada Y (Fila)")
+        st.pyplot(fig)
+    else:
+        display_point_cloud()
+
     # Optional: Simple LiDAR statistics
     st.markdown("---")
     st.subheader("Descripcion")
@@ -126,11 +397,13 @@ def main():
     # Create radio buttons in the sidebar for navigation
     selected_view = st.sidebar.radio(
         "Escoja un conjunto de datos:",
-        ("Datos Hiperespectrales", "Datos LiDAR")
+        ("Datos Hiperespectrales", "Análisis espectral", "Datos LiDAR")
     )
 
     if selected_view == "Datos Hiperespectrales":
         display_hsi_dashboard()
+    elif selected_view == "Análisis espectral":
+        display_spectral_analysis()
     elif selected_view == "Datos LiDAR":
         display_lidar_dashboard()
 
@@ -0,0 +1,239 @@
+import os
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+
+import numpy as np
+from rasterio.windows import Window
+
+import composites
+import spectral_indices
+
+try:
+    from sklearn.ensemble import RandomForestClassifier  # Optional: only for the random forest
+except ImportError:
+    RandomForestClassifier = None
+
+# Pixel-level land-cover classification. Features are the surface reflectance of
+# the optical bands present in the stack plus spectral indices computed from them.
+# Training pixels come from labelled rectangles (or points); the whole scene is
+# then read in row tiles and each tile is classified as one (pixels, features)
+# batch, so prediction is a few matrix products per tile. Tiles are classified in
+# this process by default: for the linear models pickling a tile costs more than
+# predicting it. A process pool is opt-in (e.g. for the random forest); it only
+# holds a few tiles in flight, so memory does not grow with the scene size.
+
+CLASSES = ("Bosque", "Urbano", "Agricultura", "Agua", "Arido")
+CLASS_COLORS = {
+    "Bosque": (34, 120, 50),
+    "Urbano": (200, 40, 40),
+    "Agricultura": (230, 200, 60),
+    "Agua": (40, 90, 220),
+    "Arido": (190, 150, 100),
+}
+MODELS = ("Distancia minima", "Maxima verosimilitud", "Random forest")
+FEATURE_BANDS = ("blue", "green", "red", "nir", "swir1", "swir2")
+FEATURE_INDICES = ("NDVI", "NDWI", "NDBI")
+NODATA = 255
+TILE_ROWS = 256
+PENDING_PER_WORKER = 2  # tiles in flight per pool worker
+
+
+# --- Models ---
+
+class MinimumDistance:
+    """Assigns each pixel to the class with the nearest mean (Euclidean)."""
+
+    def fit(self, X, y):
+        self.classes_ = np.unique(y)
+        self.means_ = np.stack([X[y == c].mean(axis=0) for c in self.classes_]).astype(np.float32)
+        return self
+
+    def predict(self, X):
+        # ||x - mu||² = ||x||² - 2 x·mu + ||mu||²; ||x||² does not change the argmin
+        scores = X @ (2 * self.means_.T) - (self.means_ ** 2).sum(axis=1)
+        return self.classes_[np.argmax(scores, axis=1)]
+
+
+class MaximumLikelihood:
+    """Gaussian maximum-likelihood classifier with per-class covariances."""
+
+    def __init__(self, regularization=1e-6):
+        self.regularization = regularization
+
+    def fit(self, X, y):
+        self.classes_ = np.unique(y)
+        n_features = X.shape[1]
+        self.means_, self.precisions_, self.offsets_ = [], [], []
+        for c in self.classes_:
+            samples = X[y == c].astype(np.float64)
+            if len(samples) <= n_features:
+                raise ValueError(f"La clase {c} necesita mas de {n_features} pixeles de entrenamiento")
+            cov = np.cov(samples, rowvar=False)
+            cov += np.eye(n_features) * self.regularization * np.trace(cov) / n_features
+            _, logdet = np.linalg.slogdet(cov)
+            self.means_.append(samples.mean(axis=0))
+            self.precisions_.append(np.linalg.inv(cov))
+            self.offsets_.append(-0.5 * logdet + np.log(len(samples) / len(X)))
+        return self
+
+    def predict(self, X):
+        X = X.astype(np.float64)
+        scores = np.empty((len(X), len(self.classes_)))
+        for k, (mean, precision, offset) in enumerate(zip(self.means_, self.precisions_, self.offsets_)):
+            centred = X - mean
+            scores[:, k] = offset - 0.5 * np.einsum("ij,ij->i", centred @ precision, centred)
+        return self.classes_[np.argmax(scores, axis=1)]
+
+
+def make_model(name):
+    """Returns an unfitted classifier for one of MODELS."""
+    if name == "Distancia minima":
+        return MinimumDistance()
+    if name == "Maxima verosimilitud":
+        return MaximumLikelihood()
+    if name == "Random forest":
+        if RandomForestClassifier is None:
+            raise ImportError("Se requiere 'scikit-learn' para el random forest")
+        # One thread per model: the parallelism comes from the tile pool (workers > 1)
+        return RandomForestClassifier(n_estimators=100, max_depth=16, n_jobs=1, random_state=0)
+    raise ValueError(f"Modelo desconocido: {name} (use {', '.join(MODELS)})")
+
+
+# --- Features ---
+
+class FeatureReader:
+    """Reads (features, rows, cols) blocks of reflectance bands and indices from a stack."""
+
+    def __init__(self, source, sensor):
+        info = composites.band_info(source)
+        self.source, self.width, self.height = source, info["width"], info["height"]
+        self.transform, self.crs = info["transform"], info["crs"]
+        self.scale = spectral_indices.REFLECTANCE[sensor]
+
+        self.bands, self.indexes = [], []
+        for name in FEATURE_BANDS:
+            try:
+                self.indexes.append(composites.band_index(info, sensor, name))
+                self.bands.append(name)
+            except (ValueError, KeyError):
+                continue
+        if not self.bands:
+            raise ValueError("El archivo no tiene bandas opticas reconocibles")
+        index_names = [n for n in spectral_indices.available_indices(self.bands) if n in FEATURE_INDICES]
+        self.program = spectral_indices.compile_indices(index_names) if index_names else None
+        self.names = self.bands + index_names
+
+    def read(self, window, src=None):
+        """Returns the float32 features of a window and its valid-pixel mask."""
+        if src is None:
+            with composites.open_raster(self.source) as src:
+                return self.read(window, src)
+        raw = src.read(self.indexes, window=window)
+        valid = (raw != 0).all(axis=0)
+        features = np.empty((len(self.names), *raw.shape[1:]), dtype=np.float32)
+        np.multiply(raw, self.scale[0], out=features[:len(self.bands)], casting="unsafe")
+        features[:len(self.bands)] += self.scale[1]
+        if self.program is not None:
+            band_tiles = [features[self.bands.index(b)] for b in self.program.bands]
+            out = {name: features[len(self.bands) + i] for i, name in enumerate(self.program.names)}
+            self.program.run(band_tiles, out)
+        features[~np.isfinite(features)] = 0
+        return features, valid
+
+
+def training_samples(reader, regions):
+    """
+    Collects (X, y) training pixels from labelled regions.
+
+    Each region is (class, col0, row0, col1, row1) in pixels of the scene; a point is a
+    region with col0 == col1 and row0 == row1.
+    """
+    X, y = [], []
+    with composites.open_raster(reader.source) as src:
+        for label, col0, row0, col1, row1 in regions:
+            col0, col1 = sorted((int(col0), int(col1)))
+            row0, row1 = sorted((int(row0), int(row1)))
+            col0, row0 = max(col0, 0), max(row0, 0)
+            col1, row1 = min(col1, reader.width - 1), min(row1, reader.height - 1)
+            if col1 < col0 or row1 < row0:
+                continue
+            features, valid = reader.read(Window(col0, row0, col1 - col0 + 1, row1 - row0 + 1), src)
+            pixels = features[:, valid].T
+            X.append(pixels)
+            y.extend([label] * len(pixels))
+    if not X or len(set(y)) < 2:
+        raise ValueError("Se necesitan muestras de al menos dos clases")
+    return np.concatenate(X), np.asarray(y)
+
+
+# --- Prediction ---
+
+_worker_model = None
+
+
+def _init_worker(model):
+    global _worker_model
+    _worker_model = model
+
+
+def _predict_tile(args):
+    features, valid = args
+    labels = np.full(valid.shape, NODATA, dtype=np.uint8)
+    if valid.any():
+        labels[valid] = _worker_model.predict(features[:, valid].T)
+    return labels
+
+
+def classify(reader, model, workers=1, tile_rows=TILE_ROWS):
+    """
+    Predicts the class code of every pixel, tile by tile.
+
+    The model must be fitted with integer class codes (< 255). Tiles are read and
+    classified in this process by default; `workers` > 1 (None: all CPUs) classifies
+    them in a process pool with at most PENDING_PER_WORKER tiles per worker in flight.
+    Returns (labels uint8 with NODATA outside the image, seconds).
+    """
+    workers = workers or os.cpu_count() or 1
+    labels = np.empty((reader.height, reader.width), dtype=np.uint8)
+
+    start = time.perf_counter()
+    with composites.open_raster(reader.source) as src:
+        tiles = ((row, reader.read(Window(0, row, reader.width, min(tile_rows, reader.height - row)), src))
+                 for row in range(0, reader.height, tile_rows))
+        if workers > 1:
+            with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                                     initargs=(model,)) as pool:
+                pending = {}
+                for row, tile in tiles:
+                    pending[pool.submit(_predict_tile, tile)] = row
+                    if len(pending) >= PENDING_PER_WORKER * workers:
+                        done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                        for future in done:
+                            row = pending.pop(future)
+                            labels[row:row + tile_rows] = future.result()
+                for future, row in pending.items():
+                    labels[row:row + tile_rows] = future.result()
+        else:
+            _init_worker(model)
+            for row, tile in tiles:
+                labels[row:row + tile_rows] = _predict_tile(tile)
+    return labels, time.perf_counter() - start
+
+
+def class_areas(labels, classes, transform=None):
+    """Returns a list of (class, pixels, hectares, %) for the classified (non-NODATA) pixels."""
+    counts = np.bincount(labels.ravel(), minlength=256)
+    total = max(int(counts[:NODATA].sum()), 1)
+    pixel_area = abs(transform.a * transform.e - transform.b * transform.d) if transform else 0.0
+    return [
+        (name, int(counts[code]), float(counts[code] * pixel_area / 1e4), 100.0 * float(counts[code]) / total)
+        for code, name in enumerate(classes)
+    ]
+
+
+def colorize_labels(labels, classes):
+    """Returns an RGB uint8 image of a label map (NODATA is black)."""
+    lut = np.zeros((256, 3), dtype=np.uint8)
+    for code, name in enumerate(classes):
+        lut[code] = CLASS_COLORS.get(name, (128, 128, 128))
+    return lut[labels]
@@ -0,0 +1,253 @@
+import os
+
+import numpy as np
+
+try:
+    import laspy  # Optional: only needed for .las/.laz files
+except ImportError:
+    laspy = None
+
+# Point records are handled as NumPy structured arrays with this layout. LAS/LAZ
+# files are converted chunk by chunk; .npy files with these fields are read
+# through a memory map so that 100M points never sit in RAM at once.
+POINT_DTYPE = np.dtype([
+    ("x", "f8"),
+    ("y", "f8"),
+    ("z", "f4"),
+    ("classification", "u1"),
+])
+
+GROUND_CLASS = 2  # ASPRS class code for ground
+CHUNK_SIZE = 2_000_000
+
+
+# --- Reading ---
+
+def _from_las_chunk(chunk):
+    out = np.empty(len(chunk), dtype=POINT_DTYPE)
+    out["x"] = chunk.x
+    out["y"] = chunk.y
+    out["z"] = chunk.z
+    out["classification"] = chunk.classification
+    return out
+
+
+def _is_las(source):
+    name = source if isinstance(source, (str, os.PathLike)) else getattr(source, "name", "")
+    return str(name).lower().endswith((".las", ".laz"))
+
+
+def iter_points(source, chunk_size=CHUNK_SIZE):
+    """
+    Yields structured point chunks (POINT_DTYPE) from a LAS/LAZ file, a .npy file
+    with the same fields, an uploaded file object, or an in-memory structured array.
+    File objects are rewound and left open, so a source can be read several times.
+    """
+    if isinstance(source, np.ndarray):
+        for i in range(0, len(source), chunk_size):
+            yield source[i:i + chunk_size]
+        return
+
+    is_path = isinstance(source, (str, os.PathLike))
+    if not is_path:
+        source.seek(0)
+    if _is_las(source):
+        if laspy is None:
+            raise ImportError("Se requiere 'laspy' para leer archivos LAS/LAZ")
+        with laspy.open(source, closefd=is_path) as reader:
+            for chunk in reader.chunk_iterator(chunk_size):
+                yield _from_las_chunk(chunk)
+        return
+
+    if is_path:
+        points = np.load(source, mmap_mode="r")
+    else:
+        points = np.load(source)
+    missing = set(POINT_DTYPE.names) - set(points.dtype.names or ())
+    if missing:
+        raise ValueError(f"Faltan los campos {sorted(missing)} en la nube de puntos")
+    for i in range(0, len(points), chunk_size):
+        yield np.asarray(points[i:i + chunk_size])
+
+
+def scan_bounds(source, chunk_size=CHUNK_SIZE):
+    """Returns (x_min, y_min, x_max, y_max, n_points), from the header when the file has one."""
+    if _is_las(source) and laspy is not None:
+        is_path = isinstance(source, (str, os.PathLike))
+        if not is_path:
+            source.seek(0)
+        with laspy.open(source, closefd=is_path) as reader:
+            header = reader.header
+            return (*header.mins[:2], *header.maxs[:2], header.point_count)
+
+    x_min = y_min = np.inf
+    x_max = y_max = -np.inf
+    n = 0
+    for chunk in iter_points(source, chunk_size):
+        if len(chunk) == 0:
+            continue
+        x_min = min(x_min, chunk["x"].min())
+        y_min = min(y_min, chunk["y"].min())
+        x_max = max(x_max, chunk["x"].max())
+        y_max = max(y_max, chunk["y"].max())
+        n += len(chunk)
+    return x_min, y_min, x_max, y_max, n
+
+
+# --- Gridding ---
+
+class GridAccumulator:
+    """
+    Bins streamed points into DSM (max z), DTM (min z of ground points) and density grids.
+
+    Rows run north to south so the grids can be written with the affine transform
+    returned by `transform()`.
+    """
+
+    def __init__(self, bounds, resolution):
+        self.x_min, self.y_min, self.x_max, self.y_max = bounds[:4]
+        self.resolution = float(resolution)
+        self.width = max(1, int(np.ceil((self.x_max - self.x_min) / self.resolution)))
+        self.height = max(1, int(np.ceil((self.y_max - self.y_min) / self.resolution)))
+
+        size = self.width * self.height
+        self._dsm = np.full(size, -np.inf, dtype=np.float32)
+        self._dtm = np.full(size, np.inf, dtype=np.float32)
+        self._count = np.zeros(size, dtype=np.int64)
+
+    def transform(self):
+        """Returns the (a, b, c, d, e, f) affine coefficients of the grid (rasterio order)."""
+        return (self.resolution, 0.0, self.x_min, 0.0, -self.resolution, self.y_max)
+
+    def cell_index(self, x, y):
+        """Returns the flat cell index of each point, or -1 when it falls outside the grid."""
+        col = np.floor((x - self.x_min) / self.resolution).astype(np.int64)
+        row = np.floor((self.y_max - y) / self.resolution).astype(np.int64)
+        # Points exactly on the east/south edge belong to the last cell
+        col[(col == self.width) & (x <= self.x_min + self.width * self.resolution)] = self.width - 1
+        row[(row == self.height) & (y >= self.y_max - self.height * self.resolution)] = self.height - 1
+        inside = (col >= 0) & (col < self.width) & (row >= 0) & (row < self.height)
+        return np.where(inside, row * self.width + col, -1)
+
+    def add(self, chunk):
+        """Accumulates one chunk of structured points."""
+        idx = self.cell_index(chunk["x"], chunk["y"])
+        keep = idx >= 0
+        idx = idx[keep]
+        z = chunk["z"][keep].astype(np.float32)
+
+        self._count += np.bincount(idx, minlength=self._count.size)
+        np.maximum.at(self._dsm, idx, z)
+
+        ground = chunk["classification"][keep] == GROUND_CLASS
+        np.minimum.at(self._dtm, idx[ground], z[ground])
+
+    def dsm(self):
+        out = self._dsm.reshape(self.height, self.width).copy()
+        out[~np.isfinite(out)] = np.nan
+        return out
+
+    def dtm(self):
+        out = self._dtm.reshape(self.height, self.width).copy()
+        out[~np.isfinite(out)] = np.nan
+        return out
+
+    def chm(self):
+        """Canopy height model (DSM - DTM), clipped at zero."""
+        return np.clip(self.dsm() - self.dtm(), 0, None)
+
+    def density(self):
+        """Points per square metre (or per squared map unit)."""
+        return self._count.reshape(self.height, self.width) / self.resolution ** 2
+
+
+def grid_points(source, resolution, bounds=None, chunk_size=CHUNK_SIZE):
+    """Streams a point source into a GridAccumulator and returns it."""
+    if bounds is None:
+        bounds = scan_bounds(source, chunk_size)
+    grid = GridAccumulator(bounds, resolution)
+    for chunk in iter_points(source, chunk_size):
+        grid.add(chunk)
+    return grid
+
+
+# --- Spatial index ---
+
+class ChunkIndex:
+    """
+    Grid-bucket index that records which chunks touch which buckets.
+
+    Only a (n_chunks, ny, nx) boolean occupancy table is kept in memory, so the index
+    of a 100M point file is a few kilobytes. `clip` re-reads only the chunks that
+    intersect the query window.
+    """
+
+    def __init__(self, source, buckets=64, bounds=None, chunk_size=CHUNK_SIZE):
+        if bounds is None:
+            bounds = scan_bounds(source, chunk_size)
+        self.source = source
+        self.chunk_size = chunk_size
+        self.buckets = GridAccumulator(
+            bounds, max(bounds[2] - bounds[0], bounds[3] - bounds[1]) / buckets or 1.0
+        )
+
+        occupancy = []
+        for chunk in iter_points(source, chunk_size):
+            cells = self.buckets.cell_index(chunk["x"], chunk["y"])
+            used = np.zeros(self.buckets.width * self.buckets.height, dtype=bool)
+            used[cells[cells >= 0]] = True
+            occupancy.append(used.reshape(self.buckets.height, self.buckets.width))
+        self.occupancy = np.array(occupancy)
+
+    def _window(self, x_min, y_min, x_max, y_max):
+        b = self.buckets
+        c0 = int(np.clip(np.floor((x_min - b.x_min) / b.resolution), 0, b.width - 1))
+        c1 = int(np.clip(np.floor((x_max - b.x_min) / b.resolution), 0, b.width - 1))
+        r0 = int(np.clip(np.floor((b.y_max - y_max) / b.resolution), 0, b.height - 1))
+        r1 = int(np.clip(np.floor((b.y_max - y_min) / b.resolution), 0, b.height - 1))
+        return slice(r0, r1 + 1), slice(c0, c1 + 1)
+
+    def candidate_chunks(self, x_min, y_min, x_max, y_max):
+        """Returns the indices of the chunks that may contain points inside the window."""
+        rows, cols = self._window(x_min, y_min, x_max, y_max)
+        return np.flatnonzero(self.occupancy[:, rows, cols].any(axis=(1, 2)))
+
+    def clip(self, x_min, y_min, x_max, y_max):
+        """Returns the points inside the window as one structured array."""
+        wanted = set(self.candidate_chunks(x_min, y_min, x_max, y_max).tolist())
+        parts = []
+        for i, chunk in enumerate(iter_points(self.source, self.chunk_size)):
+            if i not in wanted:
+                continue
+            inside = ((chunk["x"] >= x_min) & (chunk["x"] <= x_max)
+                      & (chunk["y"] >= y_min) & (chunk["y"] <= y_max))
+            parts.append(chunk[inside])
+        if not parts:
+            return np.empty(0, dtype=POINT_DTYPE)
+        return np.concatenate(parts)
+
+
+# --- Synthetic data ---
+
+def simulate_point_cloud(n_points=500_000, size=100.0, seed=0):
+    """Simulates a classified point cloud: a Gaussian hill (ground) with scattered trees."""
+    rng = np.random.default_rng(seed)
+    points = np.empty(n_points, dtype=POINT_DTYPE)
+    points["x"] = rng.uniform(0, size, n_points)
+    points["y"] = rng.uniform(0, size, n_points)
+
+    u = (points["x"] / size - 0.5) * 4
+    v = (points["y"] / size - 0.5) * 4
+    ground = 100 * np.exp(-(u ** 2 + v ** 2) / 1.5)
+
+    trees = rng.uniform(0, size, (40, 2))
+    canopy = np.zeros(n_points)
+    for tx, ty in trees:
+        r2 = (points["x"] - tx) ** 2 + (points["y"] - ty) ** 2
+        canopy = np.maximum(canopy, 15 * np.exp(-r2 / 8.0))
+
+    # Points under the canopy hit vegetation with a probability that grows with height
+    is_veg = rng.random(n_points) < canopy / 15
+    points["z"] = ground + np.where(is_veg, canopy * rng.uniform(0.3, 1.0, n_points), 0)
+    points["classification"] = np.where(is_veg, 5, GROUND_CLASS)  # 5 = high vegetation
+    return points
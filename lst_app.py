@@ -3,6 +3,16 @@ import rasterio
 import numpy as np
 import matplotlib.pyplot as plt
 from pylandtemp import split_window
+from streamlit_folium import folium_static
+
+import app_cache
+import atmospheric_correction
+import emissivity
+import radiometry
+import reprojection
+import spectral_indices
+import thermal
+import tile_server
 
 st.set_page_config(layout="wide")
 
@@ -14,6 +24,16 @@ Se calculara:
 - LST (°C)
 """)
 
+
+@st.cache_data(show_spinner="Corrigiendo la atmosfera...")
+def corrected_band(file_key, name, method, settings, _file):
+    """Surface reflectance of one Level-1 band (0 = no data), cached per file content and correction settings."""
+    corrected, _ = atmospheric_correction.correct_raster(
+        _file, "Landsat 8/9", [name], method, indexes=[1], **dict(settings)
+    )
+    return np.nan_to_num(corrected[name], nan=0.0)
+
+
 # Upload files
 col1, col2 = st.columns(2)
 col3, col4 = st.columns(2)
@@ -30,11 +50,14 @@ with col3:
 with col4:
     thermal_file11 = st.file_uploader("Cargar Banda 11 (SWIR11)", type=["tif"])
 
+mtl_file = st.file_uploader("Metadatos MTL (opcional, constantes K1/K2 de la escena)", type=["txt"])
+
 if red_file and nir_file and thermal_file10 and thermal_file11:
 
     # Read bands
     with rasterio.open(red_file) as src:
         redImage = src.read(1).astype('f4')
+        transform, crs = src.transform, src.crs
 
     with rasterio.open(nir_file) as src:
         nirImage = src.read(1).astype('f4')
@@ -46,6 +69,31 @@ if red_file and nir_file and thermal_file10 and thermal_file11:
         tempImage11 = src.read(1).astype('f4')
 
     st.success("Bandas Roja, Infrarroja, SWIR10 y SWIR11 cargadas bien!")
+
+    # --- Atmospheric correction of the red / NIR DNs ---
+    mtl_text = mtl_file.getvalue().decode("utf-8", errors="ignore") if mtl_file else ""
+    st.subheader("Correccion atmosferica (Rojo / NIR)")
+    c1, c2, c3 = st.columns(3)
+    correction = c1.selectbox(
+        "Metodo", ["Ninguna", "DOS", "LUT"],
+        format_func={"Ninguna": "Ninguna (DN / reflectancia L2)", "DOS": "Sustraccion de objeto oscuro (DOS)",
+                     "LUT": "Tabla de dispersion (Rayleigh + aerosol)"}.get
+    )
+    mtl_zenith = atmospheric_correction.sun_zenith_from_mtl(mtl_text)
+    sun_zenith = c2.slider("Angulo cenital solar (°)", 0.0, 80.0, round(mtl_zenith or 30.0, 1), step=0.1,
+                           disabled=correction == "Ninguna", help="Se toma de SUN_ELEVATION si se carga el MTL")
+    aod550 = c3.slider("AOD a 550 nm", 0.0, 1.5, 0.15, step=0.01, disabled=correction != "LUT")
+    if correction != "Ninguna":
+        settings = (("sun_zenith", sun_zenith),)
+        if correction == "LUT":
+            settings += (("aod550", aod550),)
+        reflectance = {
+            name: corrected_band(reprojection.image_hash(band_file.getvalue()), name, correction, settings, band_file)
+            for band_file, name in ((red_file, "red"), (nir_file, "nir"))
+        }
+        redImage, nirImage = reflectance["red"], reflectance["nir"]
+        st.caption(f"Reflectancia de superficie media: rojo {redImage[redImage != 0].mean():.3f}, "
+                   f"NIR {nirImage[nirImage != 0].mean():.3f}")
     
     option = st.selectbox(
     "Escoja un metodo:",
@@ -65,7 +113,7 @@ if red_file and nir_file and thermal_file10 and thermal_file11:
     lst_celsius = lst_image_split_window - 273.15
     
     # --- NDVI ---
-    ndvi = (nirImage - redImage) / (nirImage + redImage + 1e-6)
+    ndvi = spectral_indices.evaluate({"red": redImage, "nir": nirImage}, ["NDVI"])["NDVI"]
 
     # --- Visualization ---
     st.subheader("Resultados")
@@ -86,6 +134,64 @@ if red_file and nir_file and thermal_file10 and thermal_file11:
         plt.colorbar(im, ax=ax)
         st.pyplot(fig)        
  
+    # --- Brightness temperature (inverse Planck) ---
+    st.subheader("Temperatura de brillo (techo de la atmosfera)")
+    bt_method = st.radio("Inversion", ["K1K2", "LUT"], horizontal=True,
+                         format_func=lambda m: "Constantes K1/K2" if m == "K1K2" else "Tabla de Planck integrada en la banda")
+    col1, col2 = st.columns(2)
+    for col, band_file, band in ((col1, thermal_file10, "B10"), (col2, thermal_file11, "B11")):
+        bt_kelvin, _, _ = thermal.brightness_temperature_raster(
+            band_file, band, radiometry.parse_mtl(mtl_text, band), bt_method
+        )
+        with col:
+            fig, ax = plt.subplots()
+            im = ax.imshow(bt_kelvin - 273.15, cmap="inferno")
+            ax.set_title(f"Temperatura de brillo {band} (°C)")
+            plt.colorbar(im, ax=ax)
+            st.pyplot(fig)
+            st.metric(f"Promedio {band} (°C)", f"{np.nanmean(bt_kelvin) - 273.15:.2f}")
+
+    # --- Emissivity-aware synthetic thermal scene ---
+    with st.expander("Escena termica sintetica (efecto de la emisividad)"):
+        st.markdown("Cada pixel recibe un material segun el NDVI y se simula la radiancia de la banda 10 "
+                    "a partir de la LST; la temperatura de brillo resultante muestra cuanto la subestima "
+                    "un sensor que supone cuerpo negro.")
+        library = emissivity.default_library()
+        ndvi_classes = [(-np.inf, "Agua"), (0.0, "Suelo arcilloso"), (0.2, "Suelo arenoso"), (0.5, "Vegetacion")]
+        material_map = np.zeros(ndvi.shape, dtype=np.int64)
+        for lower, name in ndvi_classes:
+            material_map[np.nan_to_num(ndvi, nan=-1) >= lower] = library.index(name)
+        simulated = emissivity.scene_radiance(material_map, np.asarray(lst_celsius) + 273.15, "Landsat 8/9 B10")
+        simulated_bt = radiometry.band_brightness_temperature(simulated, "Landsat 8/9 B10")
+
+        fig, ax = plt.subplots()
+        im = ax.imshow(simulated_bt - (np.asarray(lst_celsius) + 273.15), cmap="coolwarm_r")
+        ax.set_title("Temperatura de brillo - LST (K)")
+        plt.colorbar(im, ax=ax)
+        st.pyplot(fig)
+
+    # --- Interactive map (tiles served on demand) ---
+    if crs is not None:
+        st.subheader("Mapa interactivo")
+        ndvi_layer = tile_server.register_layer("NDVI", ndvi, transform, crs.to_string(), cmap="RdYlGn", vmin=-1, vmax=1)
+        lst_layer = tile_server.register_layer("LST", lst_celsius, transform, crs.to_string(), cmap="viridis")
+        folium_static(tile_server.folium_map([(ndvi_layer, "NDVI"), (lst_layer, "LST (°C)")]), width=1100)
+
+    # --- Export ---
+    crs_wkt = crs.to_wkt() if crs is not None else None
+    ndvi_f4, lst_f4 = ndvi.astype('f4'), np.asarray(lst_celsius, dtype='f4')
+    col1, col2 = st.columns(2)
+    col1.download_button(
+        "Descargar NDVI (COG)",
+        app_cache.cog_download(ndvi_f4, transform, crs_wkt),
+        file_name="ndvi_cog.tif", mime="image/tiff"
+    )
+    col2.download_button(
+        "Descargar LST °C (COG)",
+        app_cache.cog_download(lst_f4, transform, crs_wkt, nodata=np.nan),
+        file_name="lst_cog.tif", mime="image/tiff"
+    )
+
     # --- Stats ---
     st.subheader("Estadisticas descriptivas")
 
@@ -1,45 +1,195 @@
 import streamlit as st
-from PIL import Image
 import numpy as np
-import tifffile as tiff
 import io
+import cv2
+from rasterio.windows import Window
 
-def load_rs_image(uploaded_file):
+import atmospheric_correction
+import change_detection
+import cog_export
+import composites
+import display_stretch
+import landcover
+import pansharpen
+import reprojection
+import sensor_catalog
+import spectral_indices
+import tile_server
+
+def select_bands(uploaded_file, sensor, composite, label):
+    """
+    Resolves the (R, G, B) band indexes of the chosen composite from the band
+    descriptions (or the sensor's stack order) and lets the user override them.
+    """
+    info = composites.band_info(uploaded_file)
+    try:
+        default = composites.composite_indexes(info, sensor, composite)
+    except ValueError as e:
+        st.sidebar.warning(f"{label}: {e}. Se usan las primeras bandas.")
+        default = tuple(min(i, info["count"]) for i in (1, 2, 3))
+
+    with st.sidebar.expander(f"Bandas {label} ({info['count']} bandas)"):
+        names = [d or f"Banda {i + 1}" for i, d in enumerate(info["raw_descriptions"])]
+        options = list(range(1, info["count"] + 1))
+        fmt = lambda i: f"{i}: {names[i - 1]}"
+        r = st.selectbox("R", options, index=default[0] - 1, format_func=fmt, key=f"{label}_r")
+        g = st.selectbox("G", options, index=default[1] - 1, format_func=fmt, key=f"{label}_g")
+        b = st.selectbox("B", options, index=default[2] - 1, format_func=fmt, key=f"{label}_b")
+    return r, g, b
+
+
+def load_rs_image(uploaded_file, bands, stretch="lineal", low=2.0, high=98.0, gamma=1.0):
+    """
+    Reads only the selected (R, G, B) bands of a TIFF/GeoTIFF with rasterio and
+    stretches them to a uint8 array for display.
+    """
+    img_array = composites.read_bands(uploaded_file, bands)
+
+    # Per-band percentile stretch straight to uint8 (vital for Landsat 16-bit data,
+    # where a single hot pixel would wash out a min-max normalization)
+    return display_stretch.stretch_image(img_array, stretch, low, high, gamma)
+
+
+@st.cache_data(show_spinner=False)
+def rs_image(file_key, bands, stretch, low, high, gamma, _file):
+    """load_rs_image cached per file content, bands and stretch (each call returns a fresh copy)."""
+    return load_rs_image(_file, bands, stretch, low, high, gamma)
+
+
+@st.cache_data(show_spinner="Corregistrando imagenes...")
+def warped_pair(l_key, s_key, bands_l, bands_s, resolution, _l_file, _s_file):
+    """
+    Resamples both scenes once onto a common grid (CRS of the Landsat image, extent of
+    the overlap, 10 m or 30 m pixels) and returns the aligned (h, w, 3) band values,
+    plus whether georeferencing was used. Cached per file content, bands and grid only,
+    so changing the display stretch never re-warps the scenes.
+    """
+    info_l = composites.band_info(_l_file)
+    info_s = composites.band_info(_s_file)
+    if info_l["crs"] is None or info_s["crs"] is None:
+        # No georeferencing: fall back to matching the Landsat pixel size
+        img_l = composites.read_bands(_l_file, bands_l)
+        img_s = composites.read_bands(_s_file, bands_s)
+        if img_s.dtype not in (np.uint8, np.uint16, np.int16, np.float32):  # dtypes cv2.resize accepts
+            img_s = img_s.astype(np.float32)
+        img_s = cv2.resize(img_s, (img_l.shape[1], img_l.shape[0]), interpolation=cv2.INTER_AREA)
+        return img_l, img_s, False
+
+    grid = reprojection.common_grid(
+        (info_l["crs"], info_l["transform"], info_l["width"], info_l["height"]),
+        (info_s["crs"], info_s["transform"], info_s["width"], info_s["height"]),
+        resolution
+    )
+    aligned = []
+    for uploaded_file, bands, info in ((_l_file, bands_l, info_l), (_s_file, bands_s, info_s)):
+        data = np.ascontiguousarray(reprojection.to_bands_first(composites.read_bands(uploaded_file, bands)))
+        warped = reprojection.warp_to_grid(data, info["transform"], info["crs"], grid)
+        aligned.append(np.moveaxis(warped, 0, -1))
+    return aligned[0], aligned[1], True
+
+
+@st.cache_data(show_spinner=False)
+def aligned_pair(l_key, s_key, bands_l, bands_s, resolution, stretch, low, high, gamma, _l_file, _s_file):
+    """
+    Both scenes on the common grid as uint8 RGB for the swipe: the cached warp
+    followed by the (cheap) per-band display stretch. Returns (Landsat, Sentinel,
+    georeferenced).
+    """
+    img_l, img_s, georeferenced = warped_pair(l_key, s_key, bands_l, bands_s, resolution, _l_file, _s_file)
+    return (display_stretch.stretch_image(img_l, stretch, low, high, gamma),
+            display_stretch.stretch_image(img_s, stretch, low, high, gamma), georeferenced)
+
+
+@st.cache_data(show_spinner="Fusionando con la pancromatica...")
+def pansharpen_preview(l_key, pan_key, bands, method, col_pct, row_pct, size, _l_file, _pan_file):
+    """
+    Pan-sharpens a size x size window of the pan grid centred at (col_pct, row_pct) %.
+    Returns (bilinear upsampled bands, fused bands, throughput stats), both (h, w, 3).
+    """
+    with pansharpen.PanSharpener(_l_file, _pan_file, bands, method) as sharpener:
+        width, height = min(size, sharpener.width), min(size, sharpener.height)
+        col = int((sharpener.width - width) * col_pct / 100)
+        row = int((sharpener.height - height) * row_pct / 100)
+        window = Window(col, row, width, height)
+        upsampled = sharpener.upsampled_block(window)
+        fused, _, stats = sharpener.sharpen(window)
+    return np.moveaxis(upsampled, 0, -1), np.moveaxis(fused, 0, -1), stats
+
+
+def pansharpen_cog(ms_file, pan_file, bands, method):
+    """Streams the full pan-sharpened scene into a Cloud-Optimized GeoTIFF."""
+    with pansharpen.PanSharpener(ms_file, pan_file, bands, method) as sharpener:
+        return cog_export.cog_bytes(
+            sharpener.read_block, transform=sharpener.transform, crs=sharpener.crs,
+            width=sharpener.width, height=sharpener.height,
+            count=sharpener.count, dtype=sharpener.dtype, nodata=0
+        )
+
+
+@st.cache_data(show_spinner="Calculando indices...")
+def compute_indices(file_key, sensor, names, correction, correction_settings, _file):
+    """
+    Computes the selected spectral indices in one pass over the stack: on the L2
+    surface reflectance as delivered, or on Level-1 DNs corrected with DOS / the LUT.
     """
-    Reads a TIFF/GeoTIFF using tifffile, handles multi-band scaling, 
-    and returns a PIL Image.
+    if correction == "Ninguna":
+        indices, _, _ = spectral_indices.evaluate_raster(_file, sensor, list(names))
+        return indices
+    indices, _ = atmospheric_correction.evaluate_corrected(_file, sensor, list(names), correction,
+                                                           **dict(correction_settings))
+    return indices
+
+
+@st.cache_data(show_spinner="Preparando la deteccion de cambios...")
+def change_inputs(l_key, s_key, resolution, _l_file, _s_file):
+    """
+    Computes NBR and NDVI (surface reflectance) for both scenes and resamples them onto
+    the common grid. Returns (Landsat (2, h, w), Sentinel (2, h, w), transform).
+    """
+    grids, stacks = [], []
+    for uploaded_file, sensor in ((_l_file, "Landsat 8/9"), (_s_file, "Sentinel-2")):
+        indices, transform, crs = spectral_indices.evaluate_raster(uploaded_file, sensor, ["NBR", "NDVI"])
+        stacks.append((np.stack([indices["NBR"], indices["NDVI"]]), transform, crs))
+        grids.append((crs, transform, indices["NBR"].shape[1], indices["NBR"].shape[0]))
+    if grids[0][0] is None or grids[1][0] is None:
+        raise ValueError("las imagenes deben estar georreferenciadas")
+
+    grid = reprojection.common_grid(grids[0], grids[1], resolution)
+    warped = [reprojection.warp_to_grid(data, transform, crs, grid, nodata=np.nan)
+              for data, transform, crs in stacks]
+    return warped[0], warped[1], grid[1]
+
+
+@st.cache_data(show_spinner="Detectando cambios...")
+def detect_changes(l_key, s_key, resolution, first, method, threshold, _l_file, _s_file):
+    """
+    Change detection between the co-registered index stacks, cached per scenes and
+    settings. Returns (changes, transform of the common grid).
     """
-    # Read the file into a numpy array
-    img_array = tiff.imread(uploaded_file)
-    
-    # If image is (Bands, Height, Width), transpose to (Height, Width, Bands)
-    if img_array.ndim == 3 and img_array.shape[0] < img_array.shape[2]:
-        img_array = np.transpose(img_array, (1, 2, 0))
-    
-    # Take only the first 3 bands (RGB) if it's a multi-spectral stack
-    if img_array.ndim == 3 and img_array.shape[2] > 3:
-        img_array = img_array[:, :, :3]
+    landsat_idx, sentinel_idx, grid_transform = change_inputs(l_key, s_key, resolution, _l_file, _s_file)
+    before, after = (landsat_idx, sentinel_idx) if first == "Landsat" else (sentinel_idx, landsat_idx)
+    if method == "dNBR":
+        before, after = before[0], after[0]
+    return change_detection.detect_changes(before, after, method, threshold, transform=grid_transform), grid_transform
+
+
+@st.cache_data(show_spinner="Clasificando la escena...")
+def classify_scene(file_key, sensor, model_name, regions, _file):
+    """
+    Trains the chosen model on the labelled regions and classifies the whole scene.
+    Returns (labels, per-class areas, feature names, seconds).
+    """
+    reader = landcover.FeatureReader(_file, sensor)
+    X, y = landcover.training_samples(reader, regions)
+    model = landcover.make_model(model_name).fit(X, y)
+    labels, seconds = landcover.classify(reader, model)
+    return labels, landcover.class_areas(labels, landcover.CLASSES, reader.transform), reader.names, seconds
 
-    # Normalize to 0-255 (vital for Landsat 16-bit data)
-    img_min, img_max = img_array.min(), img_array.max()
-    img_array = (img_array - img_min) / (img_max - img_min) * 255
-    
-    return Image.fromarray(img_array.astype('uint8'))
 
 def compare_images(img1, img2, split_pct):
-    if img1.size != img2.size:
-        img2 = img2.resize(img1.size)
-    
-    width, height = img1.size
-    split_point = int(width * (split_pct / 100))
-    
-    left_part = img1.crop((0, 0, split_point, height))
-    right_part = img2.crop((split_point, 0, width, height))
-    
-    combined = Image.new("RGB", (width, height))
-    combined.paste(left_part, (0, 0))
-    combined.paste(right_part, (split_point, 0))
-    return combined
+    """Swipe view: left columns of `img1` next to the right columns of `img2` (same shape)."""
+    split_point = int(img1.shape[1] * (split_pct / 100))
+    return np.concatenate([img1[:, :split_point], img2[:, split_point:]], axis=1)
 
 # --- UI ---
 st.title("🛰️ Imagenes Opticas (Landsat-8 vs Sentinel-2)")
@@ -47,16 +197,203 @@ st.title("🛰️ Imagenes Opticas (Landsat-8 vs Sentinel-2)")
 # 1. Sidebar Inputs for File Upload
 l_file = st.sidebar.file_uploader("Escoja una imagen Landsat TIFF", type=['tif', 'tiff'])
 s_file = st.sidebar.file_uploader("Escoja una imagen Sentinel TIFF", type=['tif', 'tiff'])
+PAN_GSD = sensor_catalog.band_gsd("Landsat 8/9", "B8")
+pan_file = st.sidebar.file_uploader(f"Pancromatica Landsat B8 ({PAN_GSD:g} m, opcional)", type=['tif', 'tiff'])
+
+# 2. Composite
+composite = st.sidebar.selectbox("Composicion", list(composites.COMPOSITES))
+
+# 3. Display stretch
+st.sidebar.subheader("Realce de visualizacion")
+stretch = st.sidebar.selectbox("Tipo de realce", display_stretch.STRETCHES)
+low, high = st.sidebar.slider("Percentiles de corte (%)", 0.0, 100.0, (2.0, 98.0), step=0.5)
+gamma = st.sidebar.slider("Gamma", 0.2, 3.0, 1.0, step=0.1, disabled=stretch != "gamma")
+
+# 4. Common grid for the comparison
+resolution = st.sidebar.radio(
+    "Resolucion de la comparacion", ["fina", "gruesa"],
+    format_func=lambda r: (f"Fina ({sensor_catalog.band_gsd('Sentinel-2', 'B4'):g} m, Sentinel-2)" if r == "fina"
+                           else f"Gruesa ({sensor_catalog.band_gsd('Landsat 8/9', 'B4'):g} m, Landsat)")
+)
+
+# 5. Atmospheric correction before the indices
+st.sidebar.subheader("Correccion atmosferica (indices)")
+correction = st.sidebar.selectbox(
+    "Nivel de las imagenes", ["Ninguna", "DOS", "LUT"],
+    format_func={"Ninguna": "L2 (reflectancia de superficie)", "DOS": "L1 + sustraccion de objeto oscuro",
+                 "LUT": "L1 + tabla de dispersion (Rayleigh + aerosol)"}.get
+)
+correction_settings = ()
+if correction != "Ninguna":
+    sun_zenith = st.sidebar.slider("Angulo cenital solar (°)", 0.0, 80.0, 30.0, step=0.5)
+    correction_settings = (("sun_zenith", sun_zenith),)
+    if correction == "LUT":
+        if not st.sidebar.checkbox("Estimar AOD con el objeto oscuro (banda azul)", value=True):
+            correction_settings += (("aod550", st.sidebar.slider("AOD a 550 nm", 0.0, 1.5, 0.15, step=0.01)),)
+        altitude = st.sidebar.slider("Altitud del terreno (km)", 0.0, 5.0, 0.0, step=0.1)
+        correction_settings += (("altitude_km", altitude),)
 
 if l_file and s_file:
     # Processing images
-    img_l = load_rs_image(l_file)
-    img_s = load_rs_image(s_file)
-    
+    bands_l = select_bands(l_file, "Landsat 8/9", composite, "Landsat")
+    bands_s = select_bands(s_file, "Sentinel-2", composite, "Sentinel")
+    try:
+        img_l, img_s, georeferenced = aligned_pair(
+            reprojection.image_hash(l_file.getvalue()), reprojection.image_hash(s_file.getvalue()),
+            bands_l, bands_s, resolution, stretch, low, high, gamma, l_file, s_file
+        )
+    except ValueError as e:
+        st.error(f"No se pudieron corregistrar las imagenes: {e}")
+        st.stop()
+    if not georeferenced:
+        st.warning("Alguna imagen no tiene georreferencia: se compara por tamaño de pixel, sin alinear.")
+
     split = st.slider("Comparison Slider", 0, 100, 50)
     st.image(compare_images(img_l, img_s, split), use_container_width=True)
 
+    st.subheader("🌿 Indices espectrales")
+    index_names = st.multiselect("Indices", list(spectral_indices.INDICES), default=["NDVI", "NBR"])
+    if index_names:
+        with st.expander("Formulas"):
+            for name in index_names:
+                st.code(f"{name} = {spectral_indices.INDICES[name]}")
+        tabs = st.tabs(["Landsat", "Sentinel"])
+        for tab, uploaded_file, sensor in ((tabs[0], l_file, "Landsat 8/9"), (tabs[1], s_file, "Sentinel-2")):
+            try:
+                indices = compute_indices(reprojection.image_hash(uploaded_file.getvalue()), sensor,
+                                          tuple(index_names), correction, correction_settings, uploaded_file)
+            except ValueError as e:
+                tab.warning(f"No se pueden calcular los indices: {e}")
+                continue
+            cols = tab.columns(min(3, len(index_names)))
+            for i, name in enumerate(index_names):
+                cols[i % len(cols)].image(tile_server.colorize(indices[name], "RdYlGn", -1, 1),
+                                          caption=f"{name} (-1 a 1)", use_container_width=True)
+
+    st.subheader("🔀 Deteccion de cambios")
+    c1, c2, c3 = st.columns(3)
+    first = c1.radio("Imagen anterior", ["Landsat", "Sentinel"])
+    change_method = c2.selectbox("Metodo", ["dNBR", "CVA"],
+                                 format_func=lambda m: "dNBR (incendios)" if m == "dNBR" else "CVA (NBR, NDVI)")
+    threshold_method = c3.selectbox("Umbral automatico", change_detection.THRESHOLDS)
+    try:
+        changes, grid_transform = detect_changes(
+            reprojection.image_hash(l_file.getvalue()), reprojection.image_hash(s_file.getvalue()),
+            resolution, first, change_method, threshold_method, l_file, s_file
+        )
+    except ValueError as e:
+        st.warning(f"No se puede ejecutar la deteccion de cambios: {e}")
+    else:
+        change_stats = changes["stats"]
+
+        c1, c2 = st.columns(2)
+        vmax = 1.0 if change_method == "dNBR" else None
+        c1.image(tile_server.colorize(changes["magnitude"], "inferno", 0 if vmax else None, vmax),
+                 caption=f"Magnitud ({change_method})", use_container_width=True)
+        c2.image(changes["mask"].astype(np.uint8) * 255,
+                 caption=f"Cambio (umbral {changes['threshold']:.3f})", use_container_width=True)
+
+        c1, c2, c3 = st.columns(3)
+        c1.metric("Area cambiada (ha)", f"{change_stats['hectares']:.1f}")
+        c2.metric("Area cambiada (%)", f"{change_stats['percent']:.2f}")
+        c3.metric("Tiempo (s)", f"{changes['seconds']:.2f}")
+        if change_method == "dNBR":
+            severity = change_detection.severity_stats(changes["magnitude"], grid_transform)
+            st.table({
+                "Clase": [name for name, _, _ in severity],
+                "Area (ha)": [f"{ha:.1f}" for _, ha, _ in severity],
+                "%": [f"{pct:.2f}" for _, _, pct in severity],
+            })
+
+    if pan_file:
+        st.subheader(f"🔍 Pan-sharpening Landsat (B8, {PAN_GSD:g} m)")
+        method = st.selectbox("Metodo de fusion", pansharpen.METHODS)
+        c1, c2, c3 = st.columns(3)
+        col_pct = c1.slider("Posicion horizontal (%)", 0, 100, 50)
+        row_pct = c2.slider("Posicion vertical (%)", 0, 100, 50)
+        size = c3.select_slider(f"Ventana (px de {PAN_GSD:g} m)", [256, 512, 1024, 2048], value=1024)
+        try:
+            upsampled, fused, ps_stats = pansharpen_preview(
+                reprojection.image_hash(l_file.getvalue()), reprojection.image_hash(pan_file.getvalue()),
+                bands_l, method, col_pct, row_pct, size, l_file, pan_file
+            )
+        except ValueError as e:
+            st.error(f"No se pudo fusionar la pancromatica: {e}")
+        else:
+            c1, c2 = st.columns(2)
+            c1.image(display_stretch.stretch_image(upsampled, stretch, low, high, gamma),
+                     caption=f"Multiespectral {sensor_catalog.band_gsd('Landsat 8/9', 'B4'):g} m (bilineal)", use_container_width=True)
+            c2.image(display_stretch.stretch_image(fused, stretch, low, high, gamma),
+                     caption=f"Fusionada {PAN_GSD:g} m ({method})", use_container_width=True)
+            st.caption(f"{ps_stats['megapixels']:.2f} MP en {ps_stats['seconds']:.2f} s "
+                       f"({ps_stats['megapixels_per_second']:.1f} MP/s)")
+
+            if st.button("Generar escena completa (GeoTIFF)"):
+                st.download_button(
+                    "Descargar pan-sharpening (COG)", pansharpen_cog(l_file, pan_file, bands_l, method),
+                    file_name=f"pansharpen_{method.lower()}.tif", mime="image/tiff"
+                )
+
     # --- NEW: User Input Section ---
+    st.subheader("🗺️ Clasificacion de cobertura")
+    st.caption("Marque rectangulos de entrenamiento (en % del ancho y alto de la imagen; "
+               "un punto es un rectangulo con x0 = x1 e y0 = y1).")
+    c1, c2 = st.columns(2)
+    lc_scene = c1.radio("Escena", ["Landsat", "Sentinel"], horizontal=True)
+    model_name = c2.selectbox("Modelo", landcover.MODELS)
+    lc_file, lc_sensor, lc_bands = (l_file, "Landsat 8/9", bands_l) if lc_scene == "Landsat" else (s_file, "Sentinel-2", bands_s)
+
+    regions_df = st.data_editor(
+        [
+            {"Clase": "Bosque", "x0": 10, "y0": 10, "x1": 15, "y1": 15},
+            {"Clase": "Agua", "x0": 50, "y0": 50, "x1": 55, "y1": 55},
+        ],
+        num_rows="dynamic",
+        column_config={"Clase": st.column_config.SelectboxColumn("Clase", options=list(landcover.CLASSES), required=True)},
+        key="training_regions",
+    )
+
+    lc_key = reprojection.image_hash(lc_file.getvalue())
+    preview = rs_image(lc_key, lc_bands, stretch, low, high, gamma, lc_file)
+    height, width = preview.shape[:2]
+    regions = []
+    for region in regions_df:
+        if not region.get("Clase") or any(region.get(k) is None for k in ("x0", "y0", "x1", "y1")):
+            continue
+        col0, col1 = (int(region[k] / 100 * (width - 1)) for k in ("x0", "x1"))
+        row0, row1 = (int(region[k] / 100 * (height - 1)) for k in ("y0", "y1"))
+        regions.append((landcover.CLASSES.index(region["Clase"]), col0, row0, col1, row1))
+        cv2.rectangle(preview, (col0, row0), (col1, row1), landcover.CLASS_COLORS[region["Clase"]],
+                      max(1, width // 300))
+    st.image(preview, caption="Regiones de entrenamiento", use_container_width=True)
+
+    # The stored classification is only shown while the scene, model and training
+    # regions it was computed from are still the current ones
+    lc_inputs = (lc_key, lc_sensor, model_name, tuple(regions))
+    if st.session_state.get("landcover", (None,))[0] != lc_inputs:
+        st.session_state.pop("landcover", None)
+    if st.button("Entrenar y clasificar"):
+        try:
+            st.session_state["landcover"] = (lc_inputs, classify_scene(*lc_inputs, lc_file))
+        except (ValueError, ImportError) as e:
+            st.error(f"No se pudo clasificar: {e}")
+
+    dominant_cover = None
+    if "landcover" in st.session_state:
+        labels, areas, feature_names, lc_seconds = st.session_state["landcover"][1]
+        c1, c2 = st.columns(2)
+        c1.image(landcover.colorize_labels(labels, landcover.CLASSES), caption="Cobertura clasificada",
+                 use_container_width=True)
+        c2.table({
+            "Clase": [name for name, _, _, _ in areas],
+            "Area (ha)": [f"{ha:.1f}" for _, _, ha, _ in areas],
+            "%": [f"{pct:.1f}" for _, _, _, pct in areas],
+        })
+        c2.caption(f"Atributos: {', '.join(feature_names)}")
+        c2.caption(f"{labels.size / 1e6:.2f} MP clasificados en {lc_seconds:.2f} s "
+                   f"({labels.size / 1e6 / max(lc_seconds, 1e-9):.1f} MP/s)")
+        dominant_cover = max(areas, key=lambda area: area[3])[0]
+
     st.divider()
     st.subheader("📝 Interpretacion de imagenes")
 
@@ -66,8 +403,11 @@ if l_file and s_file:
     # Question 2: Radio Buttons (Categorical)
     land_cover = st.radio(
         "¿Cuál es el tipo de cobertura terrestre dominante visible??",
-        ["Bosque", "Urbano", "Agricultura", "Agua", "Arido"]
+        list(landcover.CLASSES),
+        index=landcover.CLASSES.index(dominant_cover) if dominant_cover else 0
     )
+    if dominant_cover:
+        st.caption(f"Segun la clasificacion, la cobertura dominante es {dominant_cover}.")
 
     # Question 3: Multi-select
     features = st.multiselect(
@@ -0,0 +1,171 @@
+import time
+from contextlib import ExitStack
+
+import numpy as np
+from rasterio.enums import Resampling
+from rasterio.windows import Window, bounds as window_bounds, from_bounds
+
+import cog_export
+import composites
+
+# Pan-sharpening of 30 m multispectral bands with a 15 m panchromatic band
+# (Landsat 8/9 B8). Global statistics are estimated once on a decimated read; the
+# scene is then processed in pan-resolution windows: each window reads its pan
+# block and the matching multispectral block (bilinearly upsampled by GDAL during
+# the read), fuses them with vectorized float32 operations and is released, so
+# memory stays bounded by the block size.
+
+METHODS = ("Brovey", "IHS", "Gram-Schmidt")
+BLOCK_SIZE = 1024
+STATS_SIZE = 1024  # longer side of the decimated read used for the global statistics
+EPS = 1e-6
+
+
+def fusion_stats(ms, pan):
+    """
+    Estimates the fusion statistics from co-located samples.
+
+    `ms` is (bands, n) and `pan` (n,) at the multispectral resolution. The intensity
+    is the mean of the bands; returns its mean/std, the pan mean/std (for matching the
+    pan to the intensity) and the Gram-Schmidt injection gains cov(M_k, I) / var(I).
+    """
+    ms = ms.astype(np.float64)
+    pan = pan.astype(np.float64)
+    valid = (ms > 0).all(axis=0) & (pan > 0)
+    if valid.sum() < 2:
+        raise ValueError("No hay pixeles validos comunes entre la pancromatica y las bandas")
+    ms, pan = ms[:, valid], pan[valid]
+
+    intensity = ms.mean(axis=0)
+    i_centred = intensity - intensity.mean()
+    var_i = max(i_centred @ i_centred / len(intensity), EPS)
+    gains = (ms - ms.mean(axis=1, keepdims=True)) @ i_centred / len(intensity) / var_i
+    return {
+        "i_mean": intensity.mean(),
+        "i_std": np.sqrt(var_i),
+        "pan_mean": pan.mean(),
+        "pan_std": max(pan.std(), EPS),
+        "gains": gains.astype(np.float32),
+    }
+
+
+def sharpen_tile(ms, pan, method, stats):
+    """
+    Fuses an upsampled multispectral block (bands, h, w) with its pan block (h, w).
+
+    Brovey:       F_k = M_k * P' / I
+    IHS (fast):   F_k = M_k + (P' - I)
+    Gram-Schmidt: F_k = M_k + g_k (P' - I)
+    where I is the band mean and P' the pan matched to the mean/std of I.
+    """
+    ms = ms.astype(np.float32)
+    pan_matched = (pan.astype(np.float32) - stats["pan_mean"]) * (stats["i_std"] / stats["pan_std"]) + stats["i_mean"]
+    intensity = ms.mean(axis=0)
+
+    if method == "Brovey":
+        fused = ms * (pan_matched / np.maximum(intensity, EPS))
+    elif method == "IHS":
+        fused = ms + (pan_matched - intensity)
+    elif method == "Gram-Schmidt":
+        fused = ms + stats["gains"][:, None, None] * (pan_matched - intensity)
+    else:
+        raise ValueError(f"Metodo desconocido: {method} (use {', '.join(METHODS)})")
+
+    fused[:, ~(ms > 0).all(axis=0)] = 0  # keep no-data outside the multispectral footprint
+    return fused
+
+
+class PanSharpener:
+    """
+    Streams a pan-sharpened product window by window.
+
+    Opens the multispectral source (with the 1-based `bands` to sharpen) and the pan
+    source; `read_block(window)` returns the fused (bands, rows, cols) block for a
+    window of the pan grid, so the object can be passed to `cog_export.write_cog`.
+    """
+
+    def __init__(self, ms_source, pan_source, bands, method="Brovey", stats_size=STATS_SIZE):
+        if method not in METHODS:
+            raise ValueError(f"Metodo desconocido: {method} (use {', '.join(METHODS)})")
+        self._stack = ExitStack()
+        self.ms = self._stack.enter_context(composites.open_raster(ms_source))
+        self.pan = self._stack.enter_context(composites.open_raster(pan_source))
+        self.bands = list(bands)
+        self.method = method
+
+        self.width, self.height = self.pan.width, self.pan.height
+        self.count = len(self.bands)
+        self.dtype = np.dtype(self.ms.dtypes[self.bands[0] - 1])
+        self.transform, self.crs = self.pan.transform, self.pan.crs
+        self.stats = self._estimate_stats(stats_size)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def close(self):
+        self._stack.close()
+
+    def _estimate_stats(self, stats_size):
+        # Decimated multispectral read and the pan averaged onto the same grid
+        scale = min(1.0, stats_size / max(self.ms.width, self.ms.height))
+        shape = (max(1, round(self.ms.height * scale)), max(1, round(self.ms.width * scale)))
+        ms = self.ms.read(self.bands, out_shape=(self.count, *shape), resampling=Resampling.average)
+        pan_window = from_bounds(*self.ms.bounds, transform=self.pan.transform)
+        pan = self.pan.read(1, window=pan_window, out_shape=shape, boundless=True,
+                            fill_value=0, resampling=Resampling.average)
+        return fusion_stats(ms.reshape(self.count, -1), pan.ravel())
+
+    def _ms_block(self, window):
+        ms_window = from_bounds(*window_bounds(window, self.pan.transform), transform=self.ms.transform)
+        return self.ms.read(
+            self.bands, window=ms_window, out_shape=(self.count, window.height, window.width),
+            boundless=True, fill_value=0, resampling=Resampling.bilinear
+        )
+
+    def read_block(self, window):
+        """Returns the pan-sharpened block for a window of the pan grid, in the input dtype."""
+        pan = self.pan.read(1, window=window)
+        fused = sharpen_tile(self._ms_block(window), pan, self.method, self.stats)
+        if self.dtype.kind in "iu":
+            info = np.iinfo(self.dtype)
+            fused = np.clip(np.rint(fused), info.min, info.max)
+        return fused.astype(self.dtype)
+
+    def upsampled_block(self, window):
+        """Returns the multispectral bands bilinearly upsampled to the pan window (for comparison)."""
+        return self._ms_block(window)
+
+    def sharpen(self, window=None, block_size=BLOCK_SIZE):
+        """
+        Pan-sharpens a window of the pan grid (the whole scene by default) block by block.
+
+        Returns (fused (bands, h, w), transform of the window, stats) where stats holds
+        the processed megapixels, seconds and megapixels per second.
+        """
+        if window is None:
+            window = Window(0, 0, self.width, self.height)
+        out = np.zeros((self.count, window.height, window.width), dtype=self.dtype)
+
+        start = time.perf_counter()
+        for block in cog_export.iter_blocks(window.width, window.height, block_size):
+            rows, cols = block.toslices()
+            out[:, rows, cols] = self.read_block(
+                Window(window.col_off + block.col_off, window.row_off + block.row_off, block.width, block.height)
+            )
+        seconds = time.perf_counter() - start
+
+        megapixels = window.width * window.height / 1e6
+        return out, self.pan.window_transform(window), {
+            "megapixels": megapixels,
+            "seconds": seconds,
+            "megapixels_per_second": megapixels / seconds if seconds > 0 else float("inf"),
+        }
+
+
+def pansharpen(ms_source, pan_source, bands, method="Brovey", window=None, block_size=BLOCK_SIZE):
+    """Opens both sources and runs PanSharpener.sharpen on a window (the whole scene by default)."""
+    with PanSharpener(ms_source, pan_source, bands, method) as sharpener:
+        return sharpener.sharpen(window, block_size)
@@ -1,13 +1,41 @@
 import streamlit as st
 import numpy as np
+import cv2
 from PIL import Image
-from pyproj import Transformer
 import rasterio
 from rasterio.transform import from_bounds
-from rasterio.warp import reproject, Resampling
+from rasterio.warp import Resampling
+from streamlit_folium import folium_static
+
+import compositing
+import distortion
+import reprojection
+import tile_server
 
 st.set_page_config(layout="wide")
 
+
+@st.cache_data
+def distortion_factors(target_crs, bounds):
+    """Analytic Tissot factors for the target CRS, computed once per CRS."""
+    return distortion.adaptive_factor_grid(target_crs, bounds)
+
+
+@st.cache_data(max_entries=32)
+def warp_image(image_key, target_crs, _img, src_transform, src_crs):
+    """Reprojects the image once per (image hash, target CRS); `_img` is not hashed."""
+    warped, dst_transform = reprojection.reproject_array(
+        reprojection.to_bands_first(_img), src_transform, src_crs, target_crs,
+        resampling=Resampling.bilinear
+    )
+    warped = np.ascontiguousarray(np.moveaxis(warped, 0, -1))
+    # (xmin, ymin, xmax, ymax) of the destination grid
+    height, width = warped.shape[:2]
+    x0, y0 = dst_transform * (0, 0)
+    x1, y1 = dst_transform * (width, height)
+    return warped, (min(x0, x1), min(y0, y1), max(x0, x1), max(y0, y1))
+
+
 st.title("🇨🇴 Proyecciones cartograficas en Colombia")
 
 uploaded_file = st.file_uploader("Cargue una imagen", type=["jpg", "png", "jpeg"])
@@ -35,30 +63,12 @@ if uploaded_file:
     src_transform = from_bounds(lon_min, lat_min, lon_max, lat_max, w, h)
     src_crs = "EPSG:4326"
 
-    # Destination array
-    dst = np.zeros_like(img)
-
-    # Perform reprojection (band by band)
-    for i in range(3):  # RGB
-        reproject(
-            source=img[:, :, i],
-            destination=dst[:, :, i],
-            src_transform=src_transform,
-            src_crs=src_crs,
-            dst_crs=target_crs,
-            resampling=Resampling.bilinear
-        )
-
-    warped = dst
-
-    # --- Grid overlay ---
-    def add_grid(image, step=50):
-        img_copy = image.copy()
-        img_copy[::step, :] = 255
-        img_copy[:, ::step] = 255
-        return img_copy
+    # Reproject all bands in one multi-threaded call onto a properly sized grid
+    image_key = reprojection.image_hash(uploaded_file.getvalue())
+    warped, warped_bounds = warp_image(image_key, target_crs, img, src_transform, src_crs)
 
     show_grid = st.sidebar.checkbox("Reticula", True)
+    grid_spacing = st.sidebar.select_slider("Espaciado de la reticula (grados)", [0.5, 1.0, 2.0, 5.0], 2.0)
 
     # --- USER INPUT ---
     user_name = st.sidebar.text_input("Ingrese su nombre", "")
@@ -66,23 +76,20 @@ if uploaded_file:
         "Indique las diferencias (visuales y numericas) entre las diferentes proyecciones", ""
     )
 
-    img_display = add_grid(img) if show_grid else img
-    warped_display = add_grid(warped) if show_grid else warped
-
-    # --- Distortion Metrics (igual que antes) ---
-    transformer = Transformer.from_crs("EPSG:4326", target_crs, always_xy=True)
-
-    lon = np.linspace(lon_min, lon_max, w)
-    lat = np.linspace(lat_min, lat_max, h)
-    lon_grid, lat_grid = np.meshgrid(lon, lat)
-
-    x, y = transformer.transform(lon_grid, lat_grid)
-
-    dx = np.gradient(x, axis=1)
-    dy = np.gradient(y, axis=0)
-
-    area_dist = np.mean(np.abs(dx * dy)) / 1e6
-    angle_dist = np.mean(np.abs(np.gradient(dx, axis=0) - np.gradient(dy, axis=1)))
+    # --- Graticule overlay (true lon/lat lines, rendered once per size and CRS) ---
+    geo_bounds = (lon_min, lat_min, lon_max, lat_max)
+    if show_grid:
+        img_display = compositing.apply_layer(img, compositing.graticule_layer(
+            w, h, geo_bounds, src_crs, geo_bounds, grid_spacing))
+        warped_display = compositing.apply_layer(warped, compositing.graticule_layer(
+            warped.shape[1], warped.shape[0], warped_bounds, target_crs, geo_bounds, grid_spacing))
+    else:
+        img_display, warped_display = img, warped
+
+    # --- Distortion Metrics (analytic scale factors on a coarse grid) ---
+    bounds = (lon_min, lat_min, lon_max, lat_max)
+    factor_lon, factor_lat, factors = distortion_factors(target_crs, bounds)
+    summary = distortion.summarize(factors)
 
     # --- Layout ---
     col1, col2 = st.columns(2)
@@ -95,13 +102,25 @@ if uploaded_file:
         st.subheader(proj_name)
         st.image(warped_display)
 
+    # --- Interactive map (only the visible tiles are transferred) ---
+    with st.expander("Mapa interactivo"):
+        layer_id = tile_server.register_layer("imagen", img, src_transform, src_crs)
+        folium_static(tile_server.folium_map([(layer_id, "Imagen")]), width=1100)
+
     # --- Blend ---
     st.subheader("Comparacion")
     alpha = st.slider("Blend", 0.0, 1.0, 0.5)
-    blend = (img * (1 - alpha) + warped * alpha).astype(np.uint8)
+    # The warped grid has its own size; match it to the original for blending
+    warped_resized = cv2.resize(warped, (w, h), interpolation=cv2.INTER_LINEAR)
+    blend = compositing.blend(img, warped_resized, alpha)
     st.image(blend)
 
     # --- Metrics ---
     st.subheader("Metricas de la distorsion")
-    st.metric("Distorsion en area", f"{area_dist:.4f} Km2")
-    st.metric("Distorsion Angular", f"{angle_dist:.4f} grados")
+    col1, col2, col3 = st.columns(3)
+    col1.metric("Escala areal media", f"{summary['areal_scale_mean']:.4f}",
+                help="Relacion entre el area en el mapa y el area real (1 = sin distorsion)")
+    col2.metric("Rango de escala areal",
+                f"{summary['areal_scale_min']:.4f} - {summary['areal_scale_max']:.4f}")
+    col3.metric("Distorsion angular maxima", f"{summary['angular_distortion_max']:.4f} grados")
+    st.pyplot(distortion.distortion_figure(target_crs, bounds, factor_lon, factor_lat, factors))
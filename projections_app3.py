@@ -2,11 +2,20 @@ import streamlit as st
 import numpy as np
 import cv2
 from PIL import Image
-from pyproj import Transformer
+
+import compositing
+import distortion
+import reprojection
 
 st.set_page_config(layout="wide")
 
 
+@st.cache_data
+def distortion_factors(target_crs, bounds):
+    """Analytic Tissot factors for the target CRS, computed once per CRS."""
+    return distortion.adaptive_factor_grid(target_crs, bounds)
+
+
 
 st.title("🇨🇴 Proyecciones cartograficas en Colombia")
 
@@ -30,34 +39,16 @@ if uploaded_file:
 
 
     # Assume input is lat/lon grid (demo purpose)
-    lon = np.linspace(-80, -66, w)
-    lat = np.linspace(-4, 13, h)
-    lon_grid, lat_grid = np.meshgrid(lon, lat)
-
-    transformer = Transformer.from_crs("EPSG:4326", target_crs, always_xy=True)
-
-    # Transform coordinates
-    x, y = transformer.transform(lon_grid, lat_grid)
+    src_bounds = (-80, -4, -66, 13)
 
-    # Normalize to image grid
-    x_norm = (x - x.min()) / (x.max() - x.min()) * (w - 1)
-    y_norm = (y - y.min()) / (y.max() - y.min()) * (h - 1)
+    # Inverse remap maps from a sparse control grid (cached per size and CRS)
+    map_x, map_y = reprojection.remap_maps(w, h, src_bounds, "EPSG:4326", target_crs)
 
-    map_x = x_norm.astype(np.float32)
-    map_y = y_norm.astype(np.float32)
-
-    warped = cv2.remap(img, map_x, map_y, interpolation=cv2.INTER_LINEAR)
-
-    # --- Grid overlay ---
-    def add_grid(image, step=50):
-        img_copy = image.copy()
-        for i in range(0, img_copy.shape[0], step):
-            cv2.line(img_copy, (0, i), (img_copy.shape[1], i), (255, 255, 255), 1)
-        for j in range(0, img_copy.shape[1], step):
-            cv2.line(img_copy, (j, 0), (j, img_copy.shape[0]), (255, 255, 255), 1)
-        return img_copy
+    warped = cv2.remap(img, map_x, map_y, interpolation=cv2.INTER_LINEAR,
+                       borderMode=cv2.BORDER_CONSTANT, borderValue=0)
 
     show_grid = st.sidebar.checkbox("Reticula", True)
+    grid_spacing = st.sidebar.select_slider("Espaciado de la reticula (grados)", [0.5, 1.0, 2.0, 5.0], 2.0)
     
     # --- USER INPUT SECTION ---
 
@@ -66,15 +57,20 @@ if uploaded_file:
     user_name = st.sidebar.text_input("Ingrese su nombre", "")
     user_goal = st.sidebar.text_area("Indique las diferencias (visuales y numericas) entre las diferentes proyecciones", "")
 
-    img_display = add_grid(img) if show_grid else img
-    warped_display = add_grid(warped) if show_grid else warped
-
-    # --- Distortion Metrics ---
-    dx = np.gradient(x, axis=1)
-    dy = np.gradient(y, axis=0)
-
-    area_dist = np.mean(np.abs(dx * dy))/1000000
-    angle_dist = np.mean(np.abs(np.gradient(dx, axis=0) - np.gradient(dy, axis=1)))
+    # --- Graticule overlay (true lon/lat lines, rendered once per size and CRS) ---
+    if show_grid:
+        img_display = compositing.apply_layer(img, compositing.graticule_layer(
+            w, h, src_bounds, "EPSG:4326", src_bounds, grid_spacing))
+        dst_bounds = reprojection.destination_bounds(src_bounds, "EPSG:4326", target_crs)
+        warped_display = compositing.apply_layer(warped, compositing.graticule_layer(
+            w, h, dst_bounds, target_crs, src_bounds, grid_spacing))
+    else:
+        img_display, warped_display = img, warped
+
+    # --- Distortion Metrics (analytic scale factors on a coarse grid) ---
+    bounds = src_bounds
+    factor_lon, factor_lat, factors = distortion_factors(target_crs, bounds)
+    summary = distortion.summarize(factors)
 
     # --- Layout ---
     col1, col2 = st.columns(2)
@@ -90,10 +86,15 @@ if uploaded_file:
     # --- Slider ---
     st.subheader("Comparacion")
     alpha = st.slider("Blend", 0.0, 1.0, 0.5)
-    blend = (img * (1 - alpha) + warped * alpha).astype(np.uint8)
+    blend = compositing.blend(img, warped, alpha)
     st.image(blend)
 
     # --- Metrics ---
     st.subheader("Metricas de la distorsion")
-    st.metric("Distorsion en area", f"{area_dist:.4f} Km2")
-    st.metric("Distorsion Angular", f"{angle_dist:.4f} grados")
\ No newline at end of file
+    col1, col2, col3 = st.columns(3)
+    col1.metric("Escala areal media", f"{summary['areal_scale_mean']:.4f}",
+                help="Relacion entre el area en el mapa y el area real (1 = sin distorsion)")
+    col2.metric("Rango de escala areal",
+                f"{summary['areal_scale_min']:.4f} - {summary['areal_scale_max']:.4f}")
+    col3.metric("Distorsion angular maxima", f"{summary['angular_distortion_max']:.4f} grados")
+    st.pyplot(distortion.distortion_figure(target_crs, bounds, factor_lon, factor_lat, factors))
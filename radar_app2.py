@@ -12,6 +12,12 @@ import os
 import rasterio
 from rasterio.io import MemoryFile
 from skimage import exposure
+from streamlit_folium import folium_static
+
+import app_cache
+import change_detection
+import reprojection
+import tile_server
 
 st.set_page_config(layout="wide")
 
@@ -29,6 +35,22 @@ def load_raster(uploaded_file):
 
     return arr
     
+def load_georef(uploaded_file):
+    """Returns (transform, crs) of an uploaded raster, or None when it has no CRS."""
+    if uploaded_file is None:
+        return None
+
+    with MemoryFile(uploaded_file.getvalue()) as memfile:
+        with memfile.open() as dataset:
+            if dataset.crs is None:
+                return None
+            return dataset.transform, dataset.crs.to_string()
+
+@st.cache_data(show_spinner="Detectando cambios...")
+def detect_changes(key1, key2, method, threshold, transform, _arr1, _arr2):
+    """Change detection between both images, cached per file contents and settings."""
+    return change_detection.detect_changes(_arr1, _arr2, method, threshold, transform=transform)
+
 def apply_clahe(arr, clip_limit=0.05):
     arr = arr.astype("float32")
 
@@ -102,13 +124,22 @@ if img1 is not None and img2 is not None:
     # -------------------------------
     st.subheader("🖼️ Comparacion")
 
-    col1, col2 = st.columns(2)
+    georef1 = load_georef(file1)
+    georef2 = load_georef(file2)
 
-    with col1:
-        st.image(norm1, caption="Imagen 1", width='stretch')
+    if georef1 and georef2:
+        # Georeferenced: serve CLAHE products as map tiles (only visible tiles are sent)
+        layer1 = tile_server.register_layer("CLAHE_1", norm1, *georef1, cmap="gray", vmin=0, vmax=1)
+        layer2 = tile_server.register_layer("CLAHE_2", norm2, *georef2, cmap="gray", vmin=0, vmax=1)
+        folium_static(tile_server.folium_map([(layer1, "Imagen 1"), (layer2, "Imagen 2")]), width=1100)
+    else:
+        col1, col2 = st.columns(2)
 
-    with col2:
-        st.image(norm2, caption="Imagen 2", width='stretch')
+        with col1:
+            st.image(norm1, caption="Imagen 1", width='stretch')
+
+        with col2:
+            st.image(norm2, caption="Imagen 2", width='stretch')
 
     # -------------------------------
     # 🔄 Swipe Comparison (fake slider)
@@ -146,6 +177,50 @@ if img1 is not None and img2 is not None:
     fig = px.histogram(df_hist, x="Backscatter", color="Image", nbins=100, barmode="overlay")
     st.plotly_chart(fig, width='stretch')
 
+    # -------------------------------
+    # 🔀 Change Detection
+    # -------------------------------
+    st.subheader("🔀 Deteccion de cambios")
+    st.caption("Log-ratio para intensidades lineales; para datos en dB use la diferencia.")
+
+    col1, col2 = st.columns(2)
+    change_method = col1.selectbox("Metodo", ["log-ratio", "diferencia"])
+    threshold_method = col2.selectbox("Umbral automatico", change_detection.THRESHOLDS)
+
+    changes = detect_changes(
+        reprojection.image_hash(file1.getvalue()), reprojection.image_hash(file2.getvalue()),
+        change_method, threshold_method, georef1[0] if georef1 else None, arr1, arr2
+    )
+    change_stats = changes["stats"]
+
+    col1, col2 = st.columns(2)
+    with col1:
+        st.image(normalize(np.nan_to_num(changes["magnitude"])), caption=f"Magnitud ({change_method})")
+    with col2:
+        st.image(changes["mask"].astype("uint8") * 255, caption=f"Mascara de cambio (umbral {changes['threshold']:.3f})")
+
+    hist, edges = changes["histogram"]
+    fig = px.bar(x=(edges[:-1] + edges[1:]) / 2, y=hist, labels={"x": "Magnitud", "y": "Pixeles"})
+    fig.add_vline(x=changes["threshold"], line_dash="dash", line_color="red")
+    st.plotly_chart(fig, width='stretch')
+
+    col1, col2, col3 = st.columns(3)
+    col1.metric("Area cambiada (%)", f"{change_stats['percent']:.2f}")
+    if georef1:
+        col2.metric("Area cambiada (ha)", f"{change_stats['hectares']:.1f}")
+    else:
+        col2.metric("Pixeles cambiados", f"{change_stats['pixels']:,}")
+    col3.metric("Tiempo (s)", f"{changes['seconds']:.2f}")
+
+    transform, crs = georef1 if georef1 else (None, None)
+    mask = changes["mask"].astype("uint8")
+    st.download_button(
+        "Descargar mascara de cambio (COG)",
+        app_cache.cog_download(mask, transform, crs),
+        file_name="cambio.tif",
+        mime="image/tiff"
+    )
+
     # -------------------------------
     # 🧠 Texture Analysis
     # -------------------------------
@@ -164,6 +239,18 @@ if img1 is not None and img2 is not None:
     with col2:
         st.image(normalize(tex2), caption="Textura Imagen 2")
 
+    # Export textures as Cloud-Optimized GeoTIFFs (georeferenced when the input is)
+    col1, col2 = st.columns(2)
+    for col, tex, georef, name in ((col1, tex1, georef1, "textura_1.tif"), (col2, tex2, georef2, "textura_2.tif")):
+        transform, crs = georef if georef else (None, None)
+        tex = tex.astype("float32")
+        col.download_button(
+            f"Descargar {name} (COG)",
+            app_cache.cog_download(tex, transform, crs),
+            file_name=name,
+            mime="image/tiff"
+        )
+
     # -------------------------------
     # 📝 User Comments
     # -------------------------------
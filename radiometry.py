@@ -0,0 +1,240 @@
+import re
+from functools import lru_cache
+
+import numpy as np
+
+# Blackbody radiometry shared by the radiation apps. Planck's law is evaluated in
+# log space, log L = log c1 - 5 log λ - log(expm1(c2 / λT)), which neither
+# overflows at short wavelengths / low temperatures (where it underflows cleanly to
+# 0) nor loses precision at long wavelengths (expm1 instead of exp - 1). Curves for
+# the sliders come from a cached (temperature x wavelength) table.
+#
+# The inverse direction (radiance -> brightness temperature) uses either the
+# closed form with the Landsat K1/K2 calibration constants or, for any spectral
+# response, a cached monotonic table of band radiance vs temperature that is
+# inverted by linear interpolation. The module is NumPy-only; raster I/O lives in
+# thermal.py.
+
+# CODATA 2018 (exact SI values except the derived ones)
+PLANCK = 6.62607015e-34        # h (J s)
+LIGHT_SPEED = 299792458.0      # c (m/s)
+BOLTZMANN = 1.380649e-23       # k (J/K)
+STEFAN_BOLTZMANN = 5.670374419e-8  # sigma (W m^-2 K^-4)
+WIEN = 2.897771955e-3          # b (m K)
+
+C1 = 2 * PLANCK * LIGHT_SPEED ** 2          # first radiation constant for radiance (W m^2 sr^-1)
+C2 = PLANCK * LIGHT_SPEED / BOLTZMANN       # second radiation constant (m K)
+
+UNITS = {"m": 1.0, "um": 1e-6, "nm": 1e-9}
+
+
+def _log_expm1(x):
+    """log(exp(x) - 1) without overflow for large x."""
+    large = x > 30
+    with np.errstate(over="ignore", divide="ignore"):
+        return np.where(large, x + np.log1p(-np.exp(-np.where(large, x, 30))), np.log(np.expm1(np.where(large, 1, x))))
+
+
+def log_planck(wavelength_m, temperature):
+    """Natural log of the spectral radiance (W m^-2 sr^-1 m^-1); -inf where it is zero."""
+    wavelength_m = np.asarray(wavelength_m, dtype=np.float64)
+    temperature = np.asarray(temperature, dtype=np.float64)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        x = C2 / (wavelength_m * temperature)
+        out = np.log(C1) - 5 * np.log(wavelength_m) - _log_expm1(np.where(np.isfinite(x), x, 1.0))
+    return np.where(np.isfinite(x) & (temperature > 0), out, -np.inf)
+
+
+def planck(wavelength_m, temperature):
+    """Blackbody spectral radiance in W m^-2 sr^-1 m^-1 (broadcasts wavelength against temperature)."""
+    return np.exp(log_planck(wavelength_m, temperature))
+
+
+def spectral_radiance(wavelength, temperature, unit="nm"):
+    """Spectral radiance per `unit` of wavelength (W m^-2 sr^-1 nm^-1 for "nm"), wavelength in `unit`."""
+    scale = UNITS[unit]
+    return planck(np.asarray(wavelength, dtype=np.float64) * scale, temperature) * scale
+
+
+def stefan_boltzmann(temperature, emissivity=1.0):
+    """Radiant exitance (W/m²) of a grey body."""
+    return emissivity * STEFAN_BOLTZMANN * np.asarray(temperature, dtype=np.float64) ** 4
+
+
+def wien_peak(temperature):
+    """Wavelength of maximum spectral radiance (m); inf for T <= 0."""
+    temperature = np.asarray(temperature, dtype=np.float64)
+    with np.errstate(divide="ignore"):
+        return np.where(temperature > 0, WIEN / np.maximum(temperature, 1e-300), np.inf)[()]
+
+
+# --- Sensor bands ---
+
+def gaussian_response(center_um, fwhm_um, samples=81):
+    """Returns (wavelengths in µm, relative response) of a Gaussian spectral response function."""
+    sigma = fwhm_um / (2 * np.sqrt(2 * np.log(2)))
+    wavelengths = np.linspace(center_um - 3 * sigma, center_um + 3 * sigma, samples)
+    return wavelengths, np.exp(-0.5 * ((wavelengths - center_um) / sigma) ** 2)
+
+
+def trapezoid_response(lower_um, upper_um, edge_um=0.05, samples=81):
+    """Returns a flat-top response between `lower_um` and `upper_um` with linear edges."""
+    wavelengths = np.linspace(lower_um - edge_um, upper_um + edge_um, samples)
+    response = np.clip(np.minimum(wavelengths - (lower_um - edge_um), (upper_um + edge_um) - wavelengths) / edge_um, 0, 1)
+    return wavelengths, response
+
+
+# Approximate relative spectral responses (µm) of the thermal bands
+SENSOR_RESPONSES = {
+    "Landsat 8/9 B10": trapezoid_response(10.60, 11.19),
+    "Landsat 8/9 B11": trapezoid_response(11.50, 12.51),
+    "ASTER B13": gaussian_response(10.66, 0.70),
+    "ASTER B14": gaussian_response(11.29, 0.70),
+    "MODIS B31": gaussian_response(11.03, 0.50),
+}
+
+
+def trapezoid_weights(wavelengths):
+    """Trapezoid-rule weights of increasing sample positions: ∫ f dλ = f @ weights."""
+    wavelengths = np.asarray(wavelengths, dtype=np.float64)
+    weights = np.zeros_like(wavelengths)
+    steps = np.diff(wavelengths) / 2
+    weights[:-1] += steps
+    weights[1:] += steps
+    return weights
+
+
+def band_weights(response):
+    """
+    Returns (wavelengths, weights) of a (wavelengths, relative response) pair such that
+    ∫ f(λ) S(λ) dλ = f @ weights; weights.sum() is the band normalization ∫ S(λ) dλ.
+    """
+    wavelengths, srf = (np.asarray(a, dtype=np.float64) for a in response)
+    return wavelengths, trapezoid_weights(wavelengths) * srf
+
+
+def band_radiance(temperature, response, emissivity=1.0):
+    """
+    Band-averaged radiance (W m^-2 sr^-1 µm^-1) for a relative spectral response.
+
+    `response` is (wavelengths in µm, relative response); `temperature` may be any
+    array. L_band = ∫ ε(λ) L(λ, T) S(λ) dλ / ∫ S(λ) dλ, by the trapezoid rule, with one
+    matrix-vector product for all temperatures. `emissivity` is a scalar or an array
+    sampled on the response wavelengths.
+    """
+    wavelengths, weights = band_weights(response)
+    weights = weights * np.broadcast_to(emissivity, weights.shape) / weights.sum()
+
+    temperature = np.asarray(temperature, dtype=np.float64)
+    radiance = spectral_radiance(wavelengths, temperature.reshape(-1, 1), unit="um")
+    return (radiance @ weights).reshape(temperature.shape)[()]
+
+
+# --- Precomputed curves ---
+
+@lru_cache(maxsize=8)
+def planck_table(t_min, t_max, t_step, wl_min, wl_max, n_wavelengths, unit="nm"):
+    """
+    Returns (temperatures, wavelengths, radiance) with radiance[i, j] the spectral
+    radiance (per `unit`) at temperatures[i] and wavelengths[j] (in `unit`).
+
+    Cached per grid and returned read-only, so slider callbacks only index rows.
+    """
+    temperatures = np.arange(t_min, t_max + t_step / 2, t_step, dtype=np.float64)
+    wavelengths = np.linspace(wl_min, wl_max, n_wavelengths)
+    table = spectral_radiance(wavelengths[np.newaxis, :], temperatures[:, np.newaxis], unit)
+    for array in (temperatures, wavelengths, table):
+        array.flags.writeable = False
+    return temperatures, wavelengths, table
+
+
+def table_curve(table, temperature):
+    """Returns the radiance row of a `planck_table` for the nearest tabulated temperature."""
+    temperatures, _, radiance = table
+    index = int(np.clip(np.searchsorted(temperatures, temperature), 0, len(temperatures) - 1))
+    if index > 0 and abs(temperatures[index - 1] - temperature) < abs(temperatures[index] - temperature):
+        index -= 1
+    return radiance[index]
+
+
+# --- Brightness temperature ---
+
+# Landsat 8/9 Collection 2 Level-1 thermal calibration (the MTL file of a scene has the exact values)
+LANDSAT_THERMAL = {
+    "B10": {"K1": 774.8853, "K2": 1321.0789, "ML": 3.342e-4, "AL": 0.1, "response": "Landsat 8/9 B10"},
+    "B11": {"K1": 480.8883, "K2": 1201.1442, "ML": 3.342e-4, "AL": 0.1, "response": "Landsat 8/9 B11"},
+}
+
+_MTL_KEYS = {
+    "K1": "K1_CONSTANT_BAND_{}",
+    "K2": "K2_CONSTANT_BAND_{}",
+    "ML": "RADIANCE_MULT_BAND_{}",
+    "AL": "RADIANCE_ADD_BAND_{}",
+}
+
+
+def parse_mtl(text, band="B10"):
+    """Reads the K1, K2, ML and AL constants of a thermal band from the text of a Landsat MTL file."""
+    constants = dict(LANDSAT_THERMAL[band])
+    number = band.lstrip("B")
+    for key, name in _MTL_KEYS.items():
+        match = re.search(rf"{name.format(number)}\s*=\s*([-+0-9.Ee]+)", text)
+        if match:
+            constants[key] = float(match.group(1))
+    return constants
+
+
+def dn_to_radiance(dn, ml, al):
+    """Top-of-atmosphere spectral radiance (W m^-2 sr^-1 µm^-1) from Level-1 DNs; DN 0 -> NaN."""
+    dn = np.asarray(dn)
+    radiance = dn.astype(np.float32) * np.float32(ml) + np.float32(al)
+    radiance[dn == 0] = np.nan
+    return radiance
+
+
+def brightness_temperature(radiance, k1, k2):
+    """Brightness temperature (K) from band radiance with the calibration constants: T = K2 / ln(K1 / L + 1)."""
+    radiance = np.asarray(radiance)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        out = k2 / np.log1p(k1 / radiance)
+    return np.where(radiance > 0, out, np.nan)[()]
+
+
+def radiance_from_temperature(temperature, k1, k2):
+    """Band radiance from temperature with the calibration constants: L = K1 / (exp(K2 / T) - 1)."""
+    temperature = np.asarray(temperature, dtype=np.float64)
+    with np.errstate(divide="ignore", over="ignore"):
+        return np.where(temperature > 0, k1 / np.expm1(k2 / temperature), 0.0)[()]
+
+
+def inverse_planck(radiance, wavelength, unit="um"):
+    """Monochromatic brightness temperature (K) of a spectral radiance given per `unit` at `wavelength` (in `unit`)."""
+    scale = UNITS[unit]
+    wavelength_m = np.asarray(wavelength, dtype=np.float64) * scale
+    radiance_m = np.asarray(radiance, dtype=np.float64) / scale
+    with np.errstate(divide="ignore", invalid="ignore"):
+        out = C2 / (wavelength_m * np.log1p(C1 / (wavelength_m ** 5 * radiance_m)))
+    return np.where(radiance_m > 0, out, np.nan)[()]
+
+
+@lru_cache(maxsize=16)
+def band_temperature_table(response_name, t_min=150.0, t_max=400.0, t_step=0.05):
+    """
+    Returns (temperatures, band radiances) for a response in SENSOR_RESPONSES.
+
+    Band radiance increases monotonically with temperature, so the table can be
+    inverted with np.interp. Cached and returned read-only.
+    """
+    temperatures = np.arange(t_min, t_max + t_step / 2, t_step)
+    radiances = band_radiance(temperatures, SENSOR_RESPONSES[response_name])
+    temperatures.flags.writeable = False
+    radiances.flags.writeable = False
+    return temperatures, radiances
+
+
+def band_brightness_temperature(radiance, response_name):
+    """Brightness temperature (K) of band radiance by inverting the band-integrated Planck table."""
+    temperatures, radiances = band_temperature_table(response_name)
+    radiance = np.asarray(radiance, dtype=np.float64)
+    out = np.interp(radiance, radiances, temperatures, left=np.nan, right=np.nan)
+    return out.astype(np.float32) if out.ndim else out[()]
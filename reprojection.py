@@ -0,0 +1,244 @@
+import hashlib
+import os
+from functools import lru_cache
+
+import numpy as np
+import rasterio
+from rasterio.transform import array_bounds, from_origin
+from rasterio.warp import calculate_default_transform, reproject, transform_bounds, Resampling
+from rasterio.windows import Window, transform as window_transform
+
+import crs_service
+
+# Destination rasters larger than this (in pixels per side) are warped window by
+# window so that GDAL's working buffers stay small; every window still warps all
+# bands in a single call.
+WINDOW_SIZE = 1024
+NUM_THREADS = os.cpu_count() or 1
+CONTROL_STEP = 32  # pixels between control points of the remap grid
+
+
+def image_hash(data):
+    """Returns a short content hash for raw bytes or a NumPy array (used as a cache key)."""
+    if isinstance(data, np.ndarray):
+        data = np.ascontiguousarray(data).view(np.uint8)
+    return hashlib.blake2b(memoryview(data), digest_size=16).hexdigest()
+
+
+def to_bands_first(img):
+    """Converts an (h, w) or (h, w, bands) image to the (bands, h, w) layout rasterio expects."""
+    if img.ndim == 2:
+        return img[np.newaxis]
+    return np.moveaxis(img, -1, 0)
+
+
+def iter_windows(width, height, size=WINDOW_SIZE):
+    """Yields rasterio Windows that tile a width x height raster."""
+    for row in range(0, height, size):
+        for col in range(0, width, size):
+            yield Window(col, row, min(size, width - col), min(size, height - row))
+
+
+def destination_grid(src_crs, dst_crs, width, height, src_transform):
+    """Returns (dst_transform, dst_width, dst_height) for warping a raster into `dst_crs`."""
+    left, top = src_transform * (0, 0)
+    right, bottom = src_transform * (width, height)
+    return calculate_default_transform(
+        src_crs, dst_crs, width, height,
+        left=min(left, right), bottom=min(top, bottom),
+        right=max(left, right), top=max(top, bottom)
+    )
+
+
+def reproject_array(source, src_transform, src_crs, dst_crs,
+                    resampling=Resampling.bilinear, nodata=0,
+                    num_threads=NUM_THREADS, window_size=WINDOW_SIZE):
+    """
+    Warps a (bands, h, w) array into `dst_crs` with a properly sized destination grid.
+
+    Returns (destination, dst_transform). All bands are warped together with
+    `num_threads` GDAL worker threads, one destination window at a time.
+    """
+    bands, height, width = source.shape
+    dst_transform, dst_width, dst_height = destination_grid(
+        src_crs, dst_crs, width, height, src_transform
+    )
+    destination = np.full((bands, dst_height, dst_width), nodata, dtype=source.dtype)
+
+    for window in iter_windows(dst_width, dst_height, window_size):
+        rows, cols = window.toslices()
+        reproject(
+            source=source,
+            destination=destination[:, rows, cols],
+            src_transform=src_transform,
+            src_crs=src_crs,
+            src_nodata=nodata,
+            dst_transform=window_transform(window, dst_transform),
+            dst_crs=dst_crs,
+            dst_nodata=nodata,
+            resampling=resampling,
+            num_threads=num_threads
+        )
+    return destination, dst_transform
+
+
+def reproject_file(path, dst_crs, resampling=Resampling.bilinear,
+                   num_threads=NUM_THREADS, window_size=WINDOW_SIZE):
+    """
+    Warps a GeoTIFF on disk into `dst_crs`.
+
+    The source bands are handed to GDAL as a dataset band, so only the source blocks
+    needed by each destination window are read. Returns (destination, dst_transform).
+    """
+    with rasterio.open(path) as src:
+        dst_transform, dst_width, dst_height = calculate_default_transform(
+            src.crs, dst_crs, src.width, src.height, *src.bounds
+        )
+        nodata = src.nodata if src.nodata is not None else 0
+        destination = np.full((src.count, dst_height, dst_width), nodata, dtype=src.dtypes[0])
+        indexes = list(range(1, src.count + 1))
+
+        for window in iter_windows(dst_width, dst_height, window_size):
+            rows, cols = window.toslices()
+            reproject(
+                source=rasterio.band(src, indexes),
+                destination=destination[:, rows, cols],
+                dst_transform=window_transform(window, dst_transform),
+                dst_crs=dst_crs,
+                dst_nodata=nodata,
+                resampling=resampling,
+                num_threads=num_threads
+            )
+    return destination, dst_transform
+
+
+# --- Co-registration onto a common grid ---
+
+def common_grid(reference, other, resolution="fina"):
+    """
+    Returns (crs, transform, width, height) of a north-up grid covering the overlap of two
+    rasters, in the CRS of `reference`.
+
+    Each raster is described by (crs, transform, width, height). `resolution` is
+    "fina" (the smaller pixel size, e.g. 10 m for Sentinel-2 vs Landsat) or "gruesa".
+    """
+    ref_crs, ref_transform, ref_width, ref_height = reference
+    other_crs, other_transform, other_width, other_height = other
+
+    # Bounds as (west, south, east, north)
+    ref_bounds = array_bounds(ref_height, ref_width, ref_transform)
+    other_bounds = transform_bounds(
+        other_crs, ref_crs, *array_bounds(other_height, other_width, other_transform)
+    )
+    west = max(ref_bounds[0], other_bounds[0])
+    south = max(ref_bounds[1], other_bounds[1])
+    east = min(ref_bounds[2], other_bounds[2])
+    north = min(ref_bounds[3], other_bounds[3])
+    if east <= west or north <= south:
+        raise ValueError("Las imagenes no se superponen")
+
+    # Pixel size of `other` expressed in the reference CRS
+    other_dst_transform, _, _ = calculate_default_transform(
+        other_crs, ref_crs, other_width, other_height,
+        *array_bounds(other_height, other_width, other_transform)
+    )
+    sizes = (abs(ref_transform.a), abs(other_dst_transform.a))
+    res = min(sizes) if resolution == "fina" else max(sizes)
+
+    width = max(1, int(round((east - west) / res)))
+    height = max(1, int(round((north - south) / res)))
+    return ref_crs, from_origin(west, north, res, res), width, height
+
+
+def warp_to_grid(source, src_transform, src_crs, grid, nodata=0, num_threads=NUM_THREADS):
+    """
+    Resamples a (bands, h, w) array onto a grid from `common_grid`.
+
+    Downsampling averages the source pixels; upsampling is bilinear. Pixels equal to
+    `nodata` (NaN works for float data) are ignored and fill the uncovered area.
+    """
+    dst_crs, dst_transform, width, height = grid
+    destination = np.full((source.shape[0], height, width), nodata, dtype=source.dtype)
+    src_res = abs(src_transform.a)
+    if dst_crs != src_crs:
+        src_res = abs(calculate_default_transform(
+            src_crs, dst_crs, source.shape[2], source.shape[1],
+            *array_bounds(source.shape[1], source.shape[2], src_transform)
+        )[0].a)
+    resampling = Resampling.average if abs(dst_transform.a) > src_res * 1.01 else Resampling.bilinear
+
+    reproject(
+        source=source, destination=destination,
+        src_transform=src_transform, src_crs=src_crs, src_nodata=nodata,
+        dst_transform=dst_transform, dst_crs=dst_crs, dst_nodata=nodata,
+        resampling=resampling, num_threads=num_threads
+    )
+    return destination
+
+
+# --- Remap grids for cv2.remap ---
+
+def _interpolation_matrix(knots, size):
+    """Returns a (len(knots), size) matrix that linearly interpolates values at `knots` to 0..size-1."""
+    positions = np.arange(size)
+    upper = np.clip(np.searchsorted(knots, positions, side="right"), 1, len(knots) - 1)
+    lower = upper - 1
+    t = (positions - knots[lower]) / (knots[upper] - knots[lower])
+
+    matrix = np.zeros((len(knots), size), dtype=np.float32)
+    matrix[lower, positions] = 1 - t
+    matrix[upper, positions] += t
+    return matrix
+
+
+def _control_knots(size, step):
+    knots = np.arange(0, size, step)
+    if knots[-1] != size - 1:
+        knots = np.append(knots, size - 1)
+    return knots
+
+
+def destination_bounds(src_bounds, src_crs, dst_crs):
+    """Returns the (xmin, ymin, xmax, ymax) of `src_bounds` in `dst_crs`, following the curved edges."""
+    transformer = crs_service.get_transformer(src_crs, dst_crs)
+    return transformer.transform_bounds(*src_bounds, densify_pts=21)
+
+
+@lru_cache(maxsize=8)
+def remap_maps(width, height, src_bounds, src_crs, dst_crs, step=CONTROL_STEP):
+    """
+    Builds float32 (map_x, map_y) arrays for cv2.remap that warp a (height, width) image
+    covering `src_bounds` in `src_crs` into `dst_crs`.
+
+    Every output pixel is mapped back to the source (inverse transform), but only a
+    control grid every `step` pixels goes through PROJ; the rest is bilinearly
+    upsampled with two small matrix products. Output pixels that fall outside the
+    source extent map to -1. Results are cached per (size, bounds, CRS pair, step)
+    and returned read-only.
+    """
+    lon_min, lat_min, lon_max, lat_max = src_bounds
+    x_min, y_min, x_max, y_max = destination_bounds(src_bounds, src_crs, dst_crs)
+
+    rows = _control_knots(height, step)
+    cols = _control_knots(width, step)
+    x_ctrl = x_min + (cols + 0.5) / width * (x_max - x_min)
+    y_ctrl = y_max - (rows + 0.5) / height * (y_max - y_min)
+    x_grid, y_grid = np.meshgrid(x_ctrl, y_ctrl)
+
+    # Inverse transform: destination map coordinates -> source coordinates
+    lon, lat, _ = crs_service.transform_points(x_grid, y_grid, dst_crs, src_crs)
+    src_col = (lon - lon_min) / (lon_max - lon_min) * width - 0.5
+    src_row = (lat_max - lat) / (lat_max - lat_min) * height - 0.5
+
+    row_weights = _interpolation_matrix(rows, height).T  # (height, n_rows)
+    col_weights = _interpolation_matrix(cols, width)     # (n_cols, width)
+    map_x = row_weights @ src_col.astype(np.float32) @ col_weights
+    map_y = row_weights @ src_row.astype(np.float32) @ col_weights
+
+    outside = (map_x < -0.5) | (map_x > width - 0.5) | (map_y < -0.5) | (map_y > height - 0.5)
+    map_x[outside] = -1
+    map_y[outside] = -1
+
+    map_x.flags.writeable = False
+    map_y.flags.writeable = False
+    return map_x, map_y
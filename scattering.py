@@ -0,0 +1,164 @@
+from functools import lru_cache
+
+import numpy as np
+
+# Atmospheric scattering for the dispersion app and the atmospheric correction.
+# Mie efficiencies come from the Bohren & Huffman (1983, BHMIE) series, evaluated
+# for a whole array of size parameters at once: the loop runs over the series
+# order n and every step is a vector operation over x. Terms beyond each x's own
+# cut-off are masked. Since the series is costly for large x, the efficiencies are
+# tabulated once per refractive index on a log-spaced size-parameter grid and
+# sliders interpolate in that cached table.
+
+# Refractive indices at visible wavelengths
+REFRACTIVE_INDICES = {
+    "Agua (niebla, nubes)": 1.33 + 0.0j,
+    "Sulfato (aerosol urbano)": 1.43 + 1e-8j,
+    "Polvo mineral": 1.53 + 0.008j,
+    "Hollin (carbono negro)": 1.75 + 0.44j,
+}
+
+SEA_LEVEL_PRESSURE = 1013.25  # hPa, US Standard Atmosphere 1976
+X_GRID = (1e-3, 300.0, 600)  # (min, max, points) of the cached size-parameter table
+
+
+# --- Mie (Bohren & Huffman) ---
+
+def mie_efficiencies(x, m):
+    """
+    Exact Mie efficiencies of homogeneous spheres for an array of size parameters.
+
+    `x` = 2 pi r / lambda (any shape), `m` the complex refractive index relative to
+    the medium (n + ik, k >= 0). Returns a dict of arrays shaped like `x`:
+    "qext", "qsca", "qback" (efficiencies) and "g" (asymmetry parameter).
+    """
+    x = np.asarray(x, dtype=np.float64)
+    shape = x.shape
+    x = x.ravel()
+    m = complex(m)
+    y = m * x
+
+    nstop = np.floor(x + 4.05 * np.cbrt(x) + 2).astype(np.int64)
+    n_max = int(nstop.max())
+    n_start = int(max(n_max, np.abs(y).max())) + 16
+
+    # Logarithmic derivative D_n(mx) by downward recurrence (stable for absorbing spheres)
+    d = np.zeros((n_start + 1, x.size), dtype=np.complex128)
+    for n in range(n_start, 0, -1):
+        d[n - 1] = n / y - 1 / (d[n] + n / y)
+
+    psi0, psi1 = np.cos(x), np.sin(x)
+    chi0, chi1 = -np.sin(x), np.cos(x)
+    xi1 = psi1 - 1j * chi1
+    qsca = np.zeros_like(x)
+    qext = np.zeros_like(x)
+    g_sum = np.zeros_like(x)
+    back = np.zeros(x.size, dtype=np.complex128)
+    a_prev = np.zeros(x.size, dtype=np.complex128)
+    b_prev = np.zeros(x.size, dtype=np.complex128)
+
+    with np.errstate(over="ignore", invalid="ignore", divide="ignore"):
+        for n in range(1, n_max + 1):
+            active = n <= nstop
+            psi = (2 * n - 1) / x * psi1 - psi0
+            chi = (2 * n - 1) / x * chi1 - chi0
+            xi = psi - 1j * chi
+
+            da = d[n] / m + n / x
+            db = d[n] * m + n / x
+            a = (da * psi - psi1) / (da * xi - xi1)
+            b = (db * psi - psi1) / (db * xi - xi1)
+            a = np.where(active, a, 0)
+            b = np.where(active, b, 0)
+
+            qsca += (2 * n + 1) * (np.abs(a) ** 2 + np.abs(b) ** 2)
+            qext += (2 * n + 1) * (a + b).real
+            g_sum += (2 * n + 1) / (n * (n + 1)) * (a * b.conjugate()).real
+            if n > 1:
+                g_sum += (n - 1) * (n + 1) / n * (a_prev * a.conjugate() + b_prev * b.conjugate()).real
+            back += (2 * n + 1) * (-1) ** n * (a - b)
+
+            psi0, psi1 = psi1, psi
+            chi0, chi1 = chi1, chi
+            xi1 = psi1 - 1j * chi1
+            a_prev, b_prev = a, b
+
+        qsca *= 2 / x ** 2
+        qext *= 2 / x ** 2
+        qback = np.abs(back) ** 2 / x ** 2
+        g = 4 * g_sum / (x ** 2 * qsca)
+
+    return {name: value.reshape(shape) for name, value in
+            (("qext", qext), ("qsca", qsca), ("qback", qback), ("g", g))}
+
+
+@lru_cache(maxsize=16)
+def mie_table(m, x_min=X_GRID[0], x_max=X_GRID[1], points=X_GRID[2]):
+    """
+    Returns (x, efficiencies) for a refractive index on a log-spaced size-parameter grid.
+    Cached per index and returned read-only.
+    """
+    x = np.geomspace(x_min, x_max, points)
+    table = mie_efficiencies(x, m)
+    x.flags.writeable = False
+    for value in table.values():
+        value.flags.writeable = False
+    return x, table
+
+
+def mie_interpolated(x, m, quantity="qsca"):
+    """Interpolates a Mie quantity from the cached table (linear in log x); x outside the grid is clipped."""
+    grid, table = mie_table(complex(m))
+    log_x = np.log(np.clip(np.asarray(x, dtype=np.float64), grid[0], grid[-1]))
+    return np.interp(log_x, np.log(grid), table[quantity])
+
+
+def size_parameter(radius_um, wavelength_um):
+    """x = 2 pi r / lambda."""
+    return 2 * np.pi * np.asarray(radius_um, dtype=np.float64) / np.asarray(wavelength_um, dtype=np.float64)
+
+
+def scattering_cross_section(radius_um, wavelength_um, m):
+    """Mie scattering cross-section (µm²) of one particle, from the cached table."""
+    x = size_parameter(radius_um, wavelength_um)
+    return mie_interpolated(x, m, "qsca") * np.pi * np.asarray(radius_um, dtype=np.float64) ** 2
+
+
+def angstrom_exponent(wavelength_um, extinction):
+    """Ångström exponent alpha of extinction ~ lambda^-alpha from a log-log least-squares fit."""
+    slope = np.polyfit(np.log(wavelength_um), np.log(extinction), 1)[0]
+    return -slope
+
+
+# --- Rayleigh ---
+
+def pressure_at_altitude(altitude_km):
+    """Surface pressure (hPa) of the US Standard Atmosphere 1976 troposphere."""
+    return SEA_LEVEL_PRESSURE * (1 - 2.25577e-5 * np.asarray(altitude_km, dtype=np.float64) * 1000) ** 5.25588
+
+
+def rayleigh_optical_depth(wavelength_um, pressure_hpa=SEA_LEVEL_PRESSURE):
+    """
+    Rayleigh optical depth of a standard atmosphere (Bodhaine et al., 1999, eq. 30),
+    scaled by the surface pressure.
+    """
+    lam2 = np.asarray(wavelength_um, dtype=np.float64) ** 2
+    tau = 0.0021520 * (1.0455996 - 341.29061 / lam2 - 0.90230850 * lam2) \
+        / (1 + 0.0027059889 / lam2 - 85.968563 * lam2)
+    return tau * np.asarray(pressure_hpa, dtype=np.float64) / SEA_LEVEL_PRESSURE
+
+
+def rayleigh_phase(cos_angle):
+    """Rayleigh phase function (normalized to 4 pi over the sphere)."""
+    return 0.75 * (1 + np.asarray(cos_angle, dtype=np.float64) ** 2)
+
+
+def henyey_greenstein(cos_angle, g):
+    """Henyey-Greenstein phase function with asymmetry g (normalized to 4 pi)."""
+    cos_angle = np.asarray(cos_angle, dtype=np.float64)
+    return (1 - g ** 2) / (1 + g ** 2 - 2 * g * cos_angle) ** 1.5
+
+
+def aerosol_optical_depth(wavelength_um, aod550, angstrom=1.3):
+    """Aerosol optical depth from its 550 nm value and Ångström exponent."""
+    return aod550 * (np.asarray(wavelength_um, dtype=np.float64) / 0.55) ** (-angstrom)
@@ -0,0 +1,201 @@
+from functools import lru_cache
+
+import numpy as np
+import pandas as pd
+
+# Catalogue of satellite sensors as two typed columnar tables: one row per sensor
+# (revisit, quantization, swath...) and one row per band (wavelength range in µm,
+# ground sample distance in m) pointing to its sensor by an integer code. Both are
+# built once and indexed by name; queries are boolean masks over the band columns
+# reduced per sensor with np.bincount, so they never loop over rows.
+
+# Spectral regions (µm) used by the queries
+REGIONS = {
+    "VIS": (0.40, 0.70),
+    "NIR": (0.70, 1.30),
+    "SWIR": (1.30, 3.00),
+    "MWIR": (3.00, 8.00),
+    "TIR": (8.00, 15.00),
+    "Microondas": (1e3, 1e6),
+}
+
+# name: (platform / instrument, type, revisit in days, quantization in bits, swath in km, bands)
+# bands: (name, min µm, max µm, GSD m). Revisit of constellations with all satellites;
+# WorldView-3 revisits in under a day at ~1 m GSD (listed as 1).
+_SENSORS = {
+    "Landsat 8": ("Landsat 8 OLI/TIRS", "Optico", 16.0, 12, 185.0, [
+        ("B1", 0.433, 0.453, 30), ("B2", 0.450, 0.515, 30), ("B3", 0.525, 0.600, 30), ("B4", 0.630, 0.680, 30),
+        ("B5", 0.845, 0.885, 30), ("B6", 1.560, 1.660, 30), ("B7", 2.100, 2.300, 30), ("B8", 0.500, 0.680, 15),
+        ("B9", 1.360, 1.390, 30), ("B10", 10.60, 11.19, 100), ("B11", 11.50, 12.51, 100),
+    ]),
+    "Landsat 9": ("Landsat 9 OLI-2/TIRS-2", "Optico", 16.0, 14, 185.0, [
+        ("B1", 0.433, 0.453, 30), ("B2", 0.450, 0.515, 30), ("B3", 0.525, 0.600, 30), ("B4", 0.630, 0.680, 30),
+        ("B5", 0.845, 0.885, 30), ("B6", 1.560, 1.660, 30), ("B7", 2.100, 2.300, 30), ("B8", 0.500, 0.680, 15),
+        ("B9", 1.360, 1.390, 30), ("B10", 10.60, 11.19, 100), ("B11", 11.50, 12.51, 100),
+    ]),
+    "Sentinel-2": ("Sentinel-2A/B MSI", "Optico", 5.0, 12, 290.0, [
+        ("B1", 0.433, 0.453, 60), ("B2", 0.458, 0.523, 10), ("B3", 0.543, 0.578, 10), ("B4", 0.650, 0.680, 10),
+        ("B5", 0.698, 0.713, 20), ("B6", 0.733, 0.748, 20), ("B7", 0.773, 0.793, 20), ("B8", 0.785, 0.900, 10),
+        ("B8A", 0.855, 0.875, 20), ("B9", 0.935, 0.955, 60), ("B10", 1.360, 1.390, 60), ("B11", 1.565, 1.655, 20),
+        ("B12", 2.100, 2.280, 20),
+    ]),
+    "MODIS": ("Terra/Aqua MODIS", "Optico", 1.0, 12, 2330.0, [
+        ("B1", 0.620, 0.670, 250), ("B2", 0.841, 0.876, 250), ("B3", 0.459, 0.479, 500), ("B4", 0.545, 0.565, 500),
+        ("B5", 1.230, 1.250, 500), ("B6", 1.628, 1.652, 500), ("B7", 2.105, 2.155, 500),
+        ("B8", 0.405, 0.420, 1000), ("B9", 0.438, 0.448, 1000), ("B10", 0.483, 0.493, 1000),
+        ("B11", 0.526, 0.536, 1000), ("B12", 0.546, 0.556, 1000), ("B13", 0.662, 0.672, 1000),
+        ("B14", 0.673, 0.683, 1000), ("B15", 0.743, 0.753, 1000), ("B16", 0.862, 0.877, 1000),
+        ("B17", 0.890, 0.920, 1000), ("B18", 0.931, 0.941, 1000), ("B19", 0.915, 0.965, 1000),
+        ("B20", 3.660, 3.840, 1000), ("B21", 3.929, 3.989, 1000), ("B22", 3.929, 3.989, 1000),
+        ("B23", 4.020, 4.080, 1000), ("B24", 4.433, 4.498, 1000), ("B25", 4.482, 4.549, 1000),
+        ("B26", 1.360, 1.390, 1000), ("B27", 6.535, 6.895, 1000), ("B28", 7.175, 7.475, 1000),
+        ("B29", 8.400, 8.700, 1000), ("B30", 9.580, 9.880, 1000), ("B31", 10.780, 11.280, 1000),
+        ("B32", 11.770, 12.270, 1000), ("B33", 13.185, 13.485, 1000), ("B34", 13.485, 13.785, 1000),
+        ("B35", 13.785, 14.085, 1000), ("B36", 14.085, 14.385, 1000),
+    ]),
+    "WorldView-3": ("WorldView-3", "Optico", 1.0, 11, 13.1, [
+        ("PAN", 0.450, 0.800, 0.31),
+        ("Coastal", 0.400, 0.450, 1.24), ("Blue", 0.450, 0.510, 1.24), ("Green", 0.510, 0.580, 1.24),
+        ("Yellow", 0.585, 0.625, 1.24), ("Red", 0.630, 0.690, 1.24), ("Red edge", 0.705, 0.745, 1.24),
+        ("NIR1", 0.770, 0.895, 1.24), ("NIR2", 0.860, 1.040, 1.24),
+        ("SWIR1", 1.195, 1.225, 3.7), ("SWIR2", 1.550, 1.590, 3.7), ("SWIR3", 1.640, 1.680, 3.7),
+        ("SWIR4", 1.710, 1.750, 3.7), ("SWIR5", 2.145, 2.185, 3.7), ("SWIR6", 2.185, 2.225, 3.7),
+        ("SWIR7", 2.235, 2.285, 3.7), ("SWIR8", 2.295, 2.365, 3.7),
+        ("Desert clouds", 0.405, 0.420, 30), ("Aerosol-1", 0.459, 0.509, 30), ("Green CAVIS", 0.525, 0.585, 30),
+        ("Aerosol-2", 0.620, 0.670, 30), ("Water-1", 0.845, 0.885, 30), ("Water-2", 0.897, 0.927, 30),
+        ("Water-3", 0.930, 0.965, 30), ("NDVI-SWIR", 1.220, 1.252, 30), ("Cirrus", 1.350, 1.410, 30),
+        ("Snow", 1.620, 1.680, 30), ("Aerosol-3", 2.105, 2.245, 30), ("Aerosol-3P", 2.105, 2.245, 30),
+    ]),
+    "PlanetScope": ("PlanetScope SuperDove", "Optico", 1.0, 12, 32.5, [
+        ("Coastal", 0.431, 0.452, 3), ("Blue", 0.465, 0.515, 3), ("Green I", 0.513, 0.549, 3),
+        ("Green", 0.547, 0.583, 3), ("Yellow", 0.600, 0.620, 3), ("Red", 0.650, 0.680, 3),
+        ("Red edge", 0.697, 0.713, 3), ("NIR", 0.845, 0.885, 3),
+    ]),
+    "Sentinel-1": ("Sentinel-1 C-SAR (IW)", "Radar", 6.0, 16, 250.0, [
+        ("C (5.405 GHz)", 5.5e4, 5.6e4, 10),
+    ]),
+}
+
+# Sensor names used elsewhere in the repo
+ALIASES = {"Landsat 8/9": "Landsat 8"}
+
+
+@lru_cache(maxsize=1)
+def load_catalog():
+    """
+    Returns (sensors, bands) DataFrames with fixed dtypes: sensors is indexed by name,
+    bands has one row per band with the integer `sensor` code of its sensor.
+    Built once and shared; treat them as read-only.
+    """
+    names = list(_SENSORS)
+    sensors = pd.DataFrame({
+        "code": pd.Series(np.arange(len(names)), dtype="int16"),
+        "name": pd.Series(names, dtype="string"),
+        "instrument": pd.Series([s[0] for s in _SENSORS.values()], dtype="string"),
+        "type": pd.Categorical([s[1] for s in _SENSORS.values()]),
+        "revisit_days": pd.Series([s[2] for s in _SENSORS.values()], dtype="float32"),
+        "bit_depth": pd.Series([s[3] for s in _SENSORS.values()], dtype="int8"),
+        "swath_km": pd.Series([s[4] for s in _SENSORS.values()], dtype="float32"),
+    }).set_index("name")
+
+    rows = [(code, *band) for code, s in enumerate(_SENSORS.values()) for band in s[5]]
+    codes, band_names, wl_min, wl_max, gsd = zip(*rows)
+    bands = pd.DataFrame({
+        "sensor": pd.Series(codes, dtype="int16"),
+        "band": pd.Series(band_names, dtype="string"),
+        "wl_min_um": pd.Series(wl_min, dtype="float64"),
+        "wl_max_um": pd.Series(wl_max, dtype="float64"),
+        "gsd_m": pd.Series(gsd, dtype="float32"),
+    })
+    sensors["n_bands"] = np.bincount(bands["sensor"], minlength=len(names)).astype("int16")
+    sensors["min_gsd_m"] = bands.groupby("sensor")["gsd_m"].min().to_numpy()
+    sensors["max_gsd_m"] = bands.groupby("sensor")["gsd_m"].max().to_numpy()
+    return sensors, bands
+
+
+def resolve(name):
+    """Catalogue name of a sensor (accepts ALIASES); raises ValueError if unknown."""
+    sensors, _ = load_catalog()
+    name = ALIASES.get(name, name)
+    if name not in sensors.index:
+        raise ValueError(f"Sensor desconocido: {name}")
+    return name
+
+
+def sensor(name):
+    """The catalogue row (a Series) of one sensor."""
+    sensors, _ = load_catalog()
+    return sensors.loc[resolve(name)]
+
+
+def bands(name):
+    """Band table of one sensor, sorted by wavelength."""
+    sensors, table = load_catalog()
+    code = sensors.at[resolve(name), "code"]
+    return table[table["sensor"] == code].drop(columns="sensor").sort_values("wl_min_um").reset_index(drop=True)
+
+
+def band_gsd(name, band):
+    """GSD (m) of one band of a sensor."""
+    table = bands(name)
+    match = table.loc[table["band"] == band, "gsd_m"]
+    if match.empty:
+        raise ValueError(f"{name} no tiene la banda {band}")
+    return float(match.iloc[0])
+
+
+def band_centers(name, wl_min_um=0.0, wl_max_um=np.inf):
+    """
+    {band: (centre, full width) in nm} of the bands of a sensor lying inside
+    [wl_min_um, wl_max_um], ordered by lower band edge: the band tables of the other
+    modules are derived from the catalogue with this.
+    """
+    table = bands(name)
+    table = table[(table["wl_min_um"] >= wl_min_um) & (table["wl_max_um"] <= wl_max_um)]
+    centers = (table["wl_min_um"] + table["wl_max_um"]).to_numpy() * 500
+    widths = (table["wl_max_um"] - table["wl_min_um"]).to_numpy() * 1000
+    return {band: (round(float(c), 1), round(float(w), 1)) for band, c, w in zip(table["band"], centers, widths)}
+
+
+def _band_region_mask(table, region):
+    low, high = REGIONS[region]
+    return (table["wl_max_um"].to_numpy() > low) & (table["wl_min_um"].to_numpy() < high)
+
+
+def query(max_gsd=None, covers=(), max_revisit=None, min_bit_depth=None, sensor_type=None):
+    """
+    Names of the sensors that satisfy every given condition.
+
+    `covers` lists REGIONS that must each be seen by at least one band with
+    GSD <= `max_gsd` (without regions, any band must reach `max_gsd`). Example:
+    query(max_gsd=10, covers=["SWIR"], max_revisit=5).
+    """
+    sensors, table = load_catalog()
+    n = len(sensors)
+    codes = table["sensor"].to_numpy()
+    fine = np.ones(len(table), dtype=bool) if max_gsd is None else table["gsd_m"].to_numpy() <= max_gsd
+
+    ok = np.ones(n, dtype=bool)
+    for region in covers:
+        if region not in REGIONS:
+            raise ValueError(f"Region desconocida: {region} (use {', '.join(REGIONS)})")
+        ok &= np.bincount(codes, weights=fine & _band_region_mask(table, region), minlength=n) > 0
+    if not covers:
+        ok &= np.bincount(codes, weights=fine, minlength=n) > 0
+    if max_revisit is not None:
+        ok &= sensors["revisit_days"].to_numpy() <= max_revisit
+    if min_bit_depth is not None:
+        ok &= sensors["bit_depth"].to_numpy() >= min_bit_depth
+    if sensor_type is not None:
+        ok &= (sensors["type"] == sensor_type).to_numpy()
+    return list(sensors.index[ok])
+
+
+def coverage(names=None):
+    """Boolean (sensor x region) table: whether each sensor has a band in each region."""
+    sensors, table = load_catalog()
+    codes = table["sensor"].to_numpy()
+    data = {region: np.bincount(codes, weights=_band_region_mask(table, region), minlength=len(sensors)) > 0
+            for region in REGIONS}
+    out = pd.DataFrame(data, index=sensors.index)
+    return out if names is None else out.loc[[resolve(n) for n in names]]
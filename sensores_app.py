@@ -1,66 +1,65 @@
 import streamlit as st
 import pandas as pd
 
+import sensor_catalog
+
 st.set_page_config(layout="wide")
 st.title("🛰️ Resoluciones de Sensores")
 
-# --- Satellite dataset ---
-data = [
-    {
-        "Satelite": "Landsat 8",
-        "Espacial (m)": "15 (pan), 30 (multiespectral), 100 (térmico)",
-        "Bandas espectrales": 11,
-        "Temporal (dias)": 16,
-        "Radiometrica (bits)": 16
-    },
-    {
-        "Satelite": "Sentinel-2",
-        "Espacial (m)": "10, 20, 60",
-        "Bandas espectrales": 13,
-        "Temporal (dias)": 5,
-        "Radiometrica (bits)": 16
-    },
-    {
-        "Satelite": "MODIS",
-        "Espacial (m)": "250, 500, 1000",
-        "Bandas espectrales": 36,
-        "Temporal (dias)": 1,
-        "Radiometrica (bits)": 12
-    },
-    {
-        "Satelite": "WorldView-3",
-        "Espacial (m)": "0,31 (pan), 1,24 (multiespectral)",
-        "Bandas espectrales": 29,
-        "Temporal (dias)": "<1",
-        "Radiometrica (bits)": 11
-    }
-]
-
-df = pd.DataFrame(data)
+# --- Sensor catalogue (typed tables, loaded once) ---
+sensors, band_table = sensor_catalog.load_catalog()
+
+df = pd.DataFrame({
+    "Satelite": sensors.index,
+    "Espacial min (m)": sensors["min_gsd_m"].to_numpy(),
+    "Espacial max (m)": sensors["max_gsd_m"].to_numpy(),
+    "Bandas espectrales": sensors["n_bands"].to_numpy(),
+    "Temporal (dias)": sensors["revisit_days"].to_numpy(),
+    "Radiometrica (bits)": sensors["bit_depth"].to_numpy(),
+    "Ancho de barrido (km)": sensors["swath_km"].to_numpy(),
+})
 
 # --- Display Table ---
 st.subheader("📊 Comparacion de Resoluciones de Sensores")
-st.dataframe(df, use_container_width=True)
+st.dataframe(df, use_container_width=True, hide_index=True)
+st.dataframe(sensor_catalog.coverage(), use_container_width=True)
+
+# --- Query ---
+st.subheader("🔎 Buscar sensores")
+c1, c2, c3, c4 = st.columns(4)
+max_gsd = c1.number_input("GSD maximo (m)", min_value=0.1, value=10.0, step=1.0)
+covers = c2.multiselect("Regiones espectrales", list(sensor_catalog.REGIONS), default=["SWIR"])
+max_revisit = c3.number_input("Revisita maxima (dias)", min_value=0.5, value=5.0, step=0.5)
+min_bits = c4.number_input("Bits minimos", min_value=1, max_value=16, value=8)
+matches = sensor_catalog.query(max_gsd=max_gsd, covers=covers, max_revisit=max_revisit, min_bit_depth=min_bits)
+if matches:
+    st.success("Sensores que cumplen: " + ", ".join(matches))
+else:
+    st.warning("Ningun sensor del catalogo cumple todas las condiciones.")
 
 # --- Satellite Selection ---
-sat1 = st.selectbox("Seleccione Satelite 1", df["Satelite"])
-sat2 = st.selectbox("Seleccione Satelite 2", df["Satelite"], index=1)
-
-row1 = df[df["Satelite"] == sat1].iloc[0]
-row2 = df[df["Satelite"] == sat2].iloc[0]
+sat1 = st.selectbox("Seleccione Satelite 1", list(sensors.index))
+sat2 = st.selectbox("Seleccione Satelite 2", list(sensors.index), index=1)
 
 # --- Comparison Display ---
 st.subheader("⚖️ Comparacion")
 
 col1, col2 = st.columns(2)
 
-with col1:
-    st.markdown(f"### {sat1}")
-    st.json(row1.to_dict())
-
-with col2:
-    st.markdown(f"### {sat2}")
-    st.json(row2.to_dict())
+for col, sat in ((col1, sat1), (col2, sat2)):
+    with col:
+        st.markdown(f"### {sat}")
+        row = sensor_catalog.sensor(sat)
+        st.json({
+            "Instrumento": row["instrument"],
+            "Tipo": row["type"],
+            "Temporal (dias)": float(row["revisit_days"]),
+            "Radiometrica (bits)": int(row["bit_depth"]),
+            "Niveles digitales": 2 ** int(row["bit_depth"]),
+        })
+        st.dataframe(sensor_catalog.bands(sat).rename(columns={
+            "band": "Banda", "wl_min_um": "Desde (µm)", "wl_max_um": "Hasta (µm)", "gsd_m": "GSD (m)"
+        }), use_container_width=True, hide_index=True)
 
 # --- Explanation Section ---
 st.subheader("📘 Que significan estas resoluciones?")
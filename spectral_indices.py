@@ -0,0 +1,254 @@
+import ast
+
+import numpy as np
+from rasterio.windows import Window
+
+import composites
+import hsi_analysis
+
+# Spectral indices are written as expressions over common band names ("nir",
+# "red", ...). All requested indices are lowered together into one program of
+# in-place NumPy ufunc calls: identical sub-expressions (e.g. nir - red in NDVI,
+# SAVI and EVI) are computed once, every step writes into a preallocated buffer
+# that is recycled as soon as its value is dead, and each index is written straight
+# into its output array. The bands are then read once per row tile and every index
+# is evaluated on that tile, so no full-scene float temporaries are created.
+
+INDICES = {
+    "NDVI": "(nir - red) / (nir + red)",
+    "NDWI": "(green - nir) / (green + nir)",
+    "NBR": "(nir - swir2) / (nir + swir2)",
+    "SAVI": "1.5 * (nir - red) / (nir + red + 0.5)",
+    "EVI": "2.5 * (nir - red) / (nir + 6 * red - 7.5 * blue + 1)",
+    "NDBI": "(swir1 - nir) / (swir1 + nir)",
+}
+
+BAND_NAMES = ("coastal", "blue", "green", "red", "nir", "swir1", "swir2", "pan")
+
+# Surface-reflectance scaling of the Level-2 products: reflectance = DN * scale + offset
+REFLECTANCE = {
+    "Landsat 8/9": (2.75e-5, -0.2),
+    "Sentinel-2": (1e-4, 0.0),
+}
+
+TILE_ROWS = 512
+
+_BINOPS = {
+    ast.Add: ("add", np.add),
+    ast.Sub: ("subtract", np.subtract),
+    ast.Mult: ("multiply", np.multiply),
+    ast.Div: ("divide", np.divide),
+    ast.Pow: ("power", np.power),
+}
+_COMMUTATIVE = {"add", "multiply"}
+
+
+def required_bands(expression):
+    """Returns the band names used by an index expression."""
+    return sorted({
+        node.id for node in ast.walk(ast.parse(expression, mode="eval"))
+        if isinstance(node, ast.Name) and node.id not in hsi_analysis.FUNCTIONS
+    })
+
+
+def available_indices(bands):
+    """Returns the names of the predefined indices that can be computed from `bands`."""
+    return [name for name, expr in INDICES.items() if set(required_bands(expr)) <= set(bands)]
+
+
+class IndexProgram:
+    """
+    A set of index expressions compiled into a single sequence of ufunc steps.
+
+    `bands` lists the band names the program reads (in order), `names` the indices
+    it writes. Operands are ("band", i), ("const", value), ("tmp", slot) or
+    ("out", name); `n_buffers` scratch buffers of the tile shape are needed.
+    """
+
+    def __init__(self, expressions):
+        self.names = list(expressions)
+        self.bands = []
+        self._nodes = {}   # canonical sub-expression -> virtual register or operand
+        self._steps = []   # (ufunc, operands, virtual register)
+        roots = {name: self._lower(self._parse(expr)) for name, expr in expressions.items()}
+        self._allocate(roots)
+
+    # --- Parsing and lowering ---
+
+    @staticmethod
+    def _parse(expression):
+        def check_band(name):
+            if name not in BAND_NAMES:
+                raise ValueError(f"Banda desconocida: {name} (use {', '.join(BAND_NAMES)})")
+
+        return hsi_analysis.parse_expression(expression, check_band).body
+
+    def _lower(self, node):
+        if isinstance(node, ast.Constant) and isinstance(node.value, (int, float)):
+            return ("const", float(node.value))
+        if isinstance(node, ast.Name):
+            if node.id not in self.bands:
+                self.bands.append(node.id)
+            return ("band", self.bands.index(node.id))
+        if isinstance(node, ast.UnaryOp) and isinstance(node.op, (ast.USub, ast.UAdd)):
+            operand = self._lower(node.operand)
+            if isinstance(node.op, ast.UAdd):
+                return operand
+            return self._emit("negative", np.negative, [operand])
+        if isinstance(node, ast.BinOp) and type(node.op) in _BINOPS:
+            key, ufunc = _BINOPS[type(node.op)]
+            return self._emit(key, ufunc, [self._lower(node.left), self._lower(node.right)])
+        if isinstance(node, ast.Call):
+            name = node.func.id
+            return self._emit(name, hsi_analysis.FUNCTIONS[name], [self._lower(arg) for arg in node.args])
+        raise ValueError(f"Operacion no permitida: {type(node).__name__}")
+
+    def _emit(self, key, ufunc, operands):
+        if all(op[0] == "const" for op in operands):
+            return ("const", float(ufunc(*[op[1] for op in operands])))  # constant folding
+        canonical = (key, *(sorted(operands) if key in _COMMUTATIVE else operands))
+        if canonical not in self._nodes:
+            self._nodes[canonical] = ("reg", len(self._steps))
+            self._steps.append((ufunc, operands, len(self._steps)))
+        return self._nodes[canonical]
+
+    # --- Buffer allocation ---
+
+    def _allocate(self, roots):
+        """Maps virtual registers to output arrays or to a minimal set of recycled buffers."""
+        outputs = {}
+        for name, root in roots.items():
+            if root[0] == "reg" and root[1] not in outputs:
+                outputs[root[1]] = name
+        last_use = {}
+        for i, (_, operands, _) in enumerate(self._steps):
+            for op in operands:
+                if op[0] == "reg":
+                    last_use[op[1]] = i
+
+        free, location, self.n_buffers = [], {}, 0
+        self.steps = []
+        for i, (ufunc, operands, reg) in enumerate(self._steps):
+            resolved = [location[op[1]] if op[0] == "reg" else op for op in operands]
+            # Inputs dying here can hold the result (ufuncs allow out aliasing); a register
+            # used twice by the step (x * x) is freed once
+            for reg_in in sorted({op[1] for op in operands if op[0] == "reg"}):
+                if last_use[reg_in] == i and location[reg_in][0] == "tmp":
+                    free.append(location[reg_in][1])
+            if reg in outputs:
+                location[reg] = ("out", outputs[reg])
+            elif free:
+                location[reg] = ("tmp", free.pop())
+            else:
+                location[reg] = ("tmp", self.n_buffers)
+                self.n_buffers += 1
+            self.steps.append((ufunc, resolved, location[reg]))
+
+        # Indices that are a copy of another index, a band or a constant
+        self.copies = []
+        for name, root in roots.items():
+            source = location[root[1]] if root[0] == "reg" else root
+            if source != ("out", name):
+                self.copies.append((name, source))
+
+    # --- Evaluation ---
+
+    def run(self, bands, out, buffers=None):
+        """
+        Evaluates every index on one tile.
+
+        `bands` is a list of float32 tiles ordered like `self.bands`, `out` maps each
+        index name to its (writable, float32) output tile.
+        """
+        if buffers is None:
+            buffers = [np.empty_like(bands[0]) for _ in range(self.n_buffers)]
+
+        def value(op):
+            kind, ref = op
+            if kind == "const":
+                return ref
+            if kind == "band":
+                return bands[ref]
+            if kind == "tmp":
+                return buffers[ref]
+            return out[ref]
+
+        with np.errstate(divide="ignore", invalid="ignore", over="ignore"):
+            for ufunc, operands, target in self.steps:
+                ufunc(*[value(op) for op in operands], out=value(target))
+        for name, source in self.copies:
+            out[name][...] = value(source)
+
+
+def compile_indices(expressions):
+    """Compiles a {name: expression} mapping (or a list of predefined index names) into an IndexProgram."""
+    if not isinstance(expressions, dict):
+        expressions = {name: INDICES[name] for name in expressions}
+    return IndexProgram(expressions)
+
+
+def evaluate(bands, expressions, scale=None, tile_rows=TILE_ROWS):
+    """
+    Computes several indices in one pass over row tiles of in-memory bands.
+
+    `bands` maps band names to (h, w) arrays (memory-mapped arrays work too),
+    `expressions` is a {name: expression} mapping or a list of names from INDICES and
+    `scale` an optional (scale, offset) pair converting DNs to reflectance. Pixels with
+    DN 0 in any band, and undefined results, are NaN. Returns {name: float32 array}.
+    """
+    program = compile_indices(expressions)
+    missing = [b for b in program.bands if b not in bands]
+    if missing:
+        raise ValueError(f"Faltan bandas: {', '.join(missing)}")
+    height, width = np.shape(bands[program.bands[0]])
+
+    def read_tile(row, rows):
+        return [np.asarray(bands[b][row:row + rows]) for b in program.bands]
+
+    return _evaluate_tiles(program, read_tile, height, width, scale, tile_rows)
+
+
+def evaluate_raster(source, sensor, expressions, reflectance=True, tile_rows=TILE_ROWS):
+    """
+    Computes several indices from a multi-band stack (path or uploaded file), reading
+    only the needed bands, one row window at a time.
+
+    Returns ({name: float32 array}, transform, crs).
+    """
+    program = compile_indices(expressions)
+    info = composites.band_info(source)
+    indexes = [composites.band_index(info, sensor, b) for b in program.bands]
+    scale = REFLECTANCE.get(sensor) if reflectance else None
+
+    with composites.open_raster(source) as src:
+        def read_tile(row, rows):
+            return list(src.read(indexes, window=Window(0, row, src.width, rows)))
+
+        result = _evaluate_tiles(program, read_tile, src.height, src.width, scale, tile_rows)
+        return result, src.transform, src.crs
+
+
+def _evaluate_tiles(program, read_tile, height, width, scale, tile_rows):
+    out = {name: np.empty((height, width), dtype=np.float32) for name in program.names}
+    buffers, tiles = None, None
+    for row in range(0, height, tile_rows):
+        rows = min(tile_rows, height - row)
+        raw = read_tile(row, rows)
+        if buffers is None or buffers[0].shape[0] != rows:
+            buffers = [np.empty((rows, width), np.float32) for _ in range(max(program.n_buffers, 1))]
+            tiles = [np.empty((rows, width), np.float32) for _ in program.bands]
+            nodata = np.empty((rows, width), bool)
+
+        nodata[...] = False
+        for tile, band in zip(tiles, raw):
+            np.logical_or(nodata, band == 0, out=nodata)
+            np.copyto(tile, band, casting="unsafe")
+            if scale is not None:
+                tile *= scale[0]
+                tile += scale[1]
+
+        out_tiles = {name: out[name][row:row + rows] for name in program.names}
+        program.run(tiles, out_tiles, buffers)
+        for tile in out_tiles.values():
+            tile[nodata | ~np.isfinite(tile)] = np.nan
+    return out
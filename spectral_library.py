@@ -0,0 +1,287 @@
+import numpy as np
+from scipy import sparse
+
+import radiometry
+import sensor_catalog
+
+# Reflectance spectral library. Spectra have different lengths and wavelength
+# grids, so they are stored like a CSR matrix: all wavelengths (nm) and values
+# concatenated in two float32 arrays plus an int64 offsets array (spectrum i is
+# [offsets[i], offsets[i + 1])). Spectra that share a wavelength grid (a whole
+# USGS or ECOSTRESS collection usually does) are grouped, and band values for a
+# sensor are one sparse (bands x samples) matrix per grid times the dense block
+# of its spectra. The matrices are built once per (grid, sensor) and kept.
+
+KEY_STRIDE = 1e6          # nm, larger than any wavelength of a spectrum
+DELETED = -1e30           # USGS marks deleted channels with -1.23e34
+PLOT_RANGE = (400, 2500)  # nm
+
+# Simplified laboratory-like reflectance spectra (nm, reflectance)
+SAMPLE_SPECTRA = {
+    "Vegetacion": (
+        [400, 450, 500, 550, 600, 650, 680, 700, 720, 750, 800, 900, 1000, 1100, 1200, 1300, 1400, 1450,
+         1500, 1600, 1700, 1800, 1900, 1950, 2000, 2100, 2200, 2300, 2400, 2500],
+        [0.04, 0.05, 0.06, 0.12, 0.07, 0.04, 0.035, 0.10, 0.25, 0.45, 0.50, 0.52, 0.50, 0.48, 0.42, 0.40, 0.25,
+         0.15, 0.20, 0.30, 0.32, 0.28, 0.10, 0.06, 0.10, 0.18, 0.20, 0.17, 0.12, 0.08],
+    ),
+    "Agua": (
+        [400, 450, 500, 550, 600, 650, 700, 750, 800, 900, 1000, 1200, 1500, 2500],
+        [0.06, 0.07, 0.06, 0.05, 0.03, 0.02, 0.015, 0.01, 0.008, 0.005, 0.003, 0.002, 0.001, 0.001],
+    ),
+    "Suelo seco": (
+        [400, 500, 600, 700, 800, 900, 1000, 1200, 1400, 1450, 1500, 1700, 1900, 1950, 2000, 2100, 2200,
+         2300, 2500],
+        [0.10, 0.15, 0.22, 0.27, 0.30, 0.32, 0.34, 0.37, 0.36, 0.33, 0.37, 0.41, 0.37, 0.34, 0.38, 0.41,
+         0.39, 0.38, 0.35],
+    ),
+    "Nieve/hielo": (
+        [400, 500, 600, 700, 800, 900, 1000, 1030, 1100, 1250, 1300, 1400, 1500, 1600, 1700, 1800, 1900,
+         2000, 2200, 2500],
+        [0.95, 0.96, 0.94, 0.90, 0.85, 0.78, 0.62, 0.55, 0.60, 0.40, 0.42, 0.15, 0.04, 0.03, 0.06, 0.10,
+         0.05, 0.02, 0.04, 0.01],
+    ),
+}
+
+# Band centre and width (nm; the width is used as the FWHM of a Gaussian response)
+# of the reflective bands, from the sensor catalogue
+SENSOR_BANDS = {
+    sensor: sensor_catalog.band_centers(sensor, PLOT_RANGE[0] / 1000, PLOT_RANGE[1] / 1000)
+    for sensor in ("Landsat 8/9", "Sentinel-2", "MODIS")
+}
+
+
+# --- ASCII spectra ---
+
+def _is_number(token):
+    try:
+        float(token)
+        return True
+    except ValueError:
+        return False
+
+
+def _split_ascii(text):
+    """Returns (header lines, data text) of an ASCII spectrum: data starts at the first numeric line."""
+    lines = text.splitlines()
+    for i, line in enumerate(lines):
+        tokens = line.replace(",", " ").split()
+        if tokens and all(_is_number(t) for t in tokens):
+            return lines[:i], "\n".join(lines[i:]).replace(",", " ")
+    raise ValueError("El archivo no contiene datos numericos")
+
+
+def parse_wavelengths(text):
+    """Reads a one-column USGS wavelength file; returns wavelengths in nm."""
+    _, data = _split_ascii(text)
+    wavelengths = np.array(data.split(), dtype=np.float64)
+    return wavelengths * 1000 if np.nanmax(wavelengths) < 100 else wavelengths
+
+
+def parse_spectrum(text, name=None, wavelengths=None):
+    """
+    Reads an ASCII reflectance spectrum.
+
+    Understands ECOSTRESS/ASTER files ("Key: value" header, two columns, X/Y units
+    in the header) and USGS splib07 files (one "Record=" title line and one column
+    of values, with the wavelengths of the collection given separately in nm).
+    Micrometres become nm and percent becomes 0-1; deleted channels are dropped.
+    Returns a record {"name", "category", "wavelengths", "values"}.
+    """
+    header, data = _split_ascii(text)
+    fields = {}
+    for line in header:
+        key, sep, value = line.partition(":")
+        if sep and key.strip() and "Record=" not in key:
+            fields[key.strip().lower()] = value.strip()
+    title = next((line for line in header if "Record=" in line), "")
+    name = name or fields.get("name") or title.partition(":")[2].strip() or "Espectro"
+
+    first = data.split("\n", 1)[0].split()
+    table = np.array(data.split(), dtype=np.float64)
+    if len(first) >= 2:
+        table = table.reshape(-1, len(first))
+        wl, values = table[:, 0], table[:, 1]
+        x_units = fields.get("x units", "").lower()
+        if "micro" in x_units or (not x_units and np.nanmax(wl) < 100):
+            wl = wl * 1000
+    else:
+        if wavelengths is None:
+            raise ValueError(f"{name}: una sola columna, cargue el archivo de longitudes de onda")
+        wl, values = np.asarray(wavelengths, dtype=np.float64), table
+        if len(wl) != len(values):
+            raise ValueError(f"{name}: {len(values)} valores para {len(wl)} longitudes de onda")
+
+    valid = np.isfinite(values) & (values > DELETED) & np.isfinite(wl)
+    wl, values = wl[valid], values[valid]
+    if "percent" in fields.get("y units", "").lower() or (values.size and np.nanmax(values) > 1.5):
+        values = values / 100
+    wl, first_index = np.unique(wl, return_index=True)
+    if len(wl) < 2:
+        raise ValueError(f"{name}: el espectro necesita al menos dos muestras validas")
+    category = fields.get("type") or fields.get("class") or ("USGS" if title else "Importado")
+    return {"name": name, "category": category, "wavelengths": wl, "values": values[first_index]}
+
+
+# --- Library ---
+
+class SpectralLibrary:
+    """Variable-length reflectance spectra in CSR layout (float32 values, int64 offsets)."""
+
+    def __init__(self, names, categories, wavelengths, values, offsets):
+        self.names = list(names)
+        self.categories = list(categories)
+        self.wavelengths = np.asarray(wavelengths, dtype=np.float32)
+        self.values = np.asarray(values, dtype=np.float32)
+        self.offsets = np.asarray(offsets, dtype=np.int64)
+        self._index = {name: i for i, name in enumerate(self.names)}
+        spectrum = np.repeat(np.arange(len(self.names)), np.diff(self.offsets))
+        self._keys = spectrum * KEY_STRIDE + self.wavelengths.astype(np.float64)
+
+        # Group spectra that share a wavelength grid
+        grid_of = {}
+        self.grid_ids = np.empty(len(self.names), dtype=np.int64)
+        self.grids = []
+        for i in range(len(self.names)):
+            wl = self.wavelengths[self.offsets[i]:self.offsets[i + 1]]
+            key = (len(wl), hash(wl.tobytes()))
+            if key not in grid_of:
+                grid_of[key] = len(self.grids)
+                self.grids.append(wl)
+            self.grid_ids[i] = grid_of[key]
+        self._matrices = {}
+
+    @classmethod
+    def from_records(cls, records):
+        """Builds a library from records as returned by `parse_spectrum`; repeated names get a suffix."""
+        names, categories, wavelengths, values, offsets = [], [], [], [], [0]
+        seen = set()
+        for record in records:
+            name, n = record["name"], 2
+            while name in seen:
+                name, n = f"{record['name']} ({n})", n + 1
+            seen.add(name)
+            wl = np.asarray(record["wavelengths"], dtype=np.float64)
+            refl = np.asarray(record["values"], dtype=np.float64)
+            if wl.shape != refl.shape or np.any(np.diff(wl) <= 0):
+                raise ValueError(f"Espectro invalido para {name}: longitudes de onda crecientes requeridas")
+            names.append(name)
+            categories.append(record.get("category", ""))
+            wavelengths.append(wl)
+            values.append(refl)
+            offsets.append(offsets[-1] + len(wl))
+        if not names:
+            raise ValueError("La biblioteca no tiene espectros")
+        return cls(names, categories, np.concatenate(wavelengths), np.concatenate(values), offsets)
+
+    @classmethod
+    def from_curves(cls, curves, category="Ejemplo"):
+        """Builds a library from a {name: (wavelengths in nm, reflectance)} mapping."""
+        return cls.from_records({"name": name, "category": category, "wavelengths": wl, "values": refl}
+                                for name, (wl, refl) in curves.items())
+
+    def records(self):
+        """Yields every spectrum as a record (to merge libraries)."""
+        for i, name in enumerate(self.names):
+            start, end = self.offsets[i], self.offsets[i + 1]
+            yield {"name": name, "category": self.categories[i],
+                   "wavelengths": self.wavelengths[start:end], "values": self.values[start:end]}
+
+    def save(self, path):
+        """Writes the columnar arrays to a .npz file."""
+        np.savez(path, names=np.array(self.names), categories=np.array(self.categories),
+                 wavelengths=self.wavelengths, values=self.values, offsets=self.offsets)
+
+    @classmethod
+    def load(cls, path):
+        with np.load(path) as data:
+            return cls(data["names"].tolist(), data["categories"].tolist(),
+                       data["wavelengths"], data["values"], data["offsets"])
+
+    def __len__(self):
+        return len(self.names)
+
+    def index(self, name):
+        return self._index[name]
+
+    def curve(self, name):
+        """Returns the (wavelengths in nm, reflectance) samples of one spectrum."""
+        i = self.index(name)
+        start, end = self.offsets[i], self.offsets[i + 1]
+        return self.wavelengths[start:end], self.values[start:end]
+
+    def resample(self, grid, members=None):
+        """
+        Returns a (spectra, len(grid)) float32 matrix of the spectra linearly
+        interpolated on `grid` (nm); NaN outside each spectrum's range.
+        """
+        grid = np.asarray(grid, dtype=np.float64)
+        members = np.arange(len(self)) if members is None else np.asarray(members)
+        starts = self.offsets[members][:, None]
+        ends = self.offsets[members + 1][:, None] - 1
+
+        keys = members[:, None] * KEY_STRIDE + grid[None, :]
+        upper = np.clip(np.searchsorted(self._keys, keys), starts + 1, ends)
+        lower = upper - 1
+        x0, x1 = self._keys[lower], self._keys[upper]
+        t = (keys - x0) / (x1 - x0)
+        out = self.values[lower] * (1 - t) + self.values[upper] * t
+        out[(t < 0) | (t > 1)] = np.nan
+        return out.astype(np.float32)
+
+    def band_matrix(self, grid_id, sensor):
+        """
+        Sparse (bands, samples) resampling matrix of one wavelength grid for a sensor:
+        each row holds the normalized response-weighted trapezoid weights of a band
+        (or linear-interpolation weights at the band centre when the grid is coarser
+        than the band). Bands whose centre lies off the grid get an empty row.
+        Built once per (grid, sensor).
+        """
+        key = (grid_id, sensor)
+        if key not in self._matrices:
+            grid = self.grids[grid_id].astype(np.float64)
+            dl = radiometry.trapezoid_weights(grid)
+            rows, cols, weights = [], [], []
+            for row, (center, fwhm) in enumerate(SENSOR_BANDS[sensor].values()):
+                if not grid[0] <= center <= grid[-1]:
+                    continue
+                response_um, srf = radiometry.gaussian_response(center / 1000, fwhm / 1000)
+                w = np.interp(grid, response_um * 1000, srf, left=0, right=0) * dl
+                (nonzero,) = np.nonzero(w)
+                if nonzero.size < 2:
+                    upper = int(np.clip(np.searchsorted(grid, center), 1, len(grid) - 1))
+                    t = (center - grid[upper - 1]) / (grid[upper] - grid[upper - 1])
+                    nonzero, w = np.array([upper - 1, upper]), np.zeros_like(grid)
+                    w[nonzero] = (1 - t, t)
+                rows.extend([row] * nonzero.size)
+                cols.extend(nonzero)
+                weights.extend(w[nonzero] / w[nonzero].sum())
+            self._matrices[key] = sparse.csr_matrix(
+                (weights, (rows, cols)), shape=(len(SENSOR_BANDS[sensor]), len(grid)), dtype=np.float32
+            )
+        return self._matrices[key]
+
+    def sensor_values(self, sensor, members=None):
+        """
+        Band-equivalent reflectance of spectra for a sensor.
+
+        Returns (band names, (spectra, bands) float32 array); NaN for bands outside a
+        spectrum's wavelength range. One sparse product per distinct wavelength grid.
+        """
+        members = np.arange(len(self)) if members is None else np.asarray(members, dtype=np.int64)
+        bands = list(SENSOR_BANDS[sensor])
+        out = np.full((len(members), len(bands)), np.nan, dtype=np.float32)
+        grid_ids = self.grid_ids[members]
+        for grid_id in np.unique(grid_ids):
+            (rows,) = np.nonzero(grid_ids == grid_id)
+            n = len(self.grids[grid_id])
+            block = self.values[self.offsets[members[rows]][:, None] + np.arange(n)]
+            matrix = self.band_matrix(int(grid_id), sensor)
+            values = (matrix @ block.T).T
+            covered = np.diff(matrix.indptr) > 0
+            out[np.ix_(rows, np.nonzero(covered)[0])] = values[:, covered]
+        return bands, out
+
+
+def sample_library():
+    """The built-in SAMPLE_SPECTRA as a SpectralLibrary."""
+    return SpectralLibrary.from_curves(SAMPLE_SPECTRA)
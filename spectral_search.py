@@ -0,0 +1,171 @@
+import time
+
+import numpy as np
+
+import hsi_analysis
+
+# Nearest-neighbour search of spectra against a library. Library spectra are
+# (optionally continuum-removed and) normalized to unit length once, and kept as a
+# contiguous (bands, spectra) float32 matrix, so the cosine between a batch of
+# queries and every library spectrum is one matrix product; the spectral angle is
+# arccos of the cosine, so both metrics share the same ranking. For whole images
+# the pixels and the library are both processed in blocks, and only a running
+# top-k per pixel is kept, so a million pixels against ten thousand spectra never
+# materializes the full (pixels x spectra) matrix.
+
+METRICS = ("SAM", "coseno")
+PIXEL_BLOCK = 8192     # pixels per block of the whole-image search
+LIBRARY_BLOCK = 4096   # library spectra per block
+
+
+# --- Continuum removal ---
+
+def upper_hull_mask(spectra, wavelengths):
+    """
+    Marks the vertices of the upper convex hull of every spectrum (rows of `spectra`).
+
+    Vectorized over rows: points lying on or below the chord between their current
+    neighbours cannot be hull vertices and are dropped together, until none is left.
+    """
+    y = np.asarray(spectra, dtype=np.float64)
+    x = np.asarray(wavelengths, dtype=np.float64)
+    n = y.shape[1]
+    idx = np.arange(n)
+    keep = np.ones(y.shape, dtype=bool)
+    rows = np.arange(y.shape[0])[:, None]
+    while True:
+        prev = np.maximum.accumulate(np.where(keep, idx, -1), axis=1)
+        prev = np.concatenate([np.full((y.shape[0], 1), -1), prev[:, :-1]], axis=1)
+        nxt = np.minimum.accumulate(np.where(keep, idx, n)[:, ::-1], axis=1)[:, ::-1]
+        nxt = np.concatenate([nxt[:, 1:], np.full((y.shape[0], 1), n)], axis=1)
+        interior = keep & (prev >= 0) & (nxt < n)
+        p, q = np.where(interior, prev, 0), np.where(interior, nxt, 0)
+        chord = y[rows, p] + (y[rows, q] - y[rows, p]) * (x - x[p]) / np.where(interior, x[q] - x[p], 1)
+        below = interior & (y <= chord)
+        if not below.any():
+            return keep
+        keep &= ~below
+
+
+def continuum_removed(spectra, wavelengths):
+    """Divides each spectrum by its convex-hull continuum (1 on the hull, < 1 in absorption features)."""
+    y = np.asarray(spectra, dtype=np.float64)
+    x = np.asarray(wavelengths, dtype=np.float64)
+    keep = upper_hull_mask(y, x)
+    n = y.shape[1]
+    idx = np.arange(n)
+    rows = np.arange(y.shape[0])[:, None]
+    prev = np.maximum.accumulate(np.where(keep, idx, -1), axis=1)
+    nxt = np.minimum.accumulate(np.where(keep, idx, n)[:, ::-1], axis=1)[:, ::-1]
+    span = np.where(nxt > prev, x[nxt] - x[prev], 1)
+    continuum = y[rows, prev] + (y[rows, nxt] - y[rows, prev]) * (x - x[prev]) / span
+    with np.errstate(divide="ignore", invalid="ignore"):
+        out = np.where(continuum > 0, y / continuum, 0.0)
+    return out.astype(np.float32)
+
+
+def _unit_rows(matrix):
+    matrix = np.asarray(matrix, dtype=np.float32)
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return matrix / norms
+
+
+def _top_k(scores, k):
+    """Column indexes and values of the k largest scores of every row, best first."""
+    k = min(k, scores.shape[1])
+    if k == 1:  # argmax is much cheaper than a partition
+        best = np.argmax(scores, axis=1)[:, None]
+        return best, np.take_along_axis(scores, best, axis=1)
+    part = np.argpartition(-scores, k - 1, axis=1)[:, :k]
+    values = np.take_along_axis(scores, part, axis=1)
+    order = np.argsort(-values, axis=1)
+    return np.take_along_axis(part, order, axis=1), np.take_along_axis(values, order, axis=1)
+
+
+class SpectralIndex:
+    """Precomputed unit-normalized library matrix for cosine / spectral-angle search."""
+
+    def __init__(self, spectra, names, wavelengths, continuum=False):
+        spectra = np.asarray(spectra, dtype=np.float32)
+        if spectra.ndim != 2 or spectra.shape[1] != len(wavelengths):
+            raise ValueError(f"Los espectros deben tener forma (n, {len(wavelengths)})")
+        self.names = list(names)
+        self.wavelengths = np.asarray(wavelengths, dtype=np.float64)
+        self.continuum = continuum
+        # Only bands defined for every library spectrum take part in the search
+        self.band_mask = np.isfinite(spectra).all(axis=0)
+        if not self.band_mask.any():
+            raise ValueError("Ninguna banda es comun a todos los espectros de la biblioteca")
+        self.matrix = np.ascontiguousarray(self._prepare(spectra).T)  # (bands, spectra)
+
+    @classmethod
+    def from_library(cls, library, wavelengths, continuum=False):
+        """Index of a spectral_library.SpectralLibrary resampled to `wavelengths` (nm), e.g. an image's bands."""
+        return cls(library.resample(wavelengths), library.names, wavelengths, continuum)
+
+    def __len__(self):
+        return len(self.names)
+
+    def _prepare(self, spectra):
+        """Selects the indexed bands, removes the continuum if requested and normalizes rows."""
+        spectra = np.asarray(spectra, dtype=np.float32)[:, self.band_mask]
+        if self.continuum:
+            spectra = continuum_removed(spectra, self.wavelengths[self.band_mask])
+        return _unit_rows(np.nan_to_num(spectra))
+
+    def _scores(self, cosine, metric):
+        if metric == "SAM":
+            return np.arccos(np.clip(cosine, -1.0, 1.0))
+        if metric == "coseno":
+            return cosine
+        raise ValueError(f"Metrica desconocida: {metric} (use {', '.join(METRICS)})")
+
+    def query(self, spectra, k=5, metric="SAM"):
+        """
+        Top-k library matches of a batch of spectra ((bands,) or (n, bands)).
+
+        Returns (indexes (n, k), scores (n, k)): spectral angles in radians (ascending)
+        for "SAM", cosine similarities (descending) for "coseno".
+        """
+        spectra = np.atleast_2d(spectra)
+        cosine = self._prepare(spectra) @ self.matrix
+        best, best_cos = _top_k(cosine, k)
+        return best, self._scores(best_cos, metric)
+
+    def match_image(self, cube, k=1, max_angle=None, metric="SAM",
+                    pixel_block=PIXEL_BLOCK, library_block=LIBRARY_BLOCK):
+        """
+        Matches every pixel of a (rows, cols, bands) cube against the library by
+        blocked matrix multiplication, keeping a running top-k per pixel.
+
+        Returns (indexes int32 (rows, cols, k), scores float32 (rows, cols, k), seconds);
+        indexes are -1 where the angle exceeds `max_angle` (radians).
+        """
+        rows, cols, bands = cube.shape
+        if bands != len(self.wavelengths):
+            raise ValueError(f"El cubo tiene {bands} bandas y la biblioteca {len(self.wavelengths)}")
+        k = min(k, len(self))
+        labels = np.empty((rows, cols, k), dtype=np.int32)
+        scores = np.empty((rows, cols, k), dtype=np.float32)
+        tile_rows = max(1, pixel_block // cols)
+
+        start = time.perf_counter()
+        for sl, tile in hsi_analysis.iter_tiles(cube, tile_rows):
+            X = self._prepare(tile.reshape(-1, bands))
+            best = np.empty((len(X), 0), dtype=np.int64)
+            best_cos = np.empty((len(X), 0), dtype=np.float32)
+            for j in range(0, len(self), library_block):
+                cosine = X @ self.matrix[:, j:j + library_block]
+                block_best, block_cos = _top_k(cosine, k)
+                merged = np.concatenate([best_cos, block_cos], axis=1)
+                candidates = np.concatenate([best, block_best + j], axis=1)
+                keep, best_cos = _top_k(merged, k)
+                best = np.take_along_axis(candidates, keep, axis=1)
+            values = self._scores(best_cos, metric)
+            if max_angle is not None:
+                best[np.arccos(np.clip(best_cos, -1.0, 1.0)) > max_angle] = -1
+            n = sl.stop - sl.start
+            labels[sl] = best.reshape(n, cols, k)
+            scores[sl] = values.reshape(n, cols, k)
+        return labels, scores, time.perf_counter() - start
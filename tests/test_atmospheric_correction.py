@@ -0,0 +1,67 @@
+import numpy as np
+import pytest
+import rasterio
+from rasterio.transform import from_origin
+
+import atmospheric_correction as ac
+
+GEOMETRY = {"sun_zenith": 35.0, "altitude_km": 0.5, "aerosol": "Sulfato (aerosol urbano)"}
+
+
+def test_dark_object_dn_from_histogram():
+    hist = np.zeros(65536, np.int64)
+    hist[0] = 1000          # no-data, ignored
+    hist[300] = 20          # the darkest 0.02 % of the valid pixels
+    hist[500:1500] = 100
+    assert ac.dark_object_dn(hist) == 300
+    assert ac.dark_object_dn(hist, fraction=0.01) == 509
+
+
+def _scene(tmp_path, dn):
+    path = tmp_path / "l1c.tif"
+    with rasterio.open(path, "w", driver="GTiff", width=dn.shape[2], height=dn.shape[1], count=dn.shape[0],
+                       dtype="uint16", crs="EPSG:32618", transform=from_origin(500000, 500000, 10, 10)) as dst:
+        dst.write(dn)
+        dst.descriptions = ("B2", "B4", "B8")
+    return path
+
+
+def test_dos_coefficients_and_correction(tmp_path):
+    rng = np.random.default_rng(0)
+    dn = rng.integers(1500, 4000, (3, 200, 100)).astype(np.uint16)
+    dn[:, 0, :5] = [[1100], [1200], [1300]]  # dark pixels: 5 of 20000 > DARK_FRACTION
+    dn[:, 199, 99] = 0
+    path = _scene(tmp_path, dn)
+    bands = ["blue", "red", "nir"]
+    coefficients, indexes, aod = ac.scene_coefficients(path, "Sentinel-2", bands, "DOS")
+    assert indexes == [1, 2, 3] and aod is None
+    gain, offset, _ = ac.TOA_SCALE["Sentinel-2"]
+    for name, dark_dn in zip(bands, (1100, 1200, 1300)):
+        assert coefficients[name] == pytest.approx((gain, offset, dark_dn * gain + offset - ac.DARK_REFLECTANCE, 1.0, 0.0))
+
+    reflectance, info = ac.correct_raster(path, "Sentinel-2", bands, "DOS", tile_rows=64)
+    assert info["coefficients"] == coefficients
+    for name, band in zip(bands, dn):
+        assert reflectance[name][0, 0] == pytest.approx(ac.DARK_REFLECTANCE, abs=1e-6)
+        assert np.isnan(reflectance[name][199, 99])
+        expected = band[5:100].astype(np.float64) * gain + offset - coefficients[name][2]
+        np.testing.assert_allclose(reflectance[name][5:100], expected, rtol=1e-5)
+
+
+def test_lut_is_inverted_by_estimate_aod():
+    wavelength = ac.BAND_CENTERS["Landsat 8/9"]["blue"]
+    grid, path, transmittance, spherical = ac.lut(wavelength, **GEOMETRY)
+    assert np.all(np.diff(path) > 0) and np.all(np.diff(transmittance) < 0)
+    for aod in (0.05, 0.37, 1.2):
+        rho_path, t, s = ac.lut_coefficients(wavelength, aod, **GEOMETRY)
+        # TOA reflectance of a dark surface seen through this atmosphere
+        y = ac.DARK_REFLECTANCE / (1 - s * ac.DARK_REFLECTANCE)
+        dark_toa = rho_path + t * y
+        assert ac.estimate_aod(dark_toa, wavelength, **GEOMETRY) == pytest.approx(aod, abs=0.01)
+        corrected = ac.apply_coefficients(np.array([1]), (dark_toa, 0.0, rho_path, t, s))
+        assert corrected[0] == pytest.approx(ac.DARK_REFLECTANCE, rel=1e-4)
+
+
+def test_sun_zenith_from_mtl():
+    assert ac.sun_zenith_from_mtl('    SUN_ELEVATION = 55.25\n') == pytest.approx(34.75)
+    assert ac.sun_zenith_from_mtl("GROUP = METADATA\n") is None
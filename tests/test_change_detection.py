@@ -0,0 +1,58 @@
+import numpy as np
+import pytest
+
+import change_detection
+
+
+def _bimodal(seed=0, n=(60000, 20000), means=(1.0, 4.0), sds=(0.3, 0.6)):
+    rng = np.random.default_rng(seed)
+    values = np.concatenate([rng.normal(means[0], sds[0], n[0]), rng.normal(means[1], sds[1], n[1])])
+    return np.histogram(values, bins=512)
+
+
+def _otsu_brute_force(hist, edges):
+    centres = (edges[:-1] + edges[1:]) / 2
+    best, best_t = -1, None
+    for t in range(1, len(hist)):
+        w0, w1 = hist[:t].sum(), hist[t:].sum()
+        if w0 == 0 or w1 == 0:
+            continue
+        m0 = (hist[:t] * centres[:t]).sum() / w0
+        m1 = (hist[t:] * centres[t:]).sum() / w1
+        between = w0 * w1 * (m0 - m1) ** 2
+        if between > best:
+            best, best_t = between, edges[t]
+    return best_t
+
+
+def test_otsu_matches_brute_force():
+    hist, edges = _bimodal()
+    assert change_detection.otsu_threshold(hist, edges) == pytest.approx(_otsu_brute_force(hist, edges))
+
+
+def test_thresholds_separate_the_modes():
+    hist, edges = _bimodal()
+    for finder in (change_detection.otsu_threshold, change_detection.kittler_illingworth_threshold):
+        assert 1.9 < finder(hist, edges) < 3.0
+
+
+def test_kittler_illingworth_handles_unequal_variances():
+    # A narrow, dominant class next to a wide one: the minimum-error threshold lies
+    # near the Bayes boundary, closer to the narrow class than the Otsu threshold
+    hist, edges = _bimodal(n=(90000, 10000), means=(0.0, 3.0), sds=(0.2, 1.0))
+    ki = change_detection.kittler_illingworth_threshold(hist, edges)
+    assert 0.5 < ki < 1.2
+    assert ki < change_detection.otsu_threshold(hist, edges)
+
+
+@pytest.mark.parametrize("workers", [1, 2])
+def test_detect_changes_in_process_and_pool_agree(workers):
+    rng = np.random.default_rng(1)
+    before = rng.gamma(4.0, 0.05, (300, 200)).astype(np.float32)
+    after = before.copy()
+    after[100:150, 50:120] *= 8.0
+    result = change_detection.detect_changes(before, after, "log-ratio", workers=workers, tile_rows=64)
+    expected = np.abs(np.log((after + change_detection.EPS) / (before + change_detection.EPS)))
+    np.testing.assert_allclose(result["magnitude"], expected, rtol=1e-5, atol=1e-6)
+    assert result["mask"][100:150, 50:120].all()
+    assert result["stats"]["pixels"] == 50 * 70
@@ -0,0 +1,58 @@
+import numpy as np
+import pytest
+import rasterio
+from rasterio.crs import CRS
+from rasterio.transform import from_origin
+
+import cog_export
+
+TRANSFORM = from_origin(440000, 520000, 30, 30)
+CRS_WKT = CRS.from_epsg(32618).to_wkt()
+
+
+def _check_layout(src, block_size):
+    assert src.profile["tiled"]
+    assert src.block_shapes[0] == (block_size, block_size)
+    assert len(src.overviews(1)) > 0
+    assert src.transform == TRANSFORM
+    assert src.crs == CRS.from_epsg(32618)
+
+
+def test_array_round_trip(tmp_path):
+    rng = np.random.default_rng(0)
+    array = rng.normal(300, 10, (2, 700, 650)).astype(np.float32)
+    array[:, :5, :5] = np.nan
+    path = cog_export.write_cog(tmp_path / "product.tif", array, transform=TRANSFORM, crs=CRS_WKT,
+                                nodata=np.nan, block_size=256)
+    assert cog_export.is_cog(path)
+    with rasterio.open(path) as src:
+        _check_layout(src, 256)
+        assert src.count == 2 and src.dtypes[0] == "float32"
+        assert np.isnan(src.nodata)
+        np.testing.assert_array_equal(src.read(), array)
+
+
+def test_block_reader_matches_array(tmp_path):
+    array = np.arange(600 * 520, dtype=np.uint16).reshape(600, 520)
+
+    def read_block(window):
+        return array[window.toslices()][np.newaxis]
+
+    path = cog_export.write_cog(tmp_path / "blocks.tif", read_block, transform=TRANSFORM, crs=CRS_WKT,
+                                width=520, height=600, dtype="uint16", block_size=256)
+    with rasterio.open(path) as src:
+        _check_layout(src, 256)
+        np.testing.assert_array_equal(src.read(1), array)
+    with pytest.raises(ValueError):
+        cog_export.write_cog(tmp_path / "bad.tif", read_block)
+
+
+def test_cog_bytes(tmp_path):
+    array = np.ones((300, 300), np.uint8)
+    data = cog_export.cog_bytes(array, transform=TRANSFORM, crs=CRS_WKT, block_size=128)
+    path = tmp_path / "download.tif"
+    path.write_bytes(data)
+    assert cog_export.is_cog(path)
+    with rasterio.open(path) as src:
+        _check_layout(src, 128)
+    assert cog_export.predictor_for("float32") == 3 and cog_export.predictor_for("int16") == 2
@@ -0,0 +1,39 @@
+import numpy as np
+
+import compositing
+
+BOUNDS = (-80.0, -4.0, -66.0, 13.0)
+
+
+def _layer(color=(255, 255, 255), opacity=255):
+    return compositing.graticule_layer(200, 150, BOUNDS, "EPSG:4326", BOUNDS, color=color, opacity=opacity)
+
+
+def test_white_lines_over_white_stay_white():
+    layer = _layer()
+    alpha = layer[0][:, :, 3]
+    assert ((alpha > 0) & (alpha < 255)).any()  # the lines are antialiased
+    img = np.full((150, 200, 3), 255, np.uint8)
+    assert compositing.apply_layer(img, layer).min() == 255
+
+
+def test_antialiased_edges_blend_by_coverage():
+    layer = _layer(color=(0, 0, 0))
+    overlay, (rows, cols) = layer
+    img = np.full((150, 200, 3), 200, np.uint8)
+    out = compositing.apply_layer(img, layer)
+    alpha = overlay[rows, cols, 3].astype(float)
+    np.testing.assert_allclose(out[rows, cols, 0], 200 * (255 - alpha) / 255, atol=1)
+    untouched = np.ones((150, 200), bool)
+    untouched[rows, cols] = False
+    assert np.all(out[untouched] == 200)
+
+
+def test_apply_layer_in_place_and_blend():
+    layer = _layer()
+    img = np.zeros((150, 200, 3), np.uint8)
+    expected = compositing.apply_layer(img, layer)
+    assert compositing.apply_layer(img, layer, out=img) is img
+    np.testing.assert_array_equal(img, expected)
+    a, b = np.full((4, 4, 3), 100, np.uint8), np.full((4, 4, 3), 200, np.uint8)
+    assert np.all(compositing.blend(a, b, 0.25) == 125)
@@ -0,0 +1,45 @@
+import io
+
+import numpy as np
+import pandas as pd
+import pytest
+from pyproj import CRS, Transformer
+
+import crs_service
+
+
+def test_transform_points_known_values_and_shapes():
+    # The central meridian of UTM 18N on the equator is the false easting
+    x, y, stats = crs_service.transform_points(-75.0, 0.0, "epsg:4326", "EPSG:32618")
+    assert np.ndim(x) == 0
+    assert (x, y) == (pytest.approx(500000.0), pytest.approx(0.0, abs=1e-6))
+    assert stats["points"] == 1
+
+    lon = np.linspace(-77, -73, 12).reshape(3, 4)
+    lat = np.linspace(1, 8, 12).reshape(3, 4)
+    x, y, stats = crs_service.transform_points(lon, lat, 4326, 32618)
+    assert x.shape == (3, 4) and stats["points"] == 12
+    ref_x, ref_y = Transformer.from_crs(4326, 32618, always_xy=True).transform(lon, lat)
+    np.testing.assert_allclose(x, ref_x)
+    np.testing.assert_allclose(y, ref_y)
+    assert lon[0, 0] == -77  # inputs are not modified
+
+
+def test_transformer_pool_normalizes_crs():
+    transformer = crs_service.get_transformer("epsg:4326", "epsg:3116")
+    assert crs_service.get_transformer(" EPSG:4326", 3116) is transformer
+    assert crs_service.get_transformer(CRS.from_epsg(4326), "EPSG:3116") is transformer
+
+
+def test_transform_csv_across_chunk_boundaries():
+    rng = np.random.default_rng(0)
+    df = pd.DataFrame({"id": np.arange(10), "lon": rng.uniform(-77, -73, 10), "lat": rng.uniform(1, 8, 10)})
+    text = df.to_csv(index=False)
+    whole, _ = crs_service.transform_dataframe(df, "lon", "lat", "epsg:4326", "epsg:9377")
+    for chunksize in (1, 3, 10, 100):
+        out, stats = crs_service.transform_csv(io.StringIO(text), "lon", "lat", "epsg:4326", "epsg:9377",
+                                               chunksize=chunksize)
+        assert stats["points"] == 10
+        pd.testing.assert_frame_equal(out, whole)
+    with pytest.raises(KeyError):
+        crs_service.transform_csv(io.StringIO(text), "x", "lat", "epsg:4326", "epsg:9377")
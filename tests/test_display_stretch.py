@@ -0,0 +1,61 @@
+import numpy as np
+import pytest
+
+import display_stretch
+
+
+def _band(dtype, lo, hi, zeros=0.5, seed=0):
+    """Uniform DNs in [lo, hi] with a fraction of no-data zeros."""
+    rng = np.random.default_rng(seed)
+    band = rng.integers(lo, hi + 1, size=(300, 200)).astype(dtype)
+    band[rng.random(band.shape) < zeros] = 0
+    return band
+
+
+def _expected_cutoffs(band, low, high):
+    valid = np.sort(band[band != 0].astype(np.int64))
+    return valid[int(np.ceil(len(valid) * low / 100)) - 1], valid[int(np.ceil(len(valid) * high / 100)) - 1]
+
+
+@pytest.mark.parametrize("dtype, lo, hi", [
+    (np.uint8, 20, 220), (np.uint16, 1000, 30000), (np.int16, -3000, 3000), (np.int16, 100, 2000),
+])
+def test_percentile_cutoffs_ignore_zero(dtype, lo, hi):
+    band = _band(dtype, lo, hi)
+    _, offset, bins = display_stretch._as_unsigned(band)
+    hist = display_stretch.band_histogram(band, block_rows=37)
+    assert len(hist) == bins and hist.sum() == band.size
+    cut_lo, cut_hi = display_stretch.percentile_cutoffs(hist, 2, 98, offset=offset)
+    assert (cut_lo - offset, cut_hi - offset) == _expected_cutoffs(band, 2, 98)
+
+
+def test_signed_and_unsigned_stretches_agree():
+    band = _band(np.int16, 1, 2000)
+    for method in display_stretch.STRETCHES:
+        np.testing.assert_array_equal(display_stretch.stretch_band(band, method),
+                                      display_stretch.stretch_band(band.astype(np.uint16), method))
+
+
+def test_luts():
+    linear = display_stretch.linear_lut(10, 20, 256)
+    assert linear[10] == 0 and linear[15] == 128 and linear[20] == 255
+    assert np.all(linear[:10] == 0) and np.all(linear[20:] == 255)
+    np.testing.assert_array_equal(display_stretch.gamma_lut(10, 20, 256, 1.0), linear)
+    assert display_stretch.gamma_lut(10, 20, 256, 2.0)[15] == round(255 * 0.5 ** 0.5)
+
+    hist = np.zeros(256, np.int64)
+    hist[[10, 11, 12, 13]] = [1, 1, 1, 1]
+    equalized = display_stretch.equalize_lut(hist, 10, 13)
+    np.testing.assert_array_equal(equalized[9:15], [0, 64, 128, 191, 255, 255])
+    with pytest.raises(ValueError):
+        display_stretch.build_lut(hist, "log")
+
+
+def test_stretch_float_and_multiband():
+    rng = np.random.default_rng(1)
+    img = rng.normal(0.2, 0.05, (50, 40, 3)).astype(np.float32)
+    img[0, 0] = np.nan
+    out = display_stretch.stretch_image(img, low=0.5, high=99.5)
+    assert out.dtype == np.uint8 and out.shape == img.shape
+    assert out[0, 0].tolist() == [0, 0, 0]
+    assert out[1:].min() == 0 and out.max() == 255
@@ -0,0 +1,40 @@
+import numpy as np
+import pytest
+
+import distortion
+
+SPHERICAL_MERCATOR = "+proj=merc +R=6371000 +units=m +no_defs"
+
+
+def test_mercator_scale_is_secant_of_latitude():
+    lon, lat, fields = distortion.factor_grid(SPHERICAL_MERCATOR, (-30.0, -60.0, 30.0, 60.0), n=7)
+    secant = 1 / np.cos(np.radians(lat))[:, None] * np.ones(len(lon))
+    np.testing.assert_allclose(fields["meridional_scale"], secant, rtol=1e-9)   # h
+    np.testing.assert_allclose(fields["parallel_scale"], secant, rtol=1e-9)     # k
+    np.testing.assert_allclose(fields["areal_scale"], secant ** 2, rtol=1e-9)
+    np.testing.assert_allclose(fields["angular_distortion"], 0, atol=1e-5)      # conformal (degrees)
+
+
+def test_utm_central_meridian_and_equal_area():
+    # UTM zone 18N: k0 = 0.9996 on the central meridian (75 W)
+    _, _, fields = distortion.factor_grid("EPSG:32618", (-75.0, 0.0, -75.0, 0.0), n=1)
+    assert fields["parallel_scale"][0, 0] == pytest.approx(0.9996, abs=1e-9)
+    # Lambert azimuthal equal-area preserves areas everywhere
+    _, _, fields = distortion.factor_grid("EPSG:3035", (0.0, 40.0, 20.0, 60.0), n=5)
+    np.testing.assert_allclose(fields["areal_scale"], 1, atol=1e-9)
+    assert fields["angular_distortion"].max() > 0.1
+
+
+def test_adaptive_grid_and_interpolation():
+    bounds = (-30.0, -60.0, 30.0, 60.0)
+    lon, lat, fields = distortion.adaptive_factor_grid(SPHERICAL_MERCATOR, bounds, tol=1e-3)
+    assert len(lon) in (5, 9, 17, 33, 65) and len(lon) > 5
+    image = distortion.interpolate_field(lon, lat, fields["areal_scale"], (90, 40))
+    # Row 0 is the northern edge, rows run north to south
+    assert image[0, 0] == pytest.approx(1 / np.cos(np.radians(60)) ** 2, rel=1e-9)
+    assert image[-1, -1] == pytest.approx(image[0, 0], rel=1e-9)
+    middle = distortion.interpolate_field(lon, lat, fields["areal_scale"], (3, 3))[1, 1]
+    assert middle == pytest.approx(1.0, rel=1e-9)
+    summary = distortion.summarize(fields)
+    assert summary["areal_scale_min"] == pytest.approx(1.0)
+    assert summary["areal_scale_max"] == pytest.approx(4.0)
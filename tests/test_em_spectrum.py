@@ -0,0 +1,49 @@
+import numpy as np
+import pytest
+
+import em_spectrum
+import radiometry
+
+
+def test_convert_green_light():
+    wavelength = 550e-9
+    assert em_spectrum.convert(550, "nm", "Hz") == pytest.approx(radiometry.LIGHT_SPEED / wavelength)
+    assert em_spectrum.convert(550, "nm", "eV") == pytest.approx(2.2543, rel=1e-4)
+    assert em_spectrum.convert(550, "nm", "cm-1") == pytest.approx(1 / 550e-7)
+
+
+def test_convert_round_trips_and_preserves_shape():
+    values = np.geomspace(1e-12, 1e3, 24).reshape(4, 6)
+    for unit in em_spectrum.UNITS:
+        back = em_spectrum.convert(em_spectrum.convert(values, "m", unit), unit, "m")
+        assert back.shape == values.shape
+        np.testing.assert_allclose(back, values, rtol=1e-12)
+
+
+def test_convert_rejects_unknown_units():
+    with pytest.raises(ValueError):
+        em_spectrum.convert(1.0, "m", "pies")
+
+
+def test_region_of_matches_the_region_table():
+    for name, lower, upper, _ in em_spectrum.REGIONS:
+        assert em_spectrum.region_of(np.sqrt(lower * upper)) == name
+        assert em_spectrum.region_of(lower) == name  # lower bounds are inclusive
+    assert em_spectrum.region_of(550e-9) == "Luz visible"
+    assert em_spectrum.region_of(10e-6) == "Infrarroja"
+
+
+def test_region_of_out_of_range_and_arrays():
+    regions = em_spectrum.region_of(np.array([[1e-16, np.nan], [1e5, 5e-7]]))
+    assert regions.shape == (2, 2)
+    assert list(regions.ravel()) == [em_spectrum.OUT_OF_RANGE] * 3 + ["Luz visible"]
+
+
+def test_visible_color():
+    assert em_spectrum.visible_color(470e-9) == "Azul"
+    assert em_spectrum.visible_color(650e-9) == "Rojo"
+    assert em_spectrum.visible_color(1e-6) == ""
+
+
+def test_grade():
+    assert list(em_spectrum.grade([1.04, 1.2, np.nan], [1.0, 1.0, 1.0])) == [True, False, False]
@@ -0,0 +1,58 @@
+import numpy as np
+import pytest
+
+import emissivity
+import radiometry
+
+RESPONSE = "Landsat 8/9 B10"
+
+
+def test_resample_matches_interp():
+    library = emissivity.default_library()
+    grid = np.array([2.0, 3.0, 4.4, 8.6, 9.25, 12.9, 14.0, 15.0])
+    out = library.resample(grid)
+    for i, name in enumerate(library.names):
+        wl, em = emissivity.MATERIALS[name]
+        np.testing.assert_allclose(out[i], np.interp(grid, wl, em), rtol=1e-6)  # constant beyond the ends
+    subset = library.resample(grid, np.array([3, 0]))
+    np.testing.assert_array_equal(subset, out[[3, 0]])
+
+
+def test_band_radiance_table_matches_trapezoid():
+    temperatures, table = emissivity.band_radiance_table(RESPONSE)
+    library = emissivity.default_library()
+    wl, srf = radiometry.SENSOR_RESPONSES[RESPONSE]
+    for name in ("Cuerpo negro perfecto", "Suelo arenoso", "Plata pulida"):
+        m = library.index(name)
+        em = np.interp(wl, *emissivity.MATERIALS[name])
+        for i in (0, 1234, len(temperatures) - 1):
+            radiance = radiometry.spectral_radiance(wl, temperatures[i], unit="um")
+            expected = np.trapezoid(em * radiance * srf, wl) / np.trapezoid(srf, wl)
+            assert table[m, i] == pytest.approx(expected, rel=1e-5)
+    # A blackbody row is the plain band radiance
+    blackbody = table[library.index("Cuerpo negro perfecto")]
+    np.testing.assert_allclose(blackbody, radiometry.band_radiance(temperatures, radiometry.SENSOR_RESPONSES[RESPONSE]),
+                               rtol=1e-6)
+
+
+def test_band_emissivity_and_scene_radiance():
+    library = emissivity.default_library()
+    wl, srf = radiometry.SENSOR_RESPONSES[RESPONSE]
+    sand = library.index("Suelo arenoso")
+    expected = np.trapezoid(np.interp(wl, *emissivity.MATERIALS["Suelo arenoso"]) * srf, wl) / np.trapezoid(srf, wl)
+    assert emissivity.band_emissivity(radiometry.SENSOR_RESPONSES[RESPONSE])[sand] == pytest.approx(expected, rel=1e-5)
+
+    temperatures, table = emissivity.band_radiance_table(RESPONSE)
+    materials = np.array([[0, sand], [sand, 0]])
+    kinetic = np.array([[300.0, 300.05], [100.0, np.nan]])
+    radiance = emissivity.scene_radiance(materials, kinetic, RESPONSE)
+    i = int(np.argmin(np.abs(temperatures - 300.0)))
+    assert radiance[0, 0] == pytest.approx(table[0, i], rel=1e-5)
+    assert radiance[0, 1] == pytest.approx((table[sand, i] + table[sand, i + 1]) / 2, rel=1e-5)
+    assert np.isnan(radiance[1]).all()  # off the table and NaN
+
+
+def test_effective_emissivity():
+    assert emissivity.effective_emissivity("Cuerpo negro perfecto", 300.0) == pytest.approx(1.0)
+    silver = emissivity.effective_emissivity("Plata pulida", 300.0)
+    assert 0.02 <= silver <= 0.03
@@ -0,0 +1,33 @@
+import numpy as np
+import pytest
+
+import hsi_analysis
+
+
+@pytest.fixture
+def cube():
+    rng = np.random.default_rng(0)
+    return (rng.random((30, 20, 6)) + 0.1).astype(np.float32)
+
+
+def test_band_math_matches_numpy(cube):
+    result = hsi_analysis.band_math(cube, "sqrt(minimum(b0, b1)) + (b4 - b2) / (b4 + b2) ** 2", tile_rows=7)
+    b0, b1, b2, b4 = (cube[:, :, i] for i in (0, 1, 2, 4))
+    np.testing.assert_allclose(result, np.sqrt(np.minimum(b0, b1)) + (b4 - b2) / (b4 + b2) ** 2, rtol=1e-5)
+
+
+@pytest.mark.parametrize("expression", [
+    "sqrt",                 # bare function name
+    "b0 + log",
+    "minimum(b0)",          # wrong arity
+    "sqrt(b0, b1)",
+    "abs()",
+    "b0 + 'x'",             # non-numeric constant
+    "b9",                   # missing band
+    "foo(b0)",
+    "b0.real",
+    "__import__('os')",
+])
+def test_band_math_rejects_invalid_expressions(cube, expression):
+    with pytest.raises(ValueError):
+        hsi_analysis.band_math(cube, expression)
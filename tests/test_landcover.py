@@ -0,0 +1,62 @@
+import numpy as np
+import pytest
+import rasterio
+from rasterio.transform import from_origin
+
+import landcover
+
+# Reflectance (blue, green, red, nir, swir1, swir2) of four toy classes
+SIGNATURES = np.array([
+    [0.03, 0.06, 0.04, 0.40, 0.20, 0.10],  # Bosque
+    [0.15, 0.16, 0.18, 0.22, 0.28, 0.26],  # Urbano
+    [0.05, 0.09, 0.07, 0.30, 0.25, 0.15],  # Agricultura
+    [0.06, 0.08, 0.05, 0.02, 0.01, 0.01],  # Agua
+])
+
+
+def _scene(tmp_path, size=40):
+    """Sentinel-2 stack with one class per quadrant, a nodata pixel and the truth map."""
+    rng = np.random.default_rng(0)
+    truth = np.zeros((size, size), np.uint8)
+    half = size // 2
+    truth[:half, half:], truth[half:, :half], truth[half:, half:] = 1, 2, 3
+    reflectance = SIGNATURES[truth].transpose(2, 0, 1) + rng.normal(0, 0.004, (6, size, size))
+    dn = np.clip(reflectance / 1e-4, 1, None).astype(np.uint16)
+    dn[:, 0, 0] = 0
+    truth[0, 0] = landcover.NODATA
+    path = tmp_path / "s2.tif"
+    with rasterio.open(path, "w", driver="GTiff", width=size, height=size, count=6, dtype="uint16",
+                       crs="EPSG:32618", transform=from_origin(500000, 500000, 10, 10)) as dst:
+        dst.write(dn)
+        dst.descriptions = ("B2", "B3", "B4", "B8", "B11", "B12")
+    regions = [(0, 2, 2, 12, 12), (1, 25, 2, 35, 12), (2, 2, 25, 12, 35), (3, 25, 25, 35, 35)]
+    return landcover.FeatureReader(str(path), "Sentinel-2"), regions, truth
+
+
+@pytest.mark.parametrize("name", landcover.MODELS)
+def test_models_recover_the_toy_classes(tmp_path, name):
+    reader, regions, truth = _scene(tmp_path)
+    assert reader.names == [*landcover.FEATURE_BANDS, *landcover.FEATURE_INDICES]
+    X, y = landcover.training_samples(reader, regions)
+    model = landcover.make_model(name).fit(X, y)
+    labels, _ = landcover.classify(reader, model)
+    np.testing.assert_array_equal(labels, truth)
+
+
+def test_tiled_and_pooled_classification_match_one_tile(tmp_path):
+    reader, regions, truth = _scene(tmp_path)
+    model = landcover.make_model("Distancia minima").fit(*landcover.training_samples(reader, regions))
+    single, _ = landcover.classify(reader, model, tile_rows=reader.height)
+    tiled, _ = landcover.classify(reader, model, tile_rows=7)
+    pooled, _ = landcover.classify(reader, model, workers=2, tile_rows=3)
+    np.testing.assert_array_equal(tiled, single)
+    np.testing.assert_array_equal(pooled, single)
+
+
+def test_class_areas_and_training_errors(tmp_path):
+    reader, regions, truth = _scene(tmp_path)
+    areas = landcover.class_areas(truth, landcover.CLASSES, reader.transform)
+    assert areas[0][:3] == ("Bosque", 399, 399 * 100 / 1e4)
+    assert sum(row[3] for row in areas) == pytest.approx(100)
+    with pytest.raises(ValueError):
+        landcover.training_samples(reader, regions[:1])
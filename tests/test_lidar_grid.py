@@ -0,0 +1,95 @@
+import io
+
+import numpy as np
+import pytest
+
+import lidar_grid
+
+BOUNDS = (0.0, 0.0, 10.0, 6.0)
+RESOLUTION = 2.0
+
+
+def _points(n=400, seed=0):
+    rng = np.random.default_rng(seed)
+    points = np.empty(n, dtype=lidar_grid.POINT_DTYPE)
+    points["x"] = rng.uniform(0, 10, n)
+    points["y"] = rng.uniform(0, 6, n)
+    # Corners, cell boundaries and the east/south/north/west edges
+    edges = [(0, 0), (10, 0), (0, 6), (10, 6), (2, 3), (4, 4), (10, 2.5), (5, 0), (0, 1), (7.5, 6)]
+    points["x"][:len(edges)], points["y"][:len(edges)] = np.array(edges, dtype=float).T
+    points["z"] = rng.uniform(0, 30, n)
+    points["classification"] = np.where(rng.random(n) < 0.5, lidar_grid.GROUND_CLASS, 5)
+    points[-1] = (12.0, 3.0, 99.0, lidar_grid.GROUND_CLASS)  # outside the grid
+    return points
+
+
+def _brute_force(points):
+    width, height = 5, 3
+    dsm = np.full((height, width), np.nan)
+    dtm = np.full((height, width), np.nan)
+    count = np.zeros((height, width), int)
+    for x, y, z, cls in points.tolist():
+        if not (0 <= x <= 10 and 0 <= y <= 6):
+            continue
+        col = min(int(x // RESOLUTION), width - 1)
+        row = min(int((6 - y) // RESOLUTION), height - 1)
+        count[row, col] += 1
+        dsm[row, col] = z if np.isnan(dsm[row, col]) else max(dsm[row, col], z)
+        if cls == lidar_grid.GROUND_CLASS:
+            dtm[row, col] = z if np.isnan(dtm[row, col]) else min(dtm[row, col], z)
+    return dsm, dtm, count
+
+
+def test_grid_matches_brute_force():
+    points = _points()
+    grid = lidar_grid.grid_points(points, RESOLUTION, bounds=BOUNDS, chunk_size=37)
+    dsm, dtm, count = _brute_force(points)
+    assert (grid.height, grid.width) == (3, 5)
+    assert grid.transform() == (2.0, 0.0, 0.0, 0.0, -2.0, 6.0)
+    np.testing.assert_allclose(grid.dsm(), dsm, rtol=1e-6)
+    np.testing.assert_allclose(grid.dtm(), dtm, rtol=1e-6)
+    np.testing.assert_allclose(grid.density(), count / RESOLUTION ** 2)
+    assert count.sum() == len(points) - 1
+    np.testing.assert_allclose(grid.chm(), np.clip(dsm - dtm, 0, None), rtol=1e-5, atol=1e-5)
+
+
+def test_cell_index_edges():
+    grid = lidar_grid.GridAccumulator(BOUNDS, RESOLUTION)
+    x = np.array([0.0, 10.0, 10.0, 1.99, 2.0, -0.01, 10.01])
+    y = np.array([6.0, 0.0, 6.0, 5.0, 4.0, 3.0, 3.0])
+    np.testing.assert_array_equal(grid.cell_index(x, y), [0, 14, 4, 0, 6, -1, -1])
+
+
+def test_npy_file_objects_can_be_read_twice():
+    points = _points()
+    buffer = io.BytesIO()
+    np.save(buffer, points)
+    bounds = lidar_grid.scan_bounds(buffer, chunk_size=50)
+    assert bounds == (0.0, 0.0, 12.0, 6.0, len(points))
+    again = np.concatenate(list(lidar_grid.iter_points(buffer, chunk_size=50)))
+    np.testing.assert_array_equal(again, points)
+    with pytest.raises(ValueError):
+        list(lidar_grid.iter_points(_npy_without_z()))
+
+
+def _npy_without_z():
+    buffer = io.BytesIO()
+    np.save(buffer, np.zeros(3, dtype=[("x", "f8"), ("y", "f8")]))
+    return buffer
+
+
+def test_chunk_index_clip_matches_brute_force(tmp_path):
+    # Spatially sorted chunks so that most chunks miss a small window
+    points = _points(2000, seed=1)[:-1]
+    points = points[np.argsort(points["x"])]
+    path = str(tmp_path / "nube.npy")
+    np.save(path, points)
+    index = lidar_grid.ChunkIndex(path, buckets=8, chunk_size=100)
+    assert index.occupancy.shape[0] == 20
+
+    window = (1.0, 2.0, 3.5, 5.0)
+    inside = ((points["x"] >= 1.0) & (points["x"] <= 3.5) & (points["y"] >= 2.0) & (points["y"] <= 5.0))
+    clipped = index.clip(*window)
+    np.testing.assert_array_equal(np.sort(clipped, order=["x", "y"]), np.sort(points[inside], order=["x", "y"]))
+    assert len(index.candidate_chunks(*window)) < 10
+    assert len(index.clip(20.0, 20.0, 30.0, 30.0)) == 0
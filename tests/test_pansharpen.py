@@ -0,0 +1,68 @@
+import numpy as np
+import pytest
+import rasterio
+from rasterio.transform import from_origin
+from rasterio.windows import Window
+
+import pansharpen
+
+
+def _ms(bands=3, size=40, seed=0):
+    rng = np.random.default_rng(seed)
+    return rng.uniform(500, 3000, (bands, size, size)).astype(np.float32)
+
+
+@pytest.mark.parametrize("method", pansharpen.METHODS)
+def test_constant_pan_preserves_the_mean_intensity(method):
+    ms = _ms()
+    pan = np.full(ms.shape[1:], 1234.0, np.float32)
+    stats = pansharpen.fusion_stats(ms.reshape(3, -1), pan.ravel())
+    fused = pansharpen.sharpen_tile(ms, pan, method, stats)
+    # A flat pan adds no detail: the fused intensity keeps the mean of the bands
+    assert fused.mean(axis=0).mean() == pytest.approx(ms.mean(axis=0).mean(), rel=1e-5)
+    if method == "IHS":
+        np.testing.assert_allclose(fused.mean(axis=(1, 2)), ms.mean(axis=(1, 2)), rtol=1e-5)
+    if method == "Brovey":
+        np.testing.assert_allclose(fused.mean(axis=0), stats["i_mean"], rtol=1e-5)
+
+
+def test_fusion_stats_and_nodata():
+    ms = _ms()
+    stats = pansharpen.fusion_stats(ms.reshape(3, -1), ms.mean(axis=0).ravel())
+    assert stats["pan_mean"] == pytest.approx(stats["i_mean"])
+    assert stats["gains"].mean() == pytest.approx(1.0, rel=1e-5)  # gains of the mean average to 1
+    # With the intensity as pan every method returns the input
+    for method in pansharpen.METHODS:
+        np.testing.assert_allclose(pansharpen.sharpen_tile(ms, ms.mean(axis=0), method, stats), ms, rtol=1e-4)
+    ms[:, 0, 0] = 0
+    assert np.all(pansharpen.sharpen_tile(ms, ms.mean(axis=0), "IHS", stats)[:, 0, 0] == 0)
+    with pytest.raises(ValueError):
+        pansharpen.fusion_stats(np.zeros((3, 4)), np.zeros(4))
+
+
+def _write(path, array, transform):
+    with rasterio.open(path, "w", driver="GTiff", width=array.shape[2], height=array.shape[1],
+                       count=array.shape[0], dtype=array.dtype, crs="EPSG:32618", transform=transform) as dst:
+        dst.write(array)
+
+
+def test_windowed_sharpening_matches_the_full_scene(tmp_path):
+    ms = _ms().astype(np.uint16)
+    rng = np.random.default_rng(1)
+    pan = rng.uniform(500, 3000, (1, 80, 80)).astype(np.uint16)
+    _write(tmp_path / "ms.tif", ms, from_origin(500000, 600000, 30, 30))
+    _write(tmp_path / "pan.tif", pan, from_origin(500000, 600000, 15, 15))
+
+    full, transform, stats = pansharpen.pansharpen(tmp_path / "ms.tif", tmp_path / "pan.tif", [1, 2, 3],
+                                                   method="Gram-Schmidt", block_size=32)
+    assert full.shape == (3, 80, 80) and full.dtype == np.uint16
+    assert transform == from_origin(500000, 600000, 15, 15)
+    assert stats["megapixels"] == pytest.approx(80 * 80 / 1e6)
+
+    window = Window(20, 30, 25, 17)
+    part, part_transform, _ = pansharpen.pansharpen(tmp_path / "ms.tif", tmp_path / "pan.tif", [1, 2, 3],
+                                                    method="Gram-Schmidt", window=window, block_size=8)
+    np.testing.assert_array_equal(part, full[:, 30:47, 20:45])
+    assert part_transform == from_origin(500000 + 20 * 15, 600000 - 30 * 15, 15, 15)
+    with pytest.raises(ValueError):
+        pansharpen.PanSharpener(tmp_path / "ms.tif", tmp_path / "pan.tif", [1], method="PCA")
@@ -0,0 +1,54 @@
+import numpy as np
+import pytest
+
+import radiometry
+
+
+def test_planck_is_stable_at_the_extremes():
+    wavelengths = np.array([1e-9, 0.5e-6, 10e-6, 1.0])
+    radiance = radiometry.planck(wavelengths, 300.0)
+    assert np.all(np.isfinite(radiance)) and radiance[0] == 0.0
+    # Rayleigh-Jeans limit at long wavelengths: L = 2 c k T / λ^4
+    assert radiance[-1] == pytest.approx(2 * radiometry.LIGHT_SPEED * radiometry.BOLTZMANN * 300.0, rel=1e-4)
+
+
+def test_wien_and_stefan_boltzmann():
+    assert radiometry.wien_peak(5778.0) == pytest.approx(501.5e-9, rel=1e-3)
+    assert radiometry.stefan_boltzmann(300.0) == pytest.approx(459.3, rel=1e-3)
+
+
+def test_inverse_planck_round_trip():
+    temperatures = np.linspace(200.0, 6000.0, 50)
+    for wavelength_um in (0.5, 3.7, 11.0):
+        radiance = radiometry.spectral_radiance(wavelength_um, temperatures, unit="um")
+        np.testing.assert_allclose(radiometry.inverse_planck(radiance, wavelength_um), temperatures, rtol=1e-10)
+
+
+@pytest.mark.parametrize("band", ["B10", "B11"])
+def test_k1k2_brightness_temperature_round_trip(band):
+    constants = radiometry.LANDSAT_THERMAL[band]
+    temperatures = np.linspace(220.0, 340.0, 61)
+    radiance = radiometry.radiance_from_temperature(temperatures, constants["K1"], constants["K2"])
+    np.testing.assert_allclose(radiometry.brightness_temperature(radiance, constants["K1"], constants["K2"]),
+                               temperatures, rtol=1e-10)
+
+
+@pytest.mark.parametrize("response", ["Landsat 8/9 B10", "MODIS B31"])
+def test_band_table_brightness_temperature_round_trip(response):
+    temperatures = np.linspace(220.0, 340.0, 61)
+    radiance = radiometry.band_radiance(temperatures, radiometry.SENSOR_RESPONSES[response])
+    np.testing.assert_allclose(radiometry.band_brightness_temperature(radiance, response), temperatures, atol=1e-3)
+
+
+def test_band_table_agrees_with_k1k2():
+    # The Landsat K1/K2 fit and the band-integrated table agree to a fraction of a kelvin
+    constants = radiometry.LANDSAT_THERMAL["B10"]
+    temperatures = np.linspace(260.0, 320.0, 13)
+    radiance = radiometry.radiance_from_temperature(temperatures, constants["K1"], constants["K2"])
+    lut = radiometry.band_brightness_temperature(radiance, constants["response"])
+    np.testing.assert_allclose(lut, temperatures, atol=1.0)
+
+
+def test_nonpositive_radiance_is_nan():
+    assert np.isnan(radiometry.brightness_temperature(0.0, 774.8853, 1321.0789))
+    assert np.isnan(radiometry.band_brightness_temperature(-1.0, "Landsat 8/9 B10"))
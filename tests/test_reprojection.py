@@ -0,0 +1,54 @@
+import numpy as np
+import pytest
+import rasterio
+from rasterio.transform import from_origin
+from rasterio.warp import Resampling
+
+import reprojection
+
+SRC_CRS = "EPSG:32618"
+DST_CRS = "EPSG:4326"
+TRANSFORM = from_origin(600000, 520000, 30, 30)
+
+
+def _source(bands=2, height=90, width=110):
+    rng = np.random.default_rng(0)
+    return rng.integers(1, 1000, size=(bands, height, width)).astype(np.uint16)
+
+
+def test_iter_windows_tile_the_raster():
+    windows = list(reprojection.iter_windows(100, 70, 32))
+    assert sum(w.width * w.height for w in windows) == 100 * 70
+    assert max(w.col_off + w.width for w in windows) == 100
+    assert max(w.row_off + w.height for w in windows) == 70
+
+
+@pytest.mark.parametrize("resampling", [Resampling.nearest, Resampling.bilinear])
+def test_windowed_matches_single_call(resampling):
+    source = _source()
+    single, single_transform = reprojection.reproject_array(
+        source, TRANSFORM, SRC_CRS, DST_CRS, resampling=resampling, window_size=10000)
+    windowed, windowed_transform = reprojection.reproject_array(
+        source, TRANSFORM, SRC_CRS, DST_CRS, resampling=resampling, window_size=17, num_threads=2)
+    assert windowed_transform == single_transform
+    assert windowed.shape == single.shape
+    assert (single > 0).mean() > 0.5
+    if resampling == Resampling.nearest:
+        np.testing.assert_array_equal(windowed, single)
+    else:
+        np.testing.assert_allclose(windowed.astype(float), single.astype(float), atol=1)
+
+
+def test_reproject_file_matches_array(tmp_path):
+    source = _source()
+    path = tmp_path / "scene.tif"
+    with rasterio.open(path, "w", driver="GTiff", width=source.shape[2], height=source.shape[1],
+                       count=source.shape[0], dtype=source.dtype, crs=SRC_CRS, transform=TRANSFORM,
+                       nodata=0) as dst:
+        dst.write(source)
+    from_file, file_transform = reprojection.reproject_file(
+        path, DST_CRS, resampling=Resampling.nearest, window_size=23)
+    from_array, array_transform = reprojection.reproject_array(
+        source, TRANSFORM, SRC_CRS, DST_CRS, resampling=Resampling.nearest)
+    assert file_transform == array_transform
+    np.testing.assert_array_equal(from_file, from_array)
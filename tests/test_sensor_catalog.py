@@ -0,0 +1,27 @@
+import pytest
+
+import atmospheric_correction
+import sensor_catalog
+import spectral_library
+
+
+def test_query():
+    assert sensor_catalog.query(max_gsd=10, covers=["SWIR"], max_revisit=5) == ["WorldView-3"]
+    assert "Sentinel-1" in sensor_catalog.query(sensor_type="Radar")
+    with pytest.raises(ValueError):
+        sensor_catalog.query(covers=["UV"])
+
+
+def test_aliases_and_band_gsd():
+    assert sensor_catalog.resolve("Landsat 8/9") == "Landsat 8"
+    assert sensor_catalog.band_gsd("Landsat 8/9", "B8") == 15
+    with pytest.raises(ValueError):
+        sensor_catalog.band_gsd("Sentinel-2", "B99")
+
+
+def test_band_tables_are_derived_from_the_catalogue():
+    centers = sensor_catalog.band_centers("Sentinel-2")
+    assert centers["B4"] == (665.0, 30.0)
+    assert spectral_library.SENSOR_BANDS["Sentinel-2"]["B4"] == centers["B4"]
+    assert atmospheric_correction.BAND_CENTERS["Sentinel-2"]["red"] == pytest.approx(0.665)
+    assert "B10" not in spectral_library.SENSOR_BANDS["Landsat 8/9"]  # thermal, outside the library range
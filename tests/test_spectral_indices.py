@@ -0,0 +1,59 @@
+import numpy as np
+import pytest
+
+import spectral_indices
+
+
+@pytest.fixture
+def bands():
+    rng = np.random.default_rng(0)
+    return {name: (rng.random((37, 23)) + 0.05).astype(np.float32)
+            for name in ("blue", "green", "red", "nir", "swir1", "swir2")}
+
+
+def _numpy(expression, bands):
+    # Plain float32 NumPy, the precision the engine computes in
+    return eval(expression, {"sqrt": np.sqrt, "abs": np.abs, "minimum": np.minimum, "maximum": np.maximum},
+                dict(bands))
+
+
+@pytest.mark.parametrize("expressions", [
+    {"X": "((nir - red) * (nir - red)) + ((green - blue) * (green + blue))"},
+    {"X": "(nir - red) * (nir - red) * (nir - red) / (nir + red)"},
+    {"A": "(nir - red) * (nir - red)", "B": "(nir - red) * (nir - red) + swir1 * swir1"},
+    {"X": "sqrt((nir * nir) + (red * red)) - minimum(nir * nir, blue)"},
+    {"X": "-(swir1 - swir2) * (swir1 - swir2) + abs(green - green)"},
+])
+def test_repeated_subexpressions_match_numpy(bands, expressions):
+    result = spectral_indices.evaluate(bands, expressions, tile_rows=8)
+    for name, expression in expressions.items():
+        np.testing.assert_allclose(result[name], _numpy(expression, bands), rtol=1e-5, atol=1e-6)
+
+
+def test_predefined_indices_match_numpy(bands):
+    result = spectral_indices.evaluate(bands, list(spectral_indices.INDICES), tile_rows=10)
+    for name, expression in spectral_indices.INDICES.items():
+        np.testing.assert_allclose(result[name], _numpy(expression, bands), rtol=1e-5, atol=1e-6)
+
+
+def test_shared_subexpression_is_computed_once():
+    program = spectral_indices.compile_indices({"A": "(nir - red) * (nir - red)", "B": "nir - red"})
+    assert len(program.steps) == 2
+
+
+def test_scale_and_nodata(bands):
+    bands = {k: (v * 10000).astype(np.uint16) for k, v in bands.items()}
+    bands["red"][0, 0] = 0
+    result = spectral_indices.evaluate(bands, ["NDVI"], scale=(1e-4, 0.0))["NDVI"]
+    nir, red = bands["nir"] * 1e-4, bands["red"] * 1e-4
+    assert np.isnan(result[0, 0])
+    np.testing.assert_allclose(result[1:], ((nir - red) / (nir + red))[1:], rtol=1e-5, atol=1e-6)
+
+
+@pytest.mark.parametrize("expression", [
+    "nir +", "foo - red", "nir.real", "minimum(nir, red, key=1)",
+    "sqrt(nir, red)", "minimum(nir)", "sqrt", "nir + 'a'", "print(nir)",
+])
+def test_invalid_expressions(expression):
+    with pytest.raises(ValueError):
+        spectral_indices.compile_indices({"X": expression})
@@ -0,0 +1,96 @@
+import numpy as np
+import pytest
+
+import radiometry
+import spectral_library
+
+ECOSTRESS = """Name: Green grass
+Type: Vegetation
+Class: Grass
+X Units: Wavelength (micrometers)
+Y Units: Reflectance (percent)
+Additional Information: none
+
+0.4000 5.0
+0.5000 10.0
+0.6000 6.0
+0.5000 99.0
+0.8000 50.0
+"""
+
+USGS = """splib07a Record=6518: Kaolinite CM9   BECKb AREF
+0.10
+-1.23e34
+0.30
+0.40
+"""
+
+
+def test_parse_ecostress():
+    record = spectral_library.parse_spectrum(ECOSTRESS)
+    assert record["name"] == "Green grass"
+    assert record["category"] == "Vegetation"
+    np.testing.assert_allclose(record["wavelengths"], [400, 500, 600, 800])  # um -> nm, sorted, unique
+    np.testing.assert_allclose(record["values"], [0.05, 0.10, 0.06, 0.50])   # percent -> 0-1
+
+
+def test_parse_usgs_one_column():
+    wavelengths = spectral_library.parse_wavelengths("Wavelengths (um)\n0.35\n0.45\n0.55\n0.65\n")
+    np.testing.assert_allclose(wavelengths, [350, 450, 550, 650])
+    record = spectral_library.parse_spectrum(USGS, wavelengths=wavelengths)
+    assert record["name"] == "Kaolinite CM9   BECKb AREF"
+    assert record["category"] == "USGS"
+    np.testing.assert_allclose(record["wavelengths"], [350, 550, 650])  # deleted channel dropped
+    np.testing.assert_allclose(record["values"], [0.1, 0.3, 0.4])
+    with pytest.raises(ValueError):
+        spectral_library.parse_spectrum(USGS)
+    with pytest.raises(ValueError):
+        spectral_library.parse_spectrum(USGS, wavelengths=wavelengths[:3])
+
+
+def _library():
+    rng = np.random.default_rng(0)
+    curves = {
+        "fino": (np.arange(350, 2501, 1.0), rng.uniform(0, 1, 2151)),
+        "grueso": (np.linspace(400, 2400, 41), rng.uniform(0, 1, 41)),
+        "corto": (np.linspace(450, 900, 10), rng.uniform(0, 1, 10)),
+        "fino 2": (np.arange(350, 2501, 1.0), np.full(2151, 0.25)),
+    }
+    return spectral_library.SpectralLibrary.from_curves(curves), curves
+
+
+def test_resample_matches_interp():
+    library, curves = _library()
+    grid = np.array([300, 400, 455.5, 700, 899.9, 1000, 2500, 2600])
+    out = library.resample(grid)
+    for i, (wl, refl) in enumerate(curves.values()):
+        expected = np.interp(grid, wl, refl, left=np.nan, right=np.nan)
+        np.testing.assert_allclose(out[i], expected, rtol=1e-5, atol=1e-6)
+    assert len(library.grids) == 3  # "fino" and "fino 2" share a grid
+
+
+def test_sensor_values_match_response_weighted_means():
+    library, curves = _library()
+    bands, values = library.sensor_values("Sentinel-2")
+    assert bands == list(spectral_library.SENSOR_BANDS["Sentinel-2"])
+    wl, refl = curves["fino"]
+    for j, (center, fwhm) in enumerate(spectral_library.SENSOR_BANDS["Sentinel-2"].values()):
+        response_um, srf = radiometry.gaussian_response(center / 1000, fwhm / 1000)
+        weights = np.interp(wl, response_um * 1000, srf, left=0, right=0)
+        expected = np.trapezoid(weights * refl, wl) / np.trapezoid(weights, wl)
+        assert values[0, j] == pytest.approx(expected, rel=1e-4)
+    np.testing.assert_allclose(values[3], 0.25, rtol=1e-5)
+    # Bands off the short spectrum are NaN
+    corto = values[2]
+    centers = np.array([c for c, _ in spectral_library.SENSOR_BANDS["Sentinel-2"].values()])
+    assert np.all(np.isnan(corto[(centers < 450) | (centers > 900)]))
+    assert np.all(np.isfinite(corto[(centers >= 450) & (centers <= 900)]))
+
+
+def test_save_and_load(tmp_path):
+    library, _ = _library()
+    library.save(tmp_path / "library.npz")
+    loaded = spectral_library.SpectralLibrary.load(tmp_path / "library.npz")
+    assert loaded.names == library.names
+    np.testing.assert_array_equal(loaded.values, library.values)
+    np.testing.assert_array_equal(loaded.sensor_values("MODIS")[1], library.sensor_values("MODIS")[1])
@@ -0,0 +1,64 @@
+import numpy as np
+import pytest
+from scipy.spatial import ConvexHull
+
+import spectral_search
+
+WAVELENGTHS = np.linspace(400, 2500, 40)
+
+
+def _library(n=300, seed=0):
+    rng = np.random.default_rng(seed)
+    return rng.uniform(0.05, 0.9, size=(n, len(WAVELENGTHS))).astype(np.float32)
+
+
+def _brute_force_angles(spectra, library):
+    a = spectra / np.linalg.norm(spectra, axis=1, keepdims=True)
+    b = library / np.linalg.norm(library, axis=1, keepdims=True)
+    return np.arccos(np.clip(a.astype(np.float64) @ b.T.astype(np.float64), -1, 1))
+
+
+def test_query_matches_brute_force():
+    library = _library()
+    index = spectral_search.SpectralIndex(library, [f"s{i}" for i in range(len(library))], WAVELENGTHS)
+    queries = library[[3, 150, 299]] * 1.7 + np.float32(0.01)
+    best, angles = index.query(queries, k=5)
+    expected = np.argsort(_brute_force_angles(queries, library), axis=1)[:, :5]
+    np.testing.assert_array_equal(best, expected)
+    assert np.all(np.diff(angles, axis=1) >= 0)
+    cos_best, cosines = index.query(queries, k=5, metric="coseno")
+    np.testing.assert_array_equal(cos_best, best)
+    np.testing.assert_allclose(np.cos(angles), cosines, atol=1e-5)
+
+
+def test_match_image_blocks_match_brute_force():
+    library = _library()
+    index = spectral_search.SpectralIndex(library, range(len(library)), WAVELENGTHS)
+    rng = np.random.default_rng(1)
+    cube = rng.uniform(0.05, 0.9, size=(13, 11, len(WAVELENGTHS))).astype(np.float32)
+    labels, angles, _ = index.match_image(cube, k=3, pixel_block=20, library_block=37)
+    reference = _brute_force_angles(cube.reshape(-1, len(WAVELENGTHS)), library)
+    expected = np.argsort(reference, axis=1)[:, :3]
+    np.testing.assert_array_equal(labels.reshape(-1, 3), expected)
+    np.testing.assert_allclose(angles.reshape(-1, 3), np.take_along_axis(reference, expected, axis=1), atol=1e-3)
+
+
+def test_match_image_max_angle():
+    library = _library()
+    index = spectral_search.SpectralIndex(library, range(len(library)), WAVELENGTHS)
+    cube = np.stack([library[:4], -library[:4]])  # exact matches and opposite spectra
+    labels, _, _ = index.match_image(cube, max_angle=0.1)
+    np.testing.assert_array_equal(labels[0, :, 0], np.arange(4))
+    assert np.all(labels[1] == -1)
+
+
+def test_continuum_removed_matches_convex_hull():
+    spectra = _library(20, seed=2).astype(np.float64)
+    removed = spectral_search.continuum_removed(spectra, WAVELENGTHS)
+    for spectrum, result in zip(spectra, removed):
+        # Upper hull of the spectrum: the hull of the points plus a point far below
+        points = np.column_stack([np.r_[WAVELENGTHS, WAVELENGTHS.mean()], np.r_[spectrum, -1e6]])
+        hull = sorted(v for v in ConvexHull(points).vertices if v < len(WAVELENGTHS))
+        continuum = np.interp(WAVELENGTHS, WAVELENGTHS[hull], spectrum[hull])
+        np.testing.assert_allclose(result, spectrum / continuum, rtol=1e-5)
+        assert result.max() == pytest.approx(1.0, abs=1e-6)
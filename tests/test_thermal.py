@@ -0,0 +1,25 @@
+import numpy as np
+import rasterio
+from rasterio.transform import from_origin
+
+import radiometry
+import thermal
+
+
+def test_brightness_temperature_raster_matches_the_formula(tmp_path):
+    rng = np.random.default_rng(0)
+    dn = rng.integers(20000, 40000, (70, 90), dtype=np.uint16)
+    dn[0, 0] = 0
+    path = tmp_path / "b10.tif"
+    with rasterio.open(path, "w", driver="GTiff", width=90, height=70, count=1, dtype="uint16",
+                       crs="EPSG:32618", transform=from_origin(500000, 500000, 30, 30)) as dst:
+        dst.write(dn, 1)
+
+    constants = radiometry.LANDSAT_THERMAL["B10"]
+    temperature, transform, crs = thermal.brightness_temperature_raster(str(path), "B10", block_size=32)
+    expected = radiometry.brightness_temperature(
+        radiometry.dn_to_radiance(dn, constants["ML"], constants["AL"]), constants["K1"], constants["K2"]
+    )
+    assert np.isnan(temperature[0, 0])
+    np.testing.assert_allclose(temperature[1:], expected[1:], rtol=1e-6)
+    assert transform == from_origin(500000, 500000, 30, 30) and crs.to_epsg() == 32618
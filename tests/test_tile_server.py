@@ -0,0 +1,34 @@
+import numpy as np
+import pytest
+from rasterio.transform import from_origin
+
+import tile_server
+
+
+def test_hillshade_orientation():
+    transform = from_origin(0, 0, 1, 1)
+    rising_east = np.tile(np.arange(50, dtype=np.float32), (40, 1))  # 45° slope facing west
+    flat = np.zeros((40, 50), dtype=np.float32)
+    # Default sun in the north-west: west- and north-facing slopes are lit, the opposite ones shaded
+    assert tile_server.hillshade(flat, transform)[20, 25] == pytest.approx(np.sin(np.radians(45)))
+    assert tile_server.hillshade(rising_east, transform)[20, 25] == pytest.approx(0.5 + np.sqrt(2) / 4, rel=1e-5)
+    assert tile_server.hillshade(-rising_east, transform)[20, 25] == pytest.approx(0.5 - np.sqrt(2) / 4, rel=1e-5)
+    rising_south = rising_east[:, :40].T  # rows run south
+    assert tile_server.hillshade(rising_south, transform)[25, 20] == pytest.approx(0.5 + np.sqrt(2) / 4, rel=1e-5)
+
+
+def test_hillshade_geographic_pixels_in_metres():
+    dem = np.tile(np.arange(50, dtype=np.float32) * 30, (40, 1))  # 30 m per ~30 m pixel
+    projected = tile_server.hillshade(dem, from_origin(0, 0, 30, 30))
+    geographic = tile_server.hillshade(dem, from_origin(-74, 0.01, 30 / 111320.0, 30 / 110540.0), "EPSG:4326")
+    assert geographic[20, 25] == pytest.approx(projected[20, 25], rel=1e-3)
+
+
+def test_hillshade_tiles_are_served():
+    y, x = np.mgrid[0:200, 0:300]
+    dem = (300 * np.exp(-((x - 150) ** 2 + (y - 100) ** 2) / 3000)).astype(np.float32)
+    transform = from_origin(-74.1, 4.7, 0.0003, 0.0003)
+    layer = tile_server.register_layer("test_hillshade", tile_server.hillshade(dem, transform, "EPSG:4326"),
+                                       transform, "EPSG:4326", cmap="gray", vmin=0, vmax=1)
+    assert tile_server.render_tile(layer, 12, 1204, 1994) is not None
+    assert tile_server.render_tile(layer, 12, 0, 0) is None
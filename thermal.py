@@ -0,0 +1,34 @@
+import numpy as np
+
+import cog_export
+import composites
+import radiometry
+
+# Thermal rasters: Level-1 thermal DNs -> brightness temperature, read and converted
+# one block at a time with the formulas of radiometry.py (which stays NumPy-only,
+# so the teaching apps that use it do not need GDAL).
+
+
+def brightness_temperature_raster(source, band="B10", constants=None, method="K1K2",
+                                  block_size=cog_export.BLOCK_SIZE):
+    """
+    Converts a Level-1 Landsat thermal band (path or uploaded file) to brightness
+    temperature in K, one block at a time.
+
+    `constants` are K1/K2/ML/AL (e.g. from `radiometry.parse_mtl`); `method` is
+    "K1K2" for the closed form or "LUT" for the band-integrated table. DN 0 becomes
+    NaN. Returns (temperature float32, transform, crs).
+    """
+    constants = constants or radiometry.LANDSAT_THERMAL[band]
+    with composites.open_raster(source) as src:
+        out = np.empty((src.height, src.width), dtype=np.float32)
+        for window in cog_export.iter_blocks(src.width, src.height, block_size):
+            rows, cols = window.toslices()
+            radiance = radiometry.dn_to_radiance(src.read(1, window=window), constants["ML"], constants["AL"])
+            if method == "K1K2":
+                out[rows, cols] = radiometry.brightness_temperature(radiance, constants["K1"], constants["K2"])
+            elif method == "LUT":
+                out[rows, cols] = radiometry.band_brightness_temperature(radiance, constants["response"])
+            else:
+                raise ValueError(f"Metodo desconocido: {method} (use K1K2 o LUT)")
+        return out, src.transform, src.crs
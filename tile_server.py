@@ -0,0 +1,259 @@
+import os
+import re
+import threading
+from collections import OrderedDict
+from functools import lru_cache
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import cv2
+import folium
+import numpy as np
+import pyproj
+from matplotlib import colormaps
+
+import reprojection
+
+# Local XYZ tile endpoint for rasters shown on folium maps. A layer is warped once
+# to Web Mercator, converted to RGBA and reduced into an overview pyramid; tiles
+# are cut on demand from the closest pyramid level and kept in an LRU cache, so
+# the browser only downloads the 256x256 tiles that are visible. Derived products
+# (e.g. the hillshade of a DEM) are computed once and registered like any raster.
+#
+# The browser must reach the server: by default it binds to 127.0.0.1, which works
+# when Streamlit runs locally. Set IMASR_TILE_URL to a public base URL (e.g. behind
+# a reverse proxy) when the app is deployed elsewhere.
+
+TILE_SIZE = 256
+WEB_MERCATOR = "EPSG:3857"
+ORIGIN = 20037508.342789244  # half the width of the Web Mercator world (m)
+TILE_CACHE_SIZE = 2048
+MAX_LAYERS = 16  # least recently registered layers are dropped beyond this
+TILE_FORMATS = {"png": ".png", "webp": ".webp"}
+
+_layers = OrderedDict()
+_lock = threading.Lock()
+_server = None
+
+
+# --- Layers ---
+
+class Layer:
+    """An RGBA Web Mercator raster with its overview pyramid."""
+
+    def __init__(self, rgba, bounds):
+        self.bounds = bounds  # (xmin, ymin, xmax, ymax) in EPSG:3857
+        self.resolution = (bounds[2] - bounds[0]) / rgba.shape[1]
+        self.levels = [rgba]
+        while max(self.levels[-1].shape[:2]) > TILE_SIZE:
+            level = self.levels[-1]
+            self.levels.append(cv2.resize(
+                level, ((level.shape[1] + 1) // 2, (level.shape[0] + 1) // 2),
+                interpolation=cv2.INTER_AREA
+            ))
+
+    def level_for(self, tile_resolution):
+        """Returns (level image, level resolution) of the coarsest level still finer than the tile."""
+        index = int(np.clip(np.floor(np.log2(tile_resolution / self.resolution)), 0, len(self.levels) - 1))
+        level = self.levels[index]
+        return level, (self.bounds[2] - self.bounds[0]) / level.shape[1]
+
+
+def colorize(data, cmap="viridis", vmin=None, vmax=None):
+    """Maps a single-band array to RGBA uint8 with a matplotlib colormap (NaN -> transparent)."""
+    data = np.asarray(data, dtype=np.float32)
+    valid = np.isfinite(data)
+    if vmin is None:
+        vmin = float(np.nanpercentile(data, 2))
+    if vmax is None:
+        vmax = float(np.nanpercentile(data, 98))
+
+    lut = (colormaps[cmap](np.linspace(0, 1, 256)) * 255).astype(np.uint8)
+    scaled = np.zeros(data.shape, dtype=np.uint8)
+    scaled[valid] = np.clip((data[valid] - vmin) / (vmax - vmin + 1e-12) * 255, 0, 255).astype(np.uint8)
+    rgba = lut[scaled]
+    rgba[~valid, 3] = 0
+    return rgba
+
+
+def to_rgba(data, cmap="viridis", vmin=None, vmax=None):
+    """Converts a (h, w) product or an (h, w, 3|4) uint8 image to RGBA uint8."""
+    if data.ndim == 2:
+        return colorize(data, cmap, vmin, vmax)
+    if data.shape[2] == 4:
+        return np.ascontiguousarray(data, dtype=np.uint8)
+    alpha = np.full(data.shape[:2], 255, dtype=np.uint8)
+    return np.dstack([data.astype(np.uint8), alpha])
+
+
+def hillshade(dem, transform, crs=None, azimuth=315.0, altitude=45.0, z_factor=1.0):
+    """
+    Lambertian hillshade (0-1, NaN where the DEM is NaN) of an elevation grid in m,
+    lit from `azimuth` (degrees clockwise from north) at `altitude` degrees. Pixel
+    sizes come from the affine `transform`; geographic CRSs are converted to metres
+    at the centre latitude.
+    """
+    dem = np.asarray(dem, dtype=np.float32)
+    dx, dy = abs(transform.a), abs(transform.e)
+    if crs is not None and pyproj.CRS(crs).is_geographic:
+        latitude = np.radians(transform.f + transform.e * dem.shape[0] / 2)
+        dx, dy = dx * 111320.0 * np.cos(latitude), dy * 110540.0
+    # Gradients towards the east (columns) and the south (rows)
+    dz_dy, dz_dx = np.gradient(dem * np.float32(z_factor), dy, dx)
+    az, alt = np.radians(azimuth), np.radians(altitude)
+    light_east, light_north, light_up = (float(v) for v in (np.sin(az) * np.cos(alt), np.cos(az) * np.cos(alt), np.sin(alt)))
+    # Unit surface normal (-dz/dx_east, -dz/dy_north, 1) dotted with the light direction
+    shade = (light_up - dz_dx * light_east + dz_dy * light_north) / np.sqrt(1 + dz_dx ** 2 + dz_dy ** 2)
+    return np.clip(shade, 0, 1, out=shade)
+
+
+def register_layer(name, data, transform, crs, cmap="viridis", vmin=None, vmax=None):
+    """
+    Publishes a raster as a tile layer and returns its layer id.
+
+    `data` is an (h, w) product (colorized with `cmap`) or an (h, w, 3|4) uint8 image,
+    georeferenced by an affine `transform` in `crs`. Registering the same content
+    again returns the existing id without recomputing the pyramid.
+    """
+    data = np.asarray(data)
+    layer_id = f"{re.sub(r'[^A-Za-z0-9_-]', '_', name)}-{reprojection.image_hash(data)[:12]}"
+    with _lock:
+        if layer_id in _layers:
+            _layers.move_to_end(layer_id)
+            return layer_id
+
+    rgba = to_rgba(data, cmap, vmin, vmax)
+    warped, dst_transform = reprojection.reproject_array(
+        reprojection.to_bands_first(rgba), transform, crs, WEB_MERCATOR, nodata=0
+    )
+    rgba = np.ascontiguousarray(np.moveaxis(warped, 0, -1))
+    height, width = rgba.shape[:2]
+    x0, y0 = dst_transform * (0, 0)
+    x1, y1 = dst_transform * (width, height)
+
+    layer = Layer(rgba, (min(x0, x1), min(y0, y1), max(x0, x1), max(y0, y1)))
+    with _lock:
+        _layers[layer_id] = layer
+        while len(_layers) > MAX_LAYERS:
+            _layers.popitem(last=False)
+    return layer_id
+
+
+def layer_bounds_latlon(layer_id):
+    """Returns [[south, west], [north, east]] of a layer, as folium's fit_bounds expects."""
+    xmin, ymin, xmax, ymax = _layers[layer_id].bounds
+    lon = np.degrees(np.array([xmin, xmax]) / 6378137.0)
+    lat = np.degrees(2 * np.arctan(np.exp(np.array([ymin, ymax]) / 6378137.0)) - np.pi / 2)
+    return [[lat[0], lon[0]], [lat[1], lon[1]]]
+
+
+# --- Tiles ---
+
+def tile_bounds(z, x, y):
+    """Returns the (xmin, ymin, xmax, ymax) Web Mercator bounds of XYZ tile z/x/y."""
+    size = 2 * ORIGIN / (1 << z)
+    xmin = -ORIGIN + x * size
+    ymax = ORIGIN - y * size
+    return xmin, ymax - size, xmin + size, ymax
+
+
+@lru_cache(maxsize=None)
+def _empty_tile(fmt):
+    return cv2.imencode(TILE_FORMATS[fmt], np.zeros((TILE_SIZE, TILE_SIZE, 4), np.uint8))[1].tobytes()
+
+
+def render_tile(layer_id, z, x, y):
+    """Returns tile z/x/y of a layer as RGBA uint8, or None when the tile is outside the layer."""
+    layer = _layers[layer_id]
+    txmin, tymin, txmax, tymax = tile_bounds(z, x, y)
+    lxmin, lymin, lxmax, lymax = layer.bounds
+    if txmax <= lxmin or txmin >= lxmax or tymax <= lymin or tymin >= lymax:
+        return None
+
+    tile_resolution = (txmax - txmin) / TILE_SIZE
+    level, level_resolution = layer.level_for(tile_resolution)
+    step = tile_resolution / level_resolution
+    # Affine map from tile pixel centres to level pixel coordinates
+    matrix = np.array([
+        [step, 0, (txmin - lxmin) / level_resolution + step / 2 - 0.5],
+        [0, step, (lymax - tymax) / level_resolution + step / 2 - 0.5],
+    ], dtype=np.float64)
+    return cv2.warpAffine(
+        level, matrix, (TILE_SIZE, TILE_SIZE),
+        flags=cv2.INTER_LINEAR | cv2.WARP_INVERSE_MAP,
+        borderMode=cv2.BORDER_CONSTANT, borderValue=(0, 0, 0, 0)
+    )
+
+
+@lru_cache(maxsize=TILE_CACHE_SIZE)
+def get_tile(layer_id, z, x, y, fmt="png"):
+    """Returns the encoded tile bytes (LRU-cached)."""
+    tile = render_tile(layer_id, z, x, y)
+    if tile is None:
+        return _empty_tile(fmt)
+    return cv2.imencode(TILE_FORMATS[fmt], cv2.cvtColor(tile, cv2.COLOR_RGBA2BGRA))[1].tobytes()
+
+
+# --- HTTP endpoint ---
+
+_TILE_PATH = re.compile(r"^/tiles/([A-Za-z0-9_-]+)/(\d+)/(\d+)/(\d+)\.(png|webp)$")
+
+
+class TileHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        match = _TILE_PATH.match(self.path.split("?")[0])
+        if not match or match.group(1) not in _layers:
+            self.send_error(404)
+            return
+        layer_id, z, x, y, fmt = match.groups()
+        body = get_tile(layer_id, int(z), int(x), int(y), fmt)
+
+        self.send_response(200)
+        self.send_header("Content-Type", f"image/{fmt}")
+        self.send_header("Content-Length", str(len(body)))
+        self.send_header("Cache-Control", "public, max-age=3600")
+        self.send_header("Access-Control-Allow-Origin", "*")
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def start_server(host="127.0.0.1", port=0):
+    """Starts the tile server once per process (in a daemon thread) and returns its base URL."""
+    global _server
+    with _lock:
+        if _server is None:
+            _server = ThreadingHTTPServer((host, port), TileHandler)
+            threading.Thread(target=_server.serve_forever, daemon=True).start()
+    public_url = os.environ.get("IMASR_TILE_URL")
+    if public_url:
+        return public_url.rstrip("/")
+    host, port = _server.server_address[:2]
+    return f"http://{host}:{port}"
+
+
+def tile_url(layer_id, fmt="png"):
+    """Returns the XYZ URL template of a layer, starting the server if needed."""
+    return f"{start_server()}/tiles/{layer_id}/{{z}}/{{x}}/{{y}}.{fmt}"
+
+
+def folium_layer(layer_id, name, fmt="png", opacity=1.0):
+    """Returns a folium TileLayer that reads the layer from the local tile server."""
+    return folium.TileLayer(
+        tiles=tile_url(layer_id, fmt), attr="ImaSR", name=name,
+        overlay=True, control=True, opacity=opacity, max_zoom=22
+    )
+
+
+def folium_map(layers, fmt="png"):
+    """
+    Builds a folium map with an OpenStreetMap base, one overlay per (layer_id, name)
+    pair and a layer control, fitted to the first layer.
+    """
+    m = folium.Map(tiles="OpenStreetMap")
+    for layer_id, name in layers:
+        folium_layer(layer_id, name, fmt).add_to(m)
+    folium.LayerControl().add_to(m)
+    m.fit_bounds(layer_bounds_latlon(layers[0][0]))
+    return m